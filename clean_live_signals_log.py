@@ -1,29 +1,161 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "src")))
+
+import argparse
 import csv
+import io
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.backfill_engine import BLOCK_BYTES, iter_blocks, log_lock, parse_timestamps, read_header
+from core.storage import DATASETS
 
 input_path = "data/live_signals_log.csv"
 output_path = "data/live_signals_log_cleaned.csv"
 log_path = "data/dropped_rows.csv"
 
-EXPECTED_COLUMNS = 9
+# Declared schema: the live_signals dataset (same columns as initialize_log writes)
+SCHEMA = DATASETS["live_signals"][0]
+COLUMNS = SCHEMA.names
+EXPECTED_COLUMNS = len(COLUMNS)
+REQUIRED = ["timestamp", "pair", "label", "confidence", "signal"]
+HEAD = COLUMNS.index("title")             # fields before the free text (title, description)
+TAIL = len(COLUMNS) - COLUMNS.index("description") - 1  # fields after it
 
-with open(input_path, "r", newline='', encoding="utf-8") as infile, \
-     open(output_path, "w", newline='', encoding="utf-8") as outfile, \
-     open(log_path, "w", newline='', encoding="utf-8") as logfile:
 
-    reader = csv.reader(infile)
-    writer = csv.writer(outfile)
-    drop_writer = csv.writer(logfile)
+def repair_row(row):
+    """
+    Undo the shift caused by unquoted commas in title/description: the fixed
+    fields at both ends are kept and the pieces between them are rejoined.
+    Commas inside text are followed by a space while a field separator is
+    not, so the one piece without a leading space starts the description.
+    Returns the repaired row, or None when the split is ambiguous.
+    """
+    middle = row[HEAD:len(row) - TAIL]
+    starts = [i for i in range(1, len(middle)) if not middle[i].startswith(" ")]
+    if len(starts) != 1:
+        return None
+    split = starts[0]
+    return row[:HEAD] + [",".join(middle[:split]), ",".join(middle[split:])] + row[len(row) - TAIL:]
 
-    header = next(reader)
-    writer.writerow(header)
-    drop_writer.writerow(header)
 
-    for i, row in enumerate(reader, start=2):  # line numbers start after header
-        if len(row) == EXPECTED_COLUMNS:
-            writer.writerow(row)
+def validate(rows):
+    """Reason per row (None = valid), checked column by column against SCHEMA."""
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    reasons = np.full(len(df), None, dtype=object)
+    for field in SCHEMA:
+        values = df[field.name].str.strip()
+        empty = (values == "").to_numpy()
+        if pa.types.is_timestamp(field.type):
+            bad = parse_timestamps(values).isna().to_numpy()
+        elif pa.types.is_floating(field.type):
+            bad = ~empty & np.isnan(pd.to_numeric(values, errors="coerce").to_numpy(dtype=float))
         else:
-            drop_writer.writerow(row)
-            print(f"Dropped line {i}: {row}")
+            bad = np.zeros(len(df), dtype=bool)
+        if field.name in REQUIRED:
+            bad = bad | empty
+        reasons[bad & pd.isna(reasons)] = f"bad_{field.name}"  # first failing column
+    return reasons
+
+
+def clean_log(src=input_path, dst=output_path, quarantine=log_path, repair=False, in_place=False,
+              block_bytes=BLOCK_BYTES) -> Counter:
+    """
+    Stream the log block by block, write the valid rows to dst (or back over
+    src with in_place) and the rest to the quarantine file with their record
+    number and reason. Memory stays at about one block whatever the log size.
+    In place, the log lock is held throughout, so log_signals waits instead
+    of appending rows the replacement would drop.
+    """
+    with log_lock(src) if in_place else nullcontext():
+        return _clean_log(src, dst, quarantine, repair, in_place, block_bytes)
+
+
+def _clean_log(src, dst, quarantine, repair, in_place, block_bytes):
+    t0 = time.perf_counter()
+    counts = Counter()
+    header, header_len = read_header(src)
+    if header != COLUMNS:
+        print(f"❌ {src} header {header} does not match the declared schema {COLUMNS}")
+        return counts
+
+    target = src + ".clean.tmp" if in_place else dst
+    os.makedirs(os.path.dirname(quarantine) or ".", exist_ok=True)
+    with open(target, "w", newline="", encoding="utf-8") as outfile, \
+         open(quarantine, "w", newline="", encoding="utf-8") as logfile:
+        writer = csv.writer(outfile)
+        drop_writer = csv.writer(logfile)
+        writer.writerow(COLUMNS)
+        drop_writer.writerow(["record", "reason"] + COLUMNS)
+
+        record, end = 1, header_len  # record 1 is the header
+        for offset, data in iter_blocks(src, header_len, block_bytes):
+            end = offset + len(data)
+            rows = list(csv.reader(io.StringIO(data.decode("utf-8", errors="replace"), newline="")))
+            numbers = np.arange(record + 1, record + 1 + len(rows))
+            record += len(rows)
+
+            shaped, shaped_at, fixed_rows, dropped = [], [], [], []
+            for n, row in zip(numbers, rows):
+                if len(row) == EXPECTED_COLUMNS:
+                    shaped.append(row)
+                    shaped_at.append(n)
+                    continue
+                fixed = repair_row(row) if repair and len(row) > EXPECTED_COLUMNS else None
+                if fixed is not None:
+                    fixed_rows.append(len(shaped))
+                    shaped.append(fixed)
+                    shaped_at.append(n)
+                elif row:
+                    dropped.append((n, "too_many_fields" if len(row) > EXPECTED_COLUMNS else "too_few_fields", row))
+
+            reasons = validate(shaped) if shaped else []
+            writer.writerows(row for row, reason in zip(shaped, reasons) if reason is None)
+            dropped += [(n, reason, row) for n, reason, row in zip(shaped_at, reasons, shaped) if reason]
+            for n, reason, row in sorted(dropped, key=lambda d: d[0]):
+                drop_writer.writerow([int(n), reason] + row)
+                counts[reason] += 1
+            counts["rows"] += sum(1 for row in rows if row)
+            counts["kept"] += sum(reason is None for reason in reasons)
+            counts["repaired"] += sum(reasons[i] is None for i in fixed_rows)
+
+        with open(src, "rb") as f:  # a torn last row, e.g. from an interrupted write
+            f.seek(end)
+            torn = f.read().decode("utf-8", errors="replace")
+        if torn.strip():
+            drop_writer.writerow([record + 1, "torn_row", torn])
+            counts["rows"] += 1
+            counts["torn_row"] += 1
+        outfile.flush()
+        os.fsync(outfile.fileno())
+
+    if in_place:
+        os.replace(target, src)
+    counts["seconds"] = time.perf_counter() - t0
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the live signal log and quarantine bad rows")
+    parser.add_argument("--input", default=input_path)
+    parser.add_argument("--output", default=output_path)
+    parser.add_argument("--quarantine", default=log_path)
+    parser.add_argument("--repair", action="store_true", help="rejoin titles/descriptions split by unquoted commas")
+    parser.add_argument("--in-place", action="store_true", help="atomically replace the input with the cleaned log")
+    args = parser.parse_args()
 
-print(f"✅ Cleaned log saved to: {output_path}")
-print(f"🗑️ Dropped rows saved to: {log_path}")
+    counts = clean_log(args.input, args.output, args.quarantine, args.repair, args.in_place)
+    if counts["rows"]:
+        seconds = counts.pop("seconds")
+        rows, kept, repaired = counts.pop("rows"), counts.pop("kept"), counts.pop("repaired", 0)
+        print(f"✅ Cleaned log saved to: {args.input if args.in_place else args.output}")
+        print(f"   {rows} rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s): "
+              f"{kept} kept, {repaired} repaired, {rows - kept} quarantined")
+        for reason, n in counts.most_common():
+            print(f"   🗑️ {reason}: {n}")
+        print(f"🗑️ Dropped rows saved to: {args.quarantine}")
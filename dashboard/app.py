@@ -3,17 +3,55 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
 import streamlit as st
-from core.plot_returns import calculate_returns, summarize_returns, plot_cumulative_returns
+from core.metrics_engine import MetricsEngine, group_means, summary
+from core.plot_returns import altair_cumulative_returns, render_cumulative_returns
+from core.signal_store import LOG_BACKEND, SignalStore
 
 st.set_page_config(page_title="FX Sentiment Trading Dashboard", layout="wide")
 st.title("📈 FX Sentiment Trading Dashboard")
 
 LOG_FILE = "data/live_signals_log.csv"
+PAGE_SIZES = [50, 100, 250, 500]
+
+# --- Data access ---
+# The metrics engine keeps an indexed store of the enriched log, updated from
+# only the rows added since the last rerun. Everything below is cached by the
+# log version, so reruns on an unchanged log never touch the data, and
+# filtering / paging run as SQL against the store, materializing one page.
+
+@st.cache_resource
+def get_engine():
+    if LOG_BACKEND == "sqlite":
+        return MetricsEngine(store=SignalStore())  # WAL: reads never wait for the live logger
+    return MetricsEngine(LOG_FILE)
+
+@st.cache_data
+def load_filter_options(version):
+    engine = get_engine()
+    return engine.distinct("pair"), engine.distinct("label"), engine.time_range()
+
+@st.cache_data
+def load_curve(version):
+    return get_engine().curve()
+
+@st.cache_data
+def count_rows(version, pairs, labels, start, end):
+    return get_engine().count(list(pairs), list(labels), start, end)
+
+@st.cache_data
+def load_averages(version, by, pairs, labels, start, end):
+    return get_engine().averages(by, list(pairs), list(labels), start, end)
+
+@st.cache_data(max_entries=64)
+def load_page(version, pairs, labels, start, end, offset, limit):
+    return get_engine().page(list(pairs), list(labels), start, end, offset, limit)
 
 # --- 1) Load & enrich all signals ---
 try:
-    df_full, returns, cumulative = calculate_returns(LOG_FILE)
-    if df_full.empty:
+    engine = get_engine()
+    snapshot = engine.update()
+    version = engine.version
+    if not snapshot["rows"]:
         st.warning("⚠️ No valid signals found in log.")
         st.stop()
 except Exception as e:
@@ -21,23 +59,22 @@ except Exception as e:
     st.stop()
 
 # --- 2) Sidebar filters (for attribution & log only) ---
+pairs, sentiments, (first_ts, last_ts) = load_filter_options(version)
 with st.sidebar:
     st.header("🔍 Filters")
-    pairs = df_full["pair"].dropna().unique().tolist()
     selected_pairs = st.multiselect("Currency Pairs", pairs, default=pairs)
-
-    sentiments = df_full["label"].dropna().unique().tolist()
     selected_sentiments = st.multiselect("Sentiment", sentiments, default=sentiments)
 
-# apply filters to create a display-subset
-df_display = df_full[
-    df_full["pair"].isin(selected_pairs) &
-    df_full["label"].isin(selected_sentiments)
-].copy()
+    start_date, end_date = None, None
+    if first_ts is not None:
+        dates = st.date_input("Date range", (first_ts.date(), last_ts.date()),
+                              min_value=first_ts.date(), max_value=last_ts.date())
+        if len(dates) == 2:
+            start_date, end_date = dates
 
 # --- 3) Performance Summary (always on full history) ---
 st.subheader("📊 Performance Summary")
-metrics = summarize_returns(returns)
+metrics = summary(snapshot)
 
 c1, c2, c3, c4 = st.columns(4)
 c1.metric("Total Return (%)",   f"{metrics['Total Return']:.2f}")
@@ -45,13 +82,25 @@ c2.metric("Sharpe Ratio",       f"{metrics['Sharpe Ratio']:.2f}")
 c3.metric("Max Drawdown (%)",   f"{metrics['Max Drawdown']:.2f}")
 c4.metric("Win Rate",           f"{metrics['Win Rate'] * 100:.2f}%")
 
-st.pyplot(plot_cumulative_returns(cumulative))
+# both renderers draw a min/max-downsampled curve; the static one is cached as a PNG per log version
+if st.toggle("Interactive chart", value=False):
+    st.altair_chart(altair_cumulative_returns(load_curve(version)), use_container_width=True)
+else:
+    st.image(render_cumulative_returns(load_curve(version), version))
 
 # --- 4) Attribution Analysis (on filtered subset) ---
 st.subheader("📌 Attribution Analysis")
+filters = (tuple(selected_pairs), tuple(selected_sentiments), start_date, end_date)
+all_dates = first_ts is None or (start_date == first_ts.date() and end_date == last_ts.date())
+
+def attribution(by):
+    # running group stats cover all dates; a narrower date range is aggregated in the store
+    if all_dates:
+        return group_means(snapshot, by, selected_pairs, selected_sentiments)
+    return load_averages(version, by, *filters)
 
 st.markdown("**Average Return by Currency Pair**")
-pair_stats = df_display.groupby("pair")["return_pct"].mean().sort_values(ascending=False)
+pair_stats = attribution("pair")
 st.dataframe(
     pair_stats
       .reset_index()
@@ -59,17 +108,22 @@ st.dataframe(
 )
 
 st.markdown("**Average Return by Sentiment**")
-label_stats = df_display.groupby("label")["return_pct"].mean().sort_values(ascending=False)
+label_stats = attribution("label")
 st.dataframe(
     label_stats
       .reset_index()
       .rename(columns={"return_pct":"Avg Return (%)"})
 )
 
-# --- 5) Live Signals Log (with return_pct & cumulative_return) ---
+# --- 5) Live Signals Log (with return_pct & cumulative_return), one page at a time ---
 st.subheader("📄 Live Signals Log")
-st.dataframe(
-    df_display
-      .sort_values("timestamp", ascending=False)
-      .reset_index(drop=True)
-)
+total = count_rows(version, *filters)
+
+c1, c2 = st.columns([1, 3])
+page_size = c1.selectbox("Rows per page", PAGE_SIZES, index=1)
+pages = max(1, -(-total // page_size))
+page = c2.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1)
+
+st.caption(f"{total:,} matching signals — showing {(page - 1) * page_size + 1 if total else 0:,}"
+           f"–{min(page * page_size, total):,}, newest first")
+st.dataframe(load_page(version, *filters, (page - 1) * page_size, page_size))
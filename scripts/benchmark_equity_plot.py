@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# scripts/benchmark_equity_plot.py
+#
+# Render time of the cumulative-return chart vs. series length: every point
+# drawn (the old plot_cumulative_returns), min/max and LTTB downsampling to
+# the pixel width, a cached re-render, and the payload an Altair chart ships.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import argparse
+import io
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from core.plot_returns import (
+    PLOT_WIDTH_PX, altair_cumulative_returns, downsample_curve, plot_cumulative_returns, render_cumulative_returns,
+)
+
+
+def synthetic_curve(n, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.cumsum(rng.normal(0.01, 1.0, n)), name="cumulative_return")
+
+
+def png_time(fig):
+    start = time.perf_counter()
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def full_render(curve):
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(10, 4))
+    curve.plot(ax=ax, title="Cumulative Return (%)")
+    return time.perf_counter() - start + png_time(fig)
+
+
+def downsampled_render(curve, method):
+    start = time.perf_counter()
+    fig = plot_cumulative_returns(curve, PLOT_WIDTH_PX, method)
+    return time.perf_counter() - start + png_time(fig)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark equity-curve rendering")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000,5000000")
+    parser.add_argument("--skip-full-above", type=int, default=2_000_000,
+                        help="do not draw every point for longer series")
+    args = parser.parse_args()
+
+    print(f"{'points':>10} {'full':>9} {'minmax':>9} {'lttb':>9} {'cached':>9} {'drawn':>7} {'altair KB':>10}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        curve = synthetic_curve(n)
+        full = full_render(curve) if n <= args.skip_full_above else float("nan")
+        minmax = downsampled_render(curve, "minmax")
+        lttb = downsampled_render(curve, "lttb")
+
+        render_cumulative_returns(curve, version=n)
+        start = time.perf_counter()
+        render_cumulative_returns(curve, version=n)
+        cached = time.perf_counter() - start
+
+        drawn = len(downsample_curve(curve))
+        spec = altair_cumulative_returns(curve).to_json()
+        print(f"{n:>10,} {full:>8.3f}s {minmax:>8.3f}s {lttb:>8.3f}s {cached:>8.5f}s {drawn:>7,} {len(spec) / 1024:>10.1f}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# scripts/benchmark_finbert.py
+#
+# Compares FinBERT execution modes on real articles: articles/sec and how
+# often each mode agrees with the plain fp32 / max_length=512 labels.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import argparse
+import time
+import pandas as pd
+
+from nlp import sentiment_labeler as sl
+
+INPUT_FILE = "data/cleaned_fx_news.csv"
+
+
+def run(name, texts, bucketed, baseline=None):
+    start = time.perf_counter()
+    labels, _ = sl.predict_texts(texts, bucketed=bucketed)
+    elapsed = time.perf_counter() - start
+    agreement = (
+        sum(a == b for a, b in zip(labels, baseline)) / len(labels) * 100
+        if baseline else 100.0
+    )
+    return {
+        "mode": name,
+        "articles/sec": round(len(texts) / elapsed, 1),
+        "seconds": round(elapsed, 2),
+        "agreement_%": round(agreement, 2),
+    }, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FinBERT CPU execution modes")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--max-length", type=int, default=sl.HEADLINE_MAX_LENGTH)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input).head(args.limit)
+    texts = (df["title"].fillna("") + " " + df["description"].fillna("")).tolist()
+    print(f"📚 Benchmarking {len(texts)} articles from {args.input}")
+
+    sl.configure_cpu(num_threads=args.threads)
+    results = []
+
+    row, baseline = run("fp32 / 512 / unsorted", texts, bucketed=False)
+    results.append(row)
+    row, _ = run("fp32 / 512 / bucketed", texts, bucketed=True, baseline=baseline)
+    results.append(row)
+
+    sl.configure_cpu(max_length=args.max_length)
+    row, _ = run(f"fp32 / {args.max_length} / bucketed", texts, bucketed=True, baseline=baseline)
+    results.append(row)
+
+    sl.configure_cpu(quantize=True)
+    row, _ = run(f"int8 / {args.max_length} / bucketed", texts, bucketed=True, baseline=baseline)
+    results.append(row)
+
+    print("\n📊 FinBERT CPU benchmark")
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# scripts/benchmark_keyword_matcher.py
+#
+# Micro-benchmark: the old per-module substring passes (FX keywords, then
+# 7 pairs, then bullish/bearish lists) vs. one KeywordMatcher scan, on a
+# synthetic corpus of headlines.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import argparse
+import random
+import time
+
+from nlp.keyword_matcher import FX_KEYWORDS, BULLISH_WORDS, BEARISH_WORDS, scan
+from live.live_signal_generator import CURRENCY_PAIRS, pairs_for
+
+VOCAB = [
+    "dollar", "euro", "yen", "pound", "usd", "eur", "jpy", "gbp", "chf", "aud", "cad", "nzd",
+    "fed", "ecb", "boj", "boe", "rate", "hike", "cut", "inflation", "market", "bond",
+    "rallies", "gains", "falls", "drops", "weak", "strong", "hawkish", "dovish", "recession",
+    "stocks", "oil", "earnings", "tech", "shares", "company", "profit", "outlook", "traders",
+    "week", "data", "jobs", "report", "ahead", "after", "as", "the", "on", "in", "of", "to",
+]
+
+
+def synthetic_headlines(n, seed=7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(VOCAB, k=rng.randint(6, 14))) for _ in range(n)]
+
+
+def substring_passes(text):
+    text = text.lower()
+    fx = any(keyword in text for keyword in FX_KEYWORDS)
+    pairs = tuple(p for p, (base, quote) in CURRENCY_PAIRS.items() if base in text or quote in text)
+    bullish = any(word in text for word in BULLISH_WORDS)
+    bearish = any(word in text for word in BEARISH_WORDS)
+    return fx, pairs, bullish, bearish
+
+
+def single_scan(text):
+    hits = scan(text)
+    pairs = pairs_for(hits["currency"])
+    return bool(hits["fx"]), pairs, bool(hits["bullish"]), bool(hits["bearish"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FX keyword matching")
+    parser.add_argument("--n", type=int, default=1_000_000, help="number of synthetic headlines")
+    args = parser.parse_args()
+
+    corpus = synthetic_headlines(args.n)
+    print(f"📚 {len(corpus):,} synthetic headlines")
+
+    results = {}
+    for name, fn in [("substring passes", substring_passes), ("single scan", single_scan)]:
+        start = time.perf_counter()
+        results[name] = [fn(text) for text in corpus]
+        elapsed = time.perf_counter() - start
+        print(f"{name:<17}: {elapsed:6.2f}s  ({len(corpus) / elapsed:,.0f} headlines/sec)")
+
+    # substring tests also fire inside longer words ("eur" in "europe", "fed" in "confederation")
+    differ = sum(a != b for a, b in zip(results["substring passes"], results["single scan"]))
+    print(f"headlines where the two disagree: {differ:,} ({differ / len(corpus) * 100:.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# scripts/benchmark_near_dedup.py
+#
+# Near-duplicate collapsing before inference: how many texts are left to
+# label (compression ratio), the time it saves, and how often the label a
+# near-duplicate reuses from its canonical matches what full inference on
+# every text gives it. Runs on a labeled-news CSV or synthetic syndicated
+# headlines (copies with source suffixes, punctuation and word changes).
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from nlp.near_dedup import THRESHOLD, near_duplicates
+
+STORIES = [
+    "{c} rallies as {b} signals further rate hikes",
+    "{c} falls after weak {d} data",
+    "{b} holds rates steady, {c} little changed",
+    "Dollar gains ahead of US jobs report as traders price {b} path",
+    "{c} drops to two-week low on recession fears",
+    "Strong {d} inflation lifts {c}",
+]
+FILL = {
+    "c": ["EUR/USD", "GBP/USD", "USD/JPY", "AUD/USD", "USD/CAD", "the euro", "the yen", "sterling"],
+    "b": ["ECB", "Fed", "BoE", "BoJ", "RBA"],
+    "d": ["German", "US", "UK", "Japanese", "Canadian"],
+}
+SOURCES = ["", " - Reuters", " | Bloomberg", " (FXStreet)", " - MarketWatch"]
+WORDS = ["".join(random.Random(i).choices("abcdefghijklmnopqrstuvwxyz", k=random.Random(-i).randint(3, 9)))
+         for i in range(5000)]
+SWAPS = [("US", "U.S."), (" as ", ", "), ("further", "more"), ("ahead of", "before")]
+
+
+def synthetic_articles(n, copies=4, seed=11):
+    rng = random.Random(seed)
+    start = pd.Timestamp("2025-01-01", tz="UTC")
+    rows = []
+    while len(rows) < n:
+        title = rng.choice(STORIES).format(**{k: rng.choice(v) for k, v in FILL.items()})
+        description = " ".join(rng.choices(WORDS, k=rng.randint(12, 30)))  # story-specific body text
+        published = start + pd.Timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        for _ in range(rng.randint(1, copies)):
+            copy = title
+            for old, new in rng.sample(SWAPS, rng.randint(0, 2)):
+                copy = copy.replace(old, new)
+            rows.append((copy + rng.choice(SOURCES), description,
+                         published + pd.Timedelta(minutes=rng.randint(0, 600))))
+    return pd.DataFrame(rows[:n], columns=["title", "description", "publishedAt"])
+
+
+def load_predictor(model):
+    if model == "vader":
+        from nlp.inference import vader_predict
+        return vader_predict
+    from nlp.sentiment_labeler import predict_texts
+    return lambda texts: predict_texts(texts, progress=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate collapsing before inference")
+    parser.add_argument("--input", help="CSV with title, description and publishedAt/timestamp (default: synthetic)")
+    parser.add_argument("--n", type=int, default=20_000, help="synthetic articles")
+    parser.add_argument("--model", choices=["vader", "finbert"], default="vader")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input) if args.input else synthetic_articles(args.n)
+    texts = (df["title"].fillna("").astype(str) + " " + df["description"].fillna("").astype(str)).tolist()
+    time_column = next((c for c in ("publishedAt", "timestamp") if c in df.columns), None)
+    predict = load_predictor(args.model)
+    print(f"📚 {len(texts):,} articles, {args.model}, threshold {args.threshold}")
+
+    start = time.perf_counter()
+    canonical = near_duplicates(texts, df[time_column] if time_column else None, args.threshold)
+    dedup_seconds = time.perf_counter() - start
+    unique = np.flatnonzero(canonical == np.arange(len(texts)))
+
+    start = time.perf_counter()
+    unique_labels, _ = predict([texts[i] for i in unique])
+    collapsed_seconds = time.perf_counter() - start + dedup_seconds
+    at = np.empty(len(texts), dtype=np.int64)
+    at[unique] = np.arange(len(unique))
+    reused = np.asarray(unique_labels, dtype=object)[at[canonical]]
+
+    start = time.perf_counter()
+    full_labels, _ = predict(texts)
+    full_seconds = time.perf_counter() - start
+
+    full = np.asarray(full_labels, dtype=object)
+    collapsed = canonical != np.arange(len(texts))
+    print(f"🧬 {len(texts):,} texts → {len(unique):,} canonical ({len(texts) / len(unique):.2f}x compression), "
+          f"dedup {dedup_seconds:.2f}s ({len(texts) / max(dedup_seconds, 1e-9):,.0f} texts/s)")
+    print(f"⏱️ full inference {full_seconds:.2f}s, dedup + canonical inference {collapsed_seconds:.2f}s "
+          f"({full_seconds / max(collapsed_seconds, 1e-9):.2f}x)")
+    print(f"🎯 label agreement with full inference: {np.mean(reused == full):.2%} of all texts, "
+          f"{np.mean(reused[collapsed] == full[collapsed]) if collapsed.any() else 1.0:.2%} "
+          f"of the {collapsed.sum():,} collapsed ones")
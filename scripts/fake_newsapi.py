@@ -0,0 +1,97 @@
+"""
+Local stand-in for NewsAPI's /v2/everything, for exercising the concurrent
+fetcher without an API key or quota:
+
+    python scripts/fake_newsapi.py --port 8765 --rate-limit-every 7 &
+    python src/core/news_fetcher.py --url http://127.0.0.1:8765/v2/everything
+
+Serves a deterministic stream of articles (one per minute, newest first),
+honours q / from / to / page / pageSize, answers every Nth request with
+429 + Retry-After, and returns 304 when If-None-Match matches the ETag.
+"""
+import argparse
+import hashlib
+import json
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from urllib.parse import parse_qs, urlparse
+
+TOPICS = ["EUR", "USD", "JPY", "GBP", "FOMC", "ECB", "BoJ", "BoE", "forex", "interest rate"]
+
+
+def make_articles(count, now):
+    articles = []
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        articles.append({
+            "source": {"id": None, "name": "Fake Wire"},
+            "author": None,
+            "title": f"{topic} moves as markets digest data #{i}",
+            "description": f"Synthetic {topic} headline {i}",
+            "url": f"https://fake.example/{i}",
+            "publishedAt": (now - timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "content": None,
+        })
+    return articles
+
+
+class FakeNewsAPI(BaseHTTPRequestHandler):
+    articles = []
+    rate_limit_every = 0
+    requests = 0
+    lock = Lock()
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with FakeNewsAPI.lock:
+            FakeNewsAPI.requests += 1
+            n = FakeNewsAPI.requests
+        if self.rate_limit_every and n % self.rate_limit_every == 0:
+            return self._send(429, {"status": "error", "code": "rateLimited", "message": "slow down"},
+                              {"Retry-After": "0.2"})
+
+        qs = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        words = [w.strip('"').lower() for w in qs.get("q", "").split(" OR ")]
+        since = qs.get("from", "")
+        until = qs.get("to", "9999")
+        matches = [
+            a for a in self.articles
+            if since <= a["publishedAt"][:19] <= until and any(w in a["title"].lower() for w in words)
+        ]
+        size = int(qs.get("pageSize", 100))
+        page = int(qs.get("page", 1))
+        payload = {"status": "ok", "totalResults": len(matches),
+                   "articles": matches[(page - 1) * size:page * size]}
+
+        etag = '"' + hashlib.sha1(json.dumps(payload).encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers={"ETag": etag})
+        self._send(200, payload, {"ETag": etag})
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake NewsAPI server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--rate-limit-every", type=int, default=0,
+                        help="answer every Nth request with 429 (0 = never)")
+    args = parser.parse_args()
+
+    FakeNewsAPI.articles = make_articles(args.articles, datetime.utcnow())
+    FakeNewsAPI.rate_limit_every = args.rate_limit_every
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), FakeNewsAPI)
+    print(f"🧪 Fake NewsAPI on http://127.0.0.1:{args.port}/v2/everything ({args.articles} articles)")
+    server.serve_forever()
@@ -0,0 +1,354 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import fcntl
+import io
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.price_cache import trading_day
+from core.price_service import MAX_STALENESS_DAYS
+
+LOG_FILE = "data/live_signals_log.csv"
+CONF_THRESH = 0.75
+EXIT_DELAY = timedelta(days=1)   # daily exit: the close one day after the signal
+BLOCK_BYTES = 8 << 20            # rows are read, priced and rewritten this many bytes at a time
+
+DIRECTION = {"positive": 1, "bullish": 1, "negative": -1, "bearish": -1}
+PAIR_COLUMNS = ("pair", "currency_pair")   # current log / older logs
+LABEL_COLUMNS = ("label", "sentiment")
+
+
+# ---------------------- LOG LOCK ----------------------
+#
+# Held by log_signals while it appends a batch and by anything that swaps
+# the log for a rewritten copy (backfill, in-place cleaning) while it copies
+# the last rows and replaces the file, so no appended batch is lost.
+
+@contextmanager
+def log_lock(path):
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+# ---------------------- BLOCK READER ----------------------
+#
+# The log is read in BLOCK_BYTES blocks cut at record boundaries: a newline
+# ends a record only when an even number of quote characters precedes it
+# (CSV escapes quotes by doubling them), so quoted newlines in titles never
+# split a row.
+
+def read_header(path):
+    with open(path, "rb") as f:
+        line = f.readline()
+    return pd.read_csv(io.BytesIO(line), nrows=0).columns.tolist(), len(line)
+
+
+def _record_end(buf):
+    data = np.frombuffer(buf, dtype=np.uint8)
+    newlines = np.flatnonzero(data == 10)
+    if not len(newlines):
+        return 0
+    quotes = np.flatnonzero(data == 34)
+    ends = newlines[np.searchsorted(quotes, newlines) % 2 == 0]
+    return int(ends[-1]) + 1 if len(ends) else 0
+
+
+def iter_blocks(path, start, block_bytes=BLOCK_BYTES, stop=None):
+    """
+    (offset, bytes) of complete-row blocks from byte offset start to EOF (or
+    to byte offset stop); a torn last row is not yielded.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset, buf = start, b""
+        while True:
+            chunk = f.read(block_bytes if stop is None else min(block_bytes, stop - offset - len(buf)))
+            if not chunk:
+                return
+            buf += chunk
+            end = _record_end(buf)
+            if end:
+                yield offset, buf[:end]
+                offset += end
+                buf = buf[end:]
+
+
+def _parse(data, columns, usecols=None):
+    return pd.read_csv(io.BytesIO(data), header=None, names=columns, usecols=usecols,
+                       dtype=str, keep_default_na=False)
+
+
+# ---------------------- ROW RULES ----------------------
+
+def _column(columns, candidates):
+    return next((c for c in candidates if c in columns), None)
+
+
+def _numeric(values):
+    return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float, copy=True)
+
+
+def parse_timestamps(values):
+    """Naive UTC timestamps: the ISO fast path, then mixed formats for whatever it could not read."""
+    values = pd.Series(values)
+    ts = pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+    retry = ts.isna() & (values != "")
+    if retry.any():
+        ts[retry] = pd.to_datetime(values[retry], errors="coerce", utc=True, format="mixed")
+    return ts.dt.tz_localize(None)
+
+
+def _candidates(df, cols, ticker_map, conf_thresh, recompute):
+    """Trade direction (0 = not traded) and the traded rows that need prices."""
+    pair_col, label_col = cols
+    direction = df[label_col].str.lower().map(DIRECTION).fillna(0).to_numpy(dtype=int)
+    todo = (direction != 0) & df[pair_col].isin(list(ticker_map)).to_numpy()
+    if not recompute:
+        missing = np.zeros(len(df), dtype=bool)
+        for column in ("entry_price", "exit_price", "return_pct"):
+            if column in df:  # older logs have no exit_price column
+                missing |= df[column].str.strip().str.lower().isin(["", "nan"]).to_numpy()
+        todo &= missing
+    if "confidence" in df:
+        rows = np.flatnonzero(todo)
+        todo[rows] = np.nan_to_num(_numeric(df["confidence"].to_numpy()[rows])) >= conf_thresh
+    return direction, todo
+
+
+# ---------------------- PRICES ----------------------
+
+def asof_closes(closes, when):
+    """Backward as-of close for each timestamp (PriceService semantics: 4-day staleness, nothing for future days)."""
+    out = np.full(len(when), np.nan)
+    if closes is None or closes.empty or not len(when):
+        return out
+    left = pd.DataFrame({"ts": pd.Series(when).astype("datetime64[ns]").to_numpy(), "pos": np.arange(len(when))})
+    left = left.dropna(subset=["ts"]).sort_values("ts")
+    right = pd.DataFrame({"bar": closes.index.astype("datetime64[ns]"), "close": closes.to_numpy(dtype=float)})
+    joined = pd.merge_asof(left, right, left_on="ts", right_on="bar", direction="backward",
+                           tolerance=pd.Timedelta(days=MAX_STALENESS_DAYS))
+    out[joined["pos"].to_numpy()] = joined["close"].to_numpy()
+
+    day = pd.Series(when).dt.normalize()
+    day -= pd.to_timedelta((day.dt.weekday - 4).clip(lower=0), unit="D")
+    out[(day > trading_day(datetime.utcnow())).to_numpy()] = np.nan  # that close does not exist yet
+    return out
+
+
+def load_closes(ranges, loader):
+    """One range load per pair covering every entry and exit the backfill needs."""
+    prices = {}
+    for pair, (first, last) in ranges.items():
+        start = first.normalize() - timedelta(days=MAX_STALENESS_DAYS)
+        end = (last + EXIT_DELAY).normalize()
+        prices[pair] = loader(pair, start, end)
+    return prices
+
+
+# ---------------------- BACKFILL ----------------------
+
+def _fill_block(df, cols, prices, ticker_map, conf_thresh, recompute, carry):
+    """
+    Fill prices, returns and cumulative returns of one parsed block in place.
+    carry = (how far the returns before the block moved, cumulative return
+    before the block in the new file). Returns (changed, new carry).
+    """
+    pair_col = cols[0]
+    direction, todo = _candidates(df, cols, ticker_map, conf_thresh, recompute)
+
+    for column in ("entry_price", "exit_price", "return_pct", "cumulative_return"):
+        if column not in df:
+            df[column] = ""  # computed but not written: the log keeps its own columns
+    before = df[["entry_price", "exit_price", "return_pct", "cumulative_return"]].copy()
+    entry, exit_ = _numeric(df["entry_price"]), _numeric(df["exit_price"])
+    old_ret = _numeric(df["return_pct"])
+
+    ts = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    ts[todo] = parse_timestamps(df["timestamp"][todo]).to_numpy()
+    for pair in pd.unique(df[pair_col][todo]):
+        rows = np.flatnonzero(todo & (df[pair_col] == pair).to_numpy())
+        found_entry = asof_closes(prices.get(pair), ts.iloc[rows])
+        found_exit = asof_closes(prices.get(pair), ts.iloc[rows] + EXIT_DELAY)
+        take = np.isfinite(found_entry) & (recompute | np.isnan(entry[rows]))
+        entry[rows[take]] = found_entry[take]
+        take = np.isfinite(found_exit) & (recompute | np.isnan(exit_[rows]))
+        exit_[rows[take]] = found_exit[take]
+
+    priced = todo & np.isfinite(entry) & np.isfinite(exit_) & (entry != 0)
+    ret = np.where(recompute, 0.0, old_ret)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret[priced] = ((exit_ - entry) / entry * direction * 100)[priced]
+    ret[todo & ~priced & np.isnan(ret)] = 0.0  # log_signals' convention for a trade it cannot price yet
+
+    step = np.nan_to_num(ret)
+    delta, last = carry
+    if recompute:
+        cumulative = last + np.cumsum(step)
+    else:
+        # shift the stored running total by how far the returns before each row
+        # moved; rows without one continue from the previous row's total
+        old_cum = _numeric(df["cumulative_return"])
+        known = np.isfinite(old_cum)
+        shifted = old_cum + delta + np.cumsum(step - np.nan_to_num(old_ret))
+        total = np.cumsum(step)
+        base = pd.Series(np.where(known, shifted - total, np.nan)).ffill().fillna(last).to_numpy()
+        cumulative = np.where(known, shifted, base + total)
+        delta += float((step - np.nan_to_num(old_ret)).sum())
+
+    fmt = lambda values, digits: [f"{v:.{digits}f}" for v in values]
+    for column, values, digits in (("entry_price", entry, 6), ("exit_price", exit_, 6), ("return_pct", ret, 4),
+                                   ("cumulative_return", cumulative, 4)):
+        moved = np.isfinite(values) & ~np.isclose(values, _numeric(before[column]), rtol=0, atol=0.5 * 10 ** -digits)
+        if moved.any():
+            df.loc[moved, column] = np.asarray(fmt(values[moved], digits), dtype=object)
+
+    changed = not df[before.columns].equals(before)
+    return changed, (delta, float(cumulative[-1]) if len(cumulative) else last)
+
+
+def _rewrite_block(raw, columns, cols, prices, ticker_map, conf_thresh, recompute, carry):
+    """(bytes to write, changed, new carry, old cumulative return at the block's end) for one block."""
+    df = _parse(raw, columns)
+    old_cum = _numeric(df["cumulative_return"]) if "cumulative_return" in df else np.array([])
+    old_cum = old_cum[np.isfinite(old_cum)]
+    changed, carry = _fill_block(df, cols, prices, ticker_map, conf_thresh, recompute, carry)
+    if changed:
+        buf = io.StringIO()
+        df[columns].to_csv(buf, header=False, index=False, lineterminator="\n")
+        raw = buf.getvalue().encode("utf-8")
+    return raw, changed, carry, float(old_cum[-1]) if len(old_cum) else None
+
+
+def backfill(log_path=LOG_FILE, recompute=False, conf_thresh=CONF_THRESH, loader=None, ticker_map=None,
+             block_bytes=BLOCK_BYTES) -> dict:
+    """
+    Fill missing entry / exit prices, direction-signed returns and the running
+    cumulative return of the signal log.
+
+    Two streaming passes over BLOCK_BYTES blocks: the first finds the traded
+    rows that still miss a price and the date range each pair needs, every
+    pair's closes are then loaded once, and the second fills those rows with
+    as-of joins and array arithmetic. Blocks before the first row that
+    changes are copied byte-for-byte; the result goes to a temporary file
+    that atomically replaces the log. recompute=True re-prices every traded
+    row and rebuilds returns from scratch (non-traded rows return 0).
+    """
+    if loader is None:
+        from core.plot_returns import load_price_range as loader
+    if ticker_map is None:
+        from core.plot_returns import FX_TICKER_MAP as ticker_map
+
+    t0 = time.perf_counter()
+    stats = {"rows": 0, "candidates": 0, "rewritten_bytes": 0, "changed": False}
+    if not os.path.exists(log_path):
+        print(f"❌ File not found: {log_path}")
+        return stats
+
+    columns, header_len = read_header(log_path)
+    size = os.path.getsize(log_path)  # rows appended while this runs are carried over at the end
+    cols = (_column(columns, PAIR_COLUMNS), _column(columns, LABEL_COLUMNS))
+    if None in cols or "timestamp" not in columns:
+        print(f"❌ {log_path} needs timestamp, pair and label columns; found {columns}")
+        return stats
+    scan_cols = [c for c in columns if c in {"timestamp", "confidence", "entry_price", "exit_price",
+                                             "return_pct", "cumulative_return", *cols}]
+
+    # Pass 1: which rows need prices, over what range per pair, and where the first one is
+    ranges, first_block, carry = {}, None, (0.0, 0.0)
+    try:
+        for offset, data in iter_blocks(log_path, header_len, block_bytes, size):
+            df = _parse(data, columns, scan_cols)
+            stats["rows"] += len(df)
+            _, todo = _candidates(df, cols, ticker_map, conf_thresh, recompute)
+            stats["candidates"] += int(todo.sum())
+            if todo.any():
+                first_block = offset if first_block is None else first_block
+                spans = pd.DataFrame({"pair": df[cols[0]][todo].to_numpy(), "ts": parse_timestamps(df["timestamp"][todo]).to_numpy()})
+                spans = spans.dropna().groupby("pair")["ts"].agg(["min", "max"])
+                for pair, (lo, hi) in spans.iterrows():
+                    seen = ranges.get(pair, (lo, hi))
+                    ranges[pair] = (min(seen[0], lo), max(seen[1], hi))
+            elif first_block is None and "cumulative_return" in df:
+                cum = _numeric(df["cumulative_return"])
+                last = cum[np.isfinite(cum)]
+                if len(last):
+                    carry = (0.0, float(last[-1]))
+    except pd.errors.ParserError as e:
+        print(f"❌ {log_path} has malformed rows ({e}); clean the log first.")
+        return stats
+
+    if first_block is None:
+        print(f"✅ Nothing to backfill in {log_path} ({stats['rows']} rows)")
+        return stats
+    if recompute:
+        first_block, carry = header_len, (0.0, 0.0)
+
+    prices = load_closes(ranges, loader)
+
+    # Pass 2: copy the clean prefix, rewrite from the first dirty block on
+    tmp = log_path + ".backfill.tmp"
+    with open(log_path, "rb") as src, open(tmp, "wb") as out:
+        remaining = first_block
+        while remaining:
+            chunk = src.read(min(remaining, block_bytes))
+            out.write(chunk)
+            remaining -= len(chunk)
+
+        end, old_last = first_block, None
+        for offset, raw in iter_blocks(log_path, first_block, block_bytes, size):
+            data, changed, carry, block_last = _rewrite_block(raw, columns, cols, prices, ticker_map,
+                                                              conf_thresh, recompute, carry)
+            if changed:
+                stats["changed"] = True
+                stats["rewritten_bytes"] += len(data)
+            out.write(data)
+            end = offset + len(raw)
+            old_last = old_last if block_last is None else block_last
+
+        if not stats["changed"]:
+            out.close()
+            os.remove(tmp)
+        else:
+            with log_lock(log_path):  # rows appended meanwhile are copied before the swap
+                if os.stat(log_path).st_ino != os.fstat(src.fileno()).st_ino:
+                    out.close()
+                    os.remove(tmp)
+                    print(f"⚠️ {log_path} was replaced during the backfill; run it again")
+                    stats["changed"] = False
+                else:
+                    # rows log_signals appended meanwhile continued the old running total:
+                    # shift them by how far it moved (and price them if they can be)
+                    if old_last is not None:
+                        carry = (carry[1] - old_last, carry[1])
+                    for offset, raw in iter_blocks(log_path, end, block_bytes):
+                        data, changed, carry, _ = _rewrite_block(raw, columns, cols, prices, ticker_map,
+                                                                 conf_thresh, False, carry)
+                        stats["rewritten_bytes"] += len(data) if changed else 0
+                        out.write(data)
+                        end = offset + len(raw)
+                    src.seek(end)
+                    out.write(src.read())  # a torn last row (a crashed write) is kept as it is
+                    out.flush()
+                    os.fsync(out.fileno())
+                    os.replace(tmp, log_path)
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill prices and returns in the live signal log")
+    parser.add_argument("--log", default=LOG_FILE)
+    parser.add_argument("--recompute", action="store_true", help="re-price every traded row and rebuild all returns")
+    args = parser.parse_args()
+
+    stats = backfill(args.log, recompute=args.recompute)
+    if stats["changed"]:
+        print(f"✅ Backfilled {stats['candidates']} of {stats['rows']} rows in {args.log} "
+              f"({stats['rewritten_bytes'] / 1e6:.1f} MB rewritten, {stats['seconds']}s)")
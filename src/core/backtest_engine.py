@@ -0,0 +1,140 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+HOLD_PERIOD_DAYS = 3
+INITIAL_CAPITAL = 100000
+POSITION_FRACTION = 0.1   # notional per trade as a fraction of INITIAL_CAPITAL
+TRADING_DAYS = 252
+
+DIRECTION = {"LONG": 1, "SHORT": -1}
+
+
+class PriceHistory:
+    """
+    Price bars per pair as aligned NumPy arrays: bar times (int64 ns, sorted)
+    and closes. Built once and reused for any number of backtests.
+    """
+
+    def __init__(self, bars):
+        self.times = {}
+        self.closes = {}
+        for pair, series in bars.items():
+            series = series.dropna().sort_index()
+            series = series[~series.index.duplicated(keep="last")]
+            self.times[pair] = series.index.values.astype("datetime64[ns]").astype(np.int64)
+            self.closes[pair] = series.to_numpy(dtype=float)
+
+    @classmethod
+    def load(cls, pairs, start, end, loader=None):
+        """One price load per pair over [start, end] (daily closes via the price cache by default)."""
+        if loader is None:
+            from core.plot_returns import load_price_range as loader
+        return cls({pair: loader(pair, start, end) for pair in pairs})
+
+    @property
+    def pairs(self):
+        return list(self.times)
+
+
+def _ns(values):
+    ts = pd.to_datetime(pd.Series(values), errors="coerce", utc=True, format="mixed").dt.tz_localize(None)
+    return ts.values.astype("datetime64[ns]").astype(np.int64), ts.isna().to_numpy()
+
+
+def match_trades(pairs, timestamps, directions, history, hold_bars=HOLD_PERIOD_DAYS, bar_floor="D", horizon=None):
+    """
+    As-of join of signals to bars. By default (daily bars) entry is the first
+    bar stamped at or after the signal time floored to bar_floor, i.e. the
+    close of the signal's own day, and exit is hold_bars bars later. With a
+    horizon (intraday bars) entry is the first bar strictly after the signal
+    and exit the first bar at or after entry time + horizon. Returns entry/exit
+    prices and bar times aligned with the input, NaN / NaT where there is no
+    exit bar yet (trade still open) or the pair has no history.
+    """
+    pairs = np.asarray(pairs, dtype=object)
+    ts, bad = _ns(timestamps)
+    if bar_floor and horizon is None:
+        ts = pd.to_datetime(ts).floor(bar_floor).values.astype("datetime64[ns]").astype(np.int64)
+    active = ~bad if directions is None else ~bad & (np.asarray(directions) != 0)
+    n = len(pairs)
+    entry_price = np.full(n, np.nan)
+    exit_price = np.full(n, np.nan)
+    entry_time = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+    exit_time = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+
+    for pair in pd.unique(pairs):  # one vectorized searchsorted per pair: O(log n) per signal
+        if pair not in history.times:
+            continue
+        rows = np.flatnonzero((pairs == pair) & active)
+        times, closes = history.times[pair], history.closes[pair]
+        if horizon is None:
+            entry = np.searchsorted(times, ts[rows], side="left")
+            exit_ = entry + hold_bars
+        else:
+            entry = np.searchsorted(times, ts[rows], side="right")
+            exit_ = np.searchsorted(times, times[np.minimum(entry, len(times) - 1)] + pd.Timedelta(horizon).value, side="left")
+        ok = (entry < len(times)) & (exit_ < len(times))
+        rows, entry, exit_ = rows[ok], entry[ok], exit_[ok]
+        entry_price[rows] = closes[entry]
+        exit_price[rows] = closes[exit_]
+        entry_time[rows] = times[entry].view("datetime64[ns]")
+        exit_time[rows] = times[exit_].view("datetime64[ns]")
+
+    return entry_price, exit_price, entry_time, exit_time
+
+
+def run(signals: pd.DataFrame, history: PriceHistory, hold_bars=HOLD_PERIOD_DAYS,
+        capital=INITIAL_CAPITAL, position_fraction=POSITION_FRACTION, bar_floor="D", horizon=None):
+    """
+    Vectorized backtest of signals (columns timestamp, pair, signal). Each
+    LONG/SHORT signal opens a position of capital * position_fraction at its
+    entry bar and closes it hold_bars later (or after `horizon` on intraday
+    bars). Returns (trades, equity) where equity is portfolio value after each
+    exit day.
+    """
+    direction = signals["signal"].map(DIRECTION).fillna(0).to_numpy(dtype=int)
+    entry, exit_, entry_time, exit_time = match_trades(
+        signals["pair"].to_numpy(), signals["timestamp"], direction, history, hold_bars, bar_floor, horizon
+    )
+    ret = direction * (exit_ / entry - 1)
+    notional = capital * position_fraction
+
+    trades = pd.DataFrame({
+        "timestamp": pd.to_datetime(signals["timestamp"], errors="coerce", utc=True, format="mixed").dt.tz_localize(None).to_numpy(),
+        "pair": signals["pair"].to_numpy(),
+        "signal": signals["signal"].to_numpy(),
+        "entry_time": entry_time,
+        "exit_time": exit_time,
+        "entry_price": entry,
+        "exit_price": exit_,
+        "return_pct": ret * 100,
+        "pnl": ret * notional,
+    })
+    trades = trades[(direction != 0) & np.isfinite(ret)].reset_index(drop=True)
+
+    daily_pnl = trades.groupby(trades["exit_time"].dt.normalize())["pnl"].sum().sort_index()
+    equity = capital + daily_pnl.cumsum()
+    return trades, equity
+
+
+def summarize(trades: pd.DataFrame, equity: pd.Series, capital=INITIAL_CAPITAL) -> dict:
+    """Headline statistics of a backtest run."""
+    if trades.empty:
+        return {"trades": 0, "win_rate": 0.0, "avg_return": 0.0, "total_pnl": 0.0,
+                "total_return": 0.0, "sharpe": 0.0, "max_drawdown": 0.0}
+    values = np.concatenate([[capital], equity.to_numpy()])
+    daily = np.diff(values) / values[:-1]
+    sharpe = daily.mean() / daily.std() * np.sqrt(TRADING_DAYS) if len(daily) > 1 and daily.std() > 0 else 0.0
+    peak = np.maximum.accumulate(values)
+    return {
+        "trades": len(trades),
+        "win_rate": float((trades["return_pct"] > 0).mean() * 100),
+        "avg_return": float(trades["return_pct"].mean()),
+        "total_pnl": float(trades["pnl"].sum()),
+        "total_return": float((values[-1] / capital - 1) * 100),
+        "sharpe": float(sharpe),
+        "max_drawdown": float(((values - peak) / peak).min() * 100),
+    }
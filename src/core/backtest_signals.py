@@ -1,12 +1,18 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
-import os
+from datetime import timedelta
+
+from core.backtest_engine import HOLD_PERIOD_DAYS, INITIAL_CAPITAL, PriceHistory, run, summarize
+from core.bar_store import BarStore
+from core.plot_returns import load_price_range
+from core.storage import read_table
 
 SIGNAL_FILE = "data/fx_sentiment_signals.csv"
+HOURLY_SIGNAL_FILE = "data/fx_sentiment_signals_hourly.csv"
+RESULTS_FILE = "data/backtest_results.csv"
 PRICE_LOOKBACK_DAYS = 10
-HOLD_PERIOD_DAYS = 3
-INITIAL_CAPITAL = 100000
 
 PAIR_TO_YF = {
     "EUR/USD": "EURUSD=X",
@@ -18,89 +24,74 @@ PAIR_TO_YF = {
     "NZD/USD": "NZDUSD=X"
 }
 
-def fetch_price_data(ticker, start_date, end_date):
-    print(f"📈 Downloading {ticker} from {start_date} to {end_date}...")
-    df = yf.download(ticker, start=start_date, end=end_date)
-    if "Close" not in df or df.empty:
-        return pd.Series()
-    return df["Close"].dropna().sort_index()
+def fetch_price_data(pair, start_date, end_date):
+    print(f"📈 Loading {pair} from {start_date} to {end_date}...")
+    return load_price_range(pair, start_date, end_date).dropna().sort_index()
 
-def simulate_trade(entry_price, exit_price, signal):
-    if entry_price is None or exit_price is None:
-        return None
-    if signal == "LONG":
-        return (exit_price - entry_price) / entry_price
-    elif signal == "SHORT":
-        return (entry_price - exit_price) / entry_price
-    return 0
-
-def run_backtest():
+def load_signals():
+    """Timestamped signals: the hourly buckets when available, else the snapshot dated HOLD_PERIOD_DAYS back."""
+    if os.path.exists(HOURLY_SIGNAL_FILE):
+        signals = read_table("signals_hourly", HOURLY_SIGNAL_FILE, columns=["bucket", "pair", "signal"])
+        return signals.rename(columns={"bucket": "timestamp"})
     if not os.path.exists(SIGNAL_FILE):
+        return None
+    # the snapshot has no time: test it as if issued HOLD_PERIOD_DAYS trading days ago
+    signals = read_table("signals", SIGNAL_FILE, columns=["pair", "signal"])
+    signals["timestamp"] = pd.Timestamp.utcnow().tz_localize(None).normalize() - pd.offsets.BDay(HOLD_PERIOD_DAYS)
+    return signals
+
+def run_backtest(hold_days=HOLD_PERIOD_DAYS, horizon=None):
+    """
+    Backtest the signals on daily closes, entering at the signal day's close
+    and exiting hold_days bars later; with a horizon (timedelta), on the
+    intraday bar store instead: entry at the first bar after the signal,
+    exit at the first bar horizon later.
+    """
+    signals = load_signals()
+    if signals is None:
         print("❌ Signal file not found.")
         return
 
-    signals = pd.read_csv(SIGNAL_FILE)
-    signals["date"] = datetime.utcnow().strftime("%Y-%m-%d")
-
-    all_results = []
-
-    for _, row in signals.iterrows():
-        pair = row["pair"]
-        signal = row["signal"]
-        yf_ticker = PAIR_TO_YF.get(pair)
-
-        if not yf_ticker or signal == "NEUTRAL":
-            continue
-
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=PRICE_LOOKBACK_DAYS)
-        hold_end_date = end_date + timedelta(days=HOLD_PERIOD_DAYS)
-
-        prices = fetch_price_data(yf_ticker, start_date.strftime("%Y-%m-%d"), hold_end_date.strftime("%Y-%m-%d"))
-        if len(prices) < HOLD_PERIOD_DAYS + 1:
-            print(f"⚠️ Not enough data for {pair} — skipping")
-            continue
-
-        try:
-            entry_price = float(prices.iloc[-HOLD_PERIOD_DAYS - 1])
-            exit_price = float(prices.iloc[-1])
-        except Exception as e:
-            print(f"⚠️ Error extracting prices for {pair}: {e}")
-            continue
-
-        return_pct = simulate_trade(entry_price, exit_price, signal)
-        if return_pct is None:
-            print(f"⚠️ Invalid return for {pair} — skipping")
-            continue
-
-        all_results.append({
-            "pair": pair,
-            "signal": signal,
-            "entry_price": round(entry_price, 5),
-            "exit_price": round(exit_price, 5),
-            "return_pct": round(return_pct * 100, 2)
-        })
+    signals = signals[signals["pair"].isin(PAIR_TO_YF) & (signals["signal"] != "NEUTRAL")]
+    if signals.empty:
+        print("⚠️ No LONG/SHORT signals to test.")
+        return
 
-    if not all_results:
+    if horizon is not None:
+        history = BarStore().history(signals["pair"].unique())
+    else:
+        # one price load per pair covering every signal plus the holding period
+        when = pd.to_datetime(signals["timestamp"], errors="coerce", utc=True, format="mixed").dt.tz_localize(None)
+        start = (when.min() - timedelta(days=PRICE_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+        end = (when.max() + timedelta(days=2 * hold_days + PRICE_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+        history = PriceHistory.load(signals["pair"].unique(), start, end, loader=fetch_price_data)
+
+    trades, equity = run(signals, history, hold_bars=hold_days, capital=INITIAL_CAPITAL, horizon=horizon)
+    if trades.empty:
         print("⚠️ No valid trades found — check signal content and yfinance data.")
         return
 
-    results_df = pd.DataFrame(all_results)
-    results_df["return_pct"] = pd.to_numeric(results_df["return_pct"], errors="coerce")
-    results_df.dropna(subset=["return_pct"], inplace=True)
-
-    results_df.to_csv("data/backtest_results.csv", index=False)
-
-    total_return = results_df["return_pct"].sum()
-    avg_return = results_df["return_pct"].mean()
-    win_rate = (results_df["return_pct"] > 0).mean() * 100
+    results_df = trades.round({"entry_price": 5, "exit_price": 5, "return_pct": 2, "pnl": 2})
+    results_df.to_csv(RESULTS_FILE, index=False)
+    stats = summarize(trades, equity, INITIAL_CAPITAL)
 
     print(f"\n📊 Backtest Summary")
     print(f"------------------")
-    print(f"Total Trades  : {len(results_df)}")
-    print(f"Win Rate      : {win_rate:.2f}%")
-    print(f"Avg Return    : {avg_return:.2f}%")
-    print(f"Total Return  : {total_return:.2f}%")
+    print(f"Total Trades  : {stats['trades']}")
+    print(f"Win Rate      : {stats['win_rate']:.2f}%")
+    print(f"Avg Return    : {stats['avg_return']:.2f}%")
+    print(f"Total P&L     : {stats['total_pnl']:,.2f} on {INITIAL_CAPITAL:,} ({stats['total_return']:.2f}%)")
+    print(f"Sharpe        : {stats['sharpe']:.2f}")
+    print(f"Max Drawdown  : {stats['max_drawdown']:.2f}%")
 
 if __name__ == "__main__":
-    run_backtest()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backtest FX sentiment signals")
+    parser.add_argument("--hold-days", type=int, default=HOLD_PERIOD_DAYS, help="holding period in daily bars")
+    parser.add_argument("--intraday-hours", type=float,
+                        help="use the intraday bar store with this exit horizon instead of daily closes")
+    args = parser.parse_args()
+
+    horizon = timedelta(hours=args.intraday_hours) if args.intraday_hours else None
+    run_backtest(args.hold_days, horizon)
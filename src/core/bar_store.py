@@ -0,0 +1,121 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_engine import PriceHistory, match_trades
+
+BAR_DIR = "data/bars"
+EXIT_HORIZON = timedelta(days=1)   # default holding horizon for intraday exits
+MAX_ENTRY_DELAY = timedelta(days=3)  # a first bar later than this (data gap) is not a valid entry
+
+
+def pair_file_stem(pair):
+    return pair.replace("/", "")
+
+
+class BarStore:
+    """
+    Intraday bars per pair (e.g. 1- or 5-minute closes) loaded from
+    <root>/<EURUSD>.parquet or .csv with timestamp and close columns
+    (timestamps in UTC). Each pair is loaded once into sorted NumPy arrays,
+    so a batch of as-of lookups is one searchsorted per pair.
+    """
+
+    def __init__(self, root=BAR_DIR):
+        self.root = root
+        self._history = PriceHistory({})
+        self._mtimes = {}
+        self._lock = threading.Lock()
+
+    def _path(self, pair):
+        for ext in (".parquet", ".csv"):
+            path = os.path.join(self.root, pair_file_stem(pair) + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def has(self, pair):
+        return self._path(pair) is not None
+
+    def _load(self, pair):
+        """Bars for one pair, reloaded only when its file changed."""
+        path = self._path(pair)
+        if path is None:
+            return False
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            if self._mtimes.get(pair) == mtime:
+                return True
+            df = pd.read_parquet(path, columns=["timestamp", "close"]) if path.endswith(".parquet") \
+                else pd.read_csv(path, usecols=["timestamp", "close"])
+            ts = pd.to_datetime(df["timestamp"], errors="coerce", utc=True, format="mixed").dt.tz_localize(None)
+            series = pd.Series(pd.to_numeric(df["close"], errors="coerce").to_numpy(), index=ts.to_numpy())
+            loaded = PriceHistory({pair: series[series.index.notna()]})
+            self._history.times[pair] = loaded.times[pair]
+            self._history.closes[pair] = loaded.closes[pair]
+            self._mtimes[pair] = mtime
+        return True
+
+    def history(self, pairs):
+        """PriceHistory over the pairs that have bar files (for backtest_engine.run with a horizon)."""
+        for pair in pairs:
+            self._load(pair)
+        return self._history
+
+    def entry_exit(self, pairs, timestamps, horizon=EXIT_HORIZON):
+        """
+        Entry at the first bar after each timestamp and exit at the first bar
+        at or after entry + horizon, aligned with the inputs: (entry, exit)
+        price arrays, NaN where a pair has no bars, the first bar is more than
+        MAX_ENTRY_DELAY away, or the exit bar does not exist yet.
+        """
+        pairs = np.asarray(pairs, dtype=object)
+        history = self.history(pd.unique(pairs))
+        entry, exit_, entry_time, _ = match_trades(pairs, timestamps, None, history, horizon=horizon)
+        ts = pd.to_datetime(pd.Series(timestamps), errors="coerce", utc=True, format="mixed").dt.tz_localize(None)
+        late = (entry_time - ts.to_numpy()) > np.timedelta64(MAX_ENTRY_DELAY)
+        entry[late] = np.nan
+        exit_[late] = np.nan
+        return entry, exit_
+
+
+def fetch_yahoo_bars(pair, interval="5m", period="60d", root=BAR_DIR):
+    """Download recent intraday bars from Yahoo (1m: last 7 days, 5m: last 60) and merge them into the pair's file."""
+    import yfinance as yf
+    from core.plot_returns import FX_TICKER_MAP
+    from core.price_service import close_series
+
+    closes = close_series(yf.download(FX_TICKER_MAP[pair], interval=interval, period=period,
+                                      progress=False, auto_adjust=False))
+    if closes.empty:
+        return 0
+    idx = pd.DatetimeIndex(closes.index)
+    idx = idx.tz_convert("UTC").tz_localize(None) if idx.tz is not None else idx
+    new = pd.DataFrame({"timestamp": idx, "close": closes.to_numpy()})
+
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, pair_file_stem(pair) + ".parquet")
+    if os.path.exists(path):
+        new = pd.concat([pd.read_parquet(path), new])
+    new = new.drop_duplicates("timestamp", keep="last").sort_values("timestamp")
+    new.to_parquet(path, index=False)
+    return len(new)
+
+
+if __name__ == "__main__":
+    from core.plot_returns import FX_TICKER_MAP
+
+    parser = argparse.ArgumentParser(description="Download intraday FX bars into the local bar store")
+    parser.add_argument("--interval", default="5m")
+    parser.add_argument("--period", default="60d")
+    args = parser.parse_args()
+
+    for pair in FX_TICKER_MAP:
+        rows = fetch_yahoo_bars(pair, args.interval, args.period)
+        print(f"✅ {pair}: {rows} {args.interval} bars in {BAR_DIR}")
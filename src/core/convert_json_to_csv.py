@@ -1,41 +1,43 @@
-import json
-import pandas as pd
-import os
-import glob
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from nlp.news_ingest import NewsIngestor, append_rows
 
 INPUT_FOLDER = "data"
 OUTPUT_CSV = "data/raw_news.csv"
+OUTPUT_COLUMNS = ["timestamp", "title", "description"]
 
 def convert_all_json_to_csv():
-    json_files = glob.glob(os.path.join(INPUT_FOLDER, "raw_fx_news_*.json"))
+    """Append articles from raw JSON files and archive segments not converted before, deduplicated across snapshots."""
+    ingestor = NewsIngestor("raw_news", raw_dir=INPUT_FOLDER)
+    if not os.path.exists(OUTPUT_CSV) and not ingestor.is_first_run:
+        ingestor.reset()  # output was removed: rebuild it from every raw file
+    rebuild = ingestor.is_first_run
+
+    pending = ingestor.pending_files()
+    segments = ingestor.pending_segments()
+    print(f"🔍 Found {len(pending)} new JSON files and {len(segments)} archive segment(s) with new articles.")
+
     all_articles = []
+    for article in ingestor.new_articles():
+        title = article.get("title", "")
+        description = article.get("description", "")
+        timestamp = article.get("publishedAt", "")
+        if title or description:
+            all_articles.append({
+                "timestamp": timestamp,
+                "title": title,
+                "description": description
+            })
 
-    print(f"🔍 Found {len(json_files)} JSON files.")
-
-    for file in sorted(json_files):
-        with open(file, "r") as f:
-            try:
-                articles = json.load(f)
-                for article in articles:
-                    title = article.get("title", "")
-                    description = article.get("description", "")
-                    timestamp = article.get("publishedAt", "")
-                    if title or description:
-                        all_articles.append({
-                            "timestamp": timestamp,
-                            "title": title,
-                            "description": description
-                        })
-            except json.JSONDecodeError:
-                print(f"⚠️ Skipping malformed JSON file: {file}")
-
-    if not all_articles:
+    if not all_articles and rebuild:
         print("❌ No valid articles found.")
         return
 
-    df = pd.DataFrame(all_articles)
-    df.to_csv(OUTPUT_CSV, index=False)
-    print(f"✅ Combined {len(df)} articles → {OUTPUT_CSV}")
+    added = append_rows(all_articles, OUTPUT_CSV, OUTPUT_COLUMNS, overwrite=rebuild)
+    ingestor.commit()
+    print(f"✅ Appended {added} new articles → {OUTPUT_CSV} "
+          f"({ingestor.stats['duplicates']} duplicate article(s) skipped)")
 
 if __name__ == "__main__":
     convert_all_json_to_csv()
@@ -0,0 +1,381 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import csv
+import fcntl
+import io
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from core.plot_returns import get_prices
+from core.price_cache import trading_day
+
+LOG_FILE = "data/live_signals_log.csv"
+METRICS_DIR = "data/metrics"
+ROW_COLUMNS = ["timestamp", "pair", "title", "label", "confidence", "signal",
+               "entry_price", "return_pct", "cumulative_return"]
+PENDING_FIELDS = ["timestamp", "pair", "title", "label", "confidence", "signal", "entry_price"]
+REPRICE_DAYS = 5  # a missing entry price is looked up again for this many days before it is accepted
+
+# Rows store: one row per log line (id = line number), indexed for the dashboard's filters
+ROWS_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS rows (id INTEGER PRIMARY KEY, timestamp TEXT, pair TEXT, title TEXT, "
+    "label TEXT, confidence REAL, signal TEXT, entry_price REAL, return_pct REAL, cumulative_return REAL)",
+    "CREATE INDEX IF NOT EXISTS rows_pair_label_ts ON rows (pair, label, timestamp)",
+    "CREATE INDEX IF NOT EXISTS rows_ts ON rows (timestamp)",
+]
+
+
+def _empty_state():
+    return {
+        "size": 0, "mtime": None, "inode": None, "offset": 0, "columns": None, "rows": 0,
+        "pending": [],  # rows from the last one whose return can still change (unsettled prices)
+        "priced_on": None,  # trading day pending rows were last priced
+        "count": 0, "sum": 0.0, "sumsq": 0.0, "wins": 0,
+        "cumulative": 0.0, "peak": None, "max_drawdown": 0.0,
+        "groups": {},  # "pair|label" → [count, sum, sumsq, wins]
+    }
+
+
+class MetricsEngine:
+    """
+    Incrementally maintained dashboard metrics for the live signal log, with
+    the same definitions as calculate_returns / summarize_returns (each
+    signal's return runs from its entry price to the next signal's).
+
+    A watermark (size, mtime, byte offset) makes an unchanged log cost one
+    stat(); a grown log is read from the offset only, new rows are priced,
+    and running sums, sums of squares, wins, cumulative return, its peak
+    and max drawdown are advanced, overall and per (pair, label). Returns
+    are only folded in once both their prices are final: rows priced off a
+    still-open day or with no price yet stay pending and are priced again
+    on later updates (at least once a trading day). Rows
+    with their returns go to an indexed SQLite side store that the dashboard
+    filters and pages server-side. A shrunk or rewritten log is rebuilt from
+    scratch.
+    """
+
+    def __init__(self, log_file=LOG_FILE, metrics_dir=METRICS_DIR, price_fn=get_prices, store=None):
+        name = os.path.splitext(os.path.basename(store.path if store else log_file))[0]
+        self.log_file = log_file
+        self.store = store  # a SignalStore: new rows are read by id instead of byte offset
+        self.state_file = os.path.join(metrics_dir, f"{name}.state.json")
+        self.rows_file = os.path.join(metrics_dir, f"{name}.rows.sqlite")
+        self.price_fn = price_fn
+        self.state = self._read_state()
+
+    def _read_state(self):
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return _empty_state()
+
+    def _write_state(self):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_file)
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.rows_file), exist_ok=True)
+        conn = sqlite3.connect(self.rows_file)
+        for statement in ROWS_SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    @property
+    def version(self):
+        """Changes whenever the log does: the cache key for anything derived from it."""
+        return (self.state["size"], self.state["mtime"], self.state["rows"], self.state.get("priced_on"))
+
+    def _reset(self):
+        self.state = _empty_state()
+        if os.path.exists(self.rows_file):
+            os.remove(self.rows_file)
+
+    def _read_new_rows(self):
+        """Complete log rows past the watermark (a torn last line waits for the next update)."""
+        with open(self.log_file, "rb") as f:
+            f.seek(self.state["offset"])
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+        if not data:
+            return pd.DataFrame(columns=PENDING_FIELDS)
+        if self.state["offset"] == 0:
+            header, _, data = data.partition(b"\n")
+            self.state["columns"] = next(csv.reader([header.decode("utf-8")]))
+            self.state["offset"] = len(header) + 1
+        self.state["offset"] += len(data)
+        if not data.strip():
+            return pd.DataFrame(columns=PENDING_FIELDS)
+        df = pd.read_csv(io.BytesIO(data), header=None, names=self.state["columns"],
+                         usecols=[c for c in PENDING_FIELDS if c != "entry_price"])
+        return df
+
+    def update(self) -> dict:
+        """Bring the aggregates up to date with the log and return the snapshot."""
+        if self.store is not None:
+            if self.store.max_id() == self.state["size"] and not self._reprice_due():
+                return self.state  # no row appended since the watermark
+        else:
+            stat = os.stat(self.log_file) if os.path.exists(self.log_file) else None
+            if stat and stat.st_size == self.state["size"] and stat.st_mtime == self.state["mtime"] \
+                    and not self._reprice_due():
+                return self.state  # watermark unchanged: nothing to read
+
+        # several dashboard sessions may update at once: one at a time, from the latest state
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(self.state_file + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.state = self._read_state()
+            return self._update_from_store() if self.store is not None else self._update()
+
+    def _update_from_store(self):
+        """Store rows past the last id read (offset and size hold row ids here)."""
+        last = self.store.max_id()
+        if last == self.state["size"] and not self._reprice_due():
+            return self.state
+        if last < self.state["offset"]:
+            self._reset()  # store re-imported
+        new = self.store.read([c for c in PENDING_FIELDS if c != "entry_price"],
+                              after_id=self.state["offset"], upto_id=last)
+        if not new.empty or self._reprice_due():
+            self._advance(new)
+        self.state["offset"] = self.state["size"] = last
+        self._write_state()
+        return self.state
+
+    def _update(self):
+        if not os.path.exists(self.log_file):
+            self._reset()
+            return self.state
+        stat = os.stat(self.log_file)
+        if stat.st_size == self.state["size"] and stat.st_mtime == self.state["mtime"] and not self._reprice_due():
+            return self.state
+
+        replaced = self.state.get("inode") not in (None, stat.st_ino)  # atomically rewritten (backfill)
+        if replaced or stat.st_size < self.state["offset"] or self._header_changed():
+            self._reset()
+
+        new = self._read_new_rows()
+        if not new.empty or self._reprice_due():
+            self._advance(new)
+
+        self.state["size"], self.state["mtime"], self.state["inode"] = stat.st_size, stat.st_mtime, stat.st_ino
+        self._write_state()
+        return self.state
+
+    def _header_changed(self):
+        if not self.state["columns"]:
+            return False
+        with open(self.log_file, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), None) != self.state["columns"]
+
+    def _pending(self):
+        pending = self.state["pending"] or []
+        return [pending] if isinstance(pending, dict) else pending  # state written before it was a list
+
+    def _reprice_due(self):
+        """Whether pending rows have prices that may have settled since they were last looked up."""
+        pending = self._pending()
+        if not pending or self.state.get("priced_on") == trading_day(pd.Timestamp.now("UTC")).strftime("%Y-%m-%d"):
+            return False
+        df = pd.DataFrame(pending, columns=PENDING_FIELDS)
+        return not _settled(df["timestamp"], pd.to_numeric(df["entry_price"], errors="coerce")).all()
+
+    def _advance(self, new):
+        s = self.state
+        held = pd.DataFrame(self._pending(), columns=PENDING_FIELDS)
+        new = new.reindex(columns=PENDING_FIELDS)
+        if not new.empty:
+            new["entry_price"] = self.price_fn(new["pair"], pd.to_datetime(new["timestamp"], errors="coerce"))
+        if not held.empty:
+            # prices that were missing or still moving: look them up again
+            price = pd.to_numeric(held["entry_price"], errors="coerce")
+            stale = ~_settled(held["timestamp"], price)
+            if stale.any():
+                price[stale] = np.asarray(self.price_fn(
+                    held.loc[stale, "pair"], pd.to_datetime(held.loc[stale, "timestamp"], errors="coerce")), dtype=float)
+            held["entry_price"] = price
+        rows = pd.concat([held, new], ignore_index=True) if not held.empty else new
+        if rows.empty:
+            return
+        first_id = s["rows"] + 1 - len(held)  # pending rows are already stored, with no return
+        s["rows"] += len(new)
+        s["priced_on"] = trading_day(pd.Timestamp.now("UTC")).strftime("%Y-%m-%d")
+
+        entry = pd.to_numeric(rows["entry_price"], errors="coerce").to_numpy(dtype=float)
+        ret = np.append((entry[1:] - entry[:-1]) / entry[:-1] * 100, np.nan)  # last row stays open
+        # a return is final once both its prices are: hold back from the row before the first unsettled one
+        unsettled = ~_settled(rows["timestamp"], entry)
+        cut = max(int(unsettled.argmax()) - 1, 0) if unsettled.any() else len(rows) - 1
+        ret[cut:] = np.nan
+        s["pending"] = [  # JSON-safe: NaN → None, numpy scalars → Python
+            {k: None if pd.isna(v) else (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+            for row in rows.iloc[cut:].to_dict("records")
+        ]
+        valid = np.isfinite(ret)
+        r = ret[valid]
+        cum = s["cumulative"] + np.cumsum(r)
+        cumulative = np.full(len(ret), np.nan)
+        cumulative[valid] = cum
+
+        if len(r):
+            start_peak = -np.inf if s["peak"] is None else s["peak"]
+            peaks = np.maximum.accumulate(np.concatenate([[start_peak], cum]))[1:]
+            s["count"] += len(r)
+            s["sum"] += float(r.sum())
+            s["sumsq"] += float((r ** 2).sum())
+            s["wins"] += int((r > 0).sum())
+            s["cumulative"] = float(cum[-1])
+            s["peak"] = float(peaks[-1])
+            s["max_drawdown"] = max(s["max_drawdown"], float((peaks - cum).max()))
+
+            scored = rows[valid]
+            keys = scored["pair"].astype(str) + "|" + scored["label"].astype(str)
+            agg = pd.DataFrame({"k": keys.to_numpy(), "r": r}).groupby("k")["r"].agg(
+                ["count", "sum", lambda x: float((x ** 2).sum()), lambda x: int((x > 0).sum())])
+            for key, (n, total, sq, wins) in zip(agg.index, agg.to_numpy().tolist()):
+                g = s["groups"].setdefault(key, [0, 0.0, 0.0, 0])
+                s["groups"][key] = [g[0] + int(n), g[1] + total, g[2] + sq, g[3] + int(wins)]
+
+        table = pd.DataFrame({
+            "id": np.arange(first_id, first_id + len(rows)),
+            "timestamp": pd.to_datetime(rows["timestamp"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "pair": rows["pair"].to_numpy(), "title": rows["title"].to_numpy(),
+            "label": rows["label"].to_numpy(),
+            "confidence": pd.to_numeric(rows["confidence"], errors="coerce").to_numpy(),
+            "signal": rows["signal"].to_numpy(), "entry_price": entry,
+            "return_pct": ret, "cumulative_return": cumulative,
+        })
+        records = list(table.astype(object).where(table.notna(), None).itertuples(index=False, name=None))
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+        conn.close()
+
+    # ---------------------- QUERIES ----------------------
+
+    @staticmethod
+    def _where(pairs=None, labels=None, start=None, end=None):
+        clauses, params = [], []
+        for column, values in (("pair", pairs), ("label", labels)):
+            if values is not None:
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})" if len(values) else "0")
+                params.extend(values)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d %H:%M:%S"))
+        if end is not None:
+            clauses.append("timestamp < ?")  # end date inclusive
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S"))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _query(self, sql, params=()):
+        if not os.path.exists(self.rows_file):
+            return []
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def distinct(self, column):
+        """Distinct non-null values of pair or label."""
+        if column not in ("pair", "label"):
+            raise ValueError(f"Cannot list values of '{column}'")
+        return [v for (v,) in self._query(f"SELECT DISTINCT {column} FROM rows WHERE {column} IS NOT NULL ORDER BY 1")]
+
+    def time_range(self):
+        row = self._query("SELECT MIN(timestamp), MAX(timestamp) FROM rows")
+        return tuple(pd.Timestamp(v) if v else None for v in row[0]) if row else (None, None)
+
+    def count(self, pairs=None, labels=None, start=None, end=None):
+        where, params = self._where(pairs, labels, start, end)
+        rows = self._query(f"SELECT COUNT(*) FROM rows{where}", params)
+        return rows[0][0] if rows else 0
+
+    def page(self, pairs=None, labels=None, start=None, end=None, offset=0, limit=100) -> pd.DataFrame:
+        """One page of matching rows, newest first; only this page is read from disk."""
+        where, params = self._where(pairs, labels, start, end)
+        rows = self._query(
+            f"SELECT {', '.join(ROW_COLUMNS)} FROM rows{where} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            params + [int(limit), int(offset)],
+        )
+        df = pd.DataFrame(rows, columns=ROW_COLUMNS)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        return df
+
+    def averages(self, by="pair", pairs=None, labels=None, start=None, end=None) -> pd.Series:
+        """Average closed return per pair or label over the filtered rows (group_means with a date filter)."""
+        if by not in ("pair", "label"):
+            raise ValueError(f"Cannot group by '{by}'")
+        where, params = self._where(pairs, labels, start, end)
+        where += (" AND" if where else " WHERE") + " return_pct IS NOT NULL"
+        rows = self._query(f"SELECT {by}, AVG(return_pct) FROM rows{where} GROUP BY {by}", params)
+        means = pd.Series(dict(rows), name="return_pct", dtype=float)
+        means.index.name = by
+        return means.sort_values(ascending=False)
+
+    def curve(self) -> pd.Series:
+        """Cumulative return after every closed signal, in log order."""
+        rows = self._query("SELECT id, cumulative_return FROM rows WHERE cumulative_return IS NOT NULL ORDER BY id")
+        return pd.Series([c for _, c in rows], index=[i for i, _ in rows], name="cumulative_return", dtype=float)
+
+
+def _settled(timestamps, prices):
+    """
+    Rows whose entry price will not change any more: the trading day has
+    closed, and the price was found or has been missing for REPRICE_DAYS.
+    """
+    ts = pd.to_datetime(pd.Series(timestamps).reset_index(drop=True), errors="coerce", utc=True).dt.tz_localize(None)
+    days = ts.dt.normalize()
+    days -= pd.to_timedelta((days.dt.weekday - 4).clip(lower=0), unit="D")  # weekends price off Friday
+    today = trading_day(pd.Timestamp.now("UTC"))
+    found = np.isfinite(np.asarray(prices, dtype=float))
+    closed = (days < today).to_numpy()
+    given_up = (days < today - pd.Timedelta(days=REPRICE_DAYS)).to_numpy()
+    return ts.isna().to_numpy() | (closed & (found | given_up))
+
+
+def summary(state) -> dict:
+    """summarize_returns' metrics from the running aggregates."""
+    n = state["count"]
+    if not n:
+        return {"Total Return": 0, "Sharpe Ratio": 0, "Max Drawdown": 0, "Win Rate": 0}
+    mean = state["sum"] / n
+    var = (state["sumsq"] - n * mean ** 2) / (n - 1) if n > 1 else 0.0
+    std = var ** 0.5 if var > 0 else 0.0
+    return {
+        "Total Return": state["sum"],
+        "Sharpe Ratio": mean / std * (252 ** 0.5) if std else 0,
+        "Max Drawdown": state["max_drawdown"],
+        "Win Rate": state["wins"] / n,
+    }
+
+
+def group_means(state, by="pair", pairs=None, labels=None) -> pd.Series:
+    """Average return per pair or per label over the selected pairs and labels."""
+    totals = {}
+    for key, (n, total, _, _) in state["groups"].items():
+        pair, label = key.split("|", 1)
+        if (pairs is not None and pair not in pairs) or (labels is not None and label not in labels):
+            continue
+        t = totals.setdefault(pair if by == "pair" else label, [0, 0.0])
+        t[0] += n
+        t[1] += total
+    means = pd.Series({k: total / n for k, (n, total) in totals.items()}, name="return_pct", dtype=float)
+    means.index.name = by
+    return means.sort_values(ascending=False)
+
+
+if __name__ == "__main__":
+    engine = MetricsEngine()
+    state = engine.update()
+    print(f"✅ {state['rows']} log rows, {state['count']} closed returns")
+    for k, v in summary(state).items():
+        print(f"   {k:<13}: {v:.4f}")
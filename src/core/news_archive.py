@@ -0,0 +1,274 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import fcntl
+import glob
+import gzip
+import json
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+from utils.text_hash import article_hash
+
+ARCHIVE_DIR = "data/news_archive"
+RAW_DATA_DIR = "data"
+
+# Layout: one segment per publishedAt day, <day>.jsonl.gz, made of gzip members
+# (one per append, or one per hour after compaction) plus <day>.idx.json:
+#   {"generation": n, "size": bytes, "members": [[offset, length, min_ts, max_ts, count], ...]}
+# The index lets readers seek straight to the members overlapping a time window.
+# The generation changes whenever the member layout may have (compaction, index
+# rebuild) and never repeats, so a saved (generation, member) position is safe.
+
+
+def _day_of(article):
+    published = str(article.get("publishedAt") or "")
+    try:
+        return datetime.strptime(published[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def _dedup_key(article):
+    return article.get("url") or article_hash(article.get("title"), article.get("description"))
+
+
+class NewsArchive:
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self._mutex = threading.RLock()
+        self._held = 0
+
+    def _segment(self, day):
+        return os.path.join(self.root, f"{day}.jsonl.gz")
+
+    def _index_path(self, day):
+        return os.path.join(self.root, f"{day}.idx.json")
+
+    @contextmanager
+    def _locked(self):
+        # re-entrant: append and compact read (and may rebuild) indexes while holding it
+        with self._mutex:
+            if self._held:
+                self._held += 1
+                try:
+                    yield
+                finally:
+                    self._held -= 1
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, ".lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._held = 1
+                try:
+                    yield
+                finally:
+                    self._held = 0
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def days(self):
+        return sorted(os.path.basename(p)[:10] for p in glob.glob(os.path.join(self.root, "*.jsonl.gz")))
+
+    def _load_index(self, day):
+        """(index or None, segment size, whether the index matches it)."""
+        segment = self._segment(day)
+        size = os.path.getsize(segment) if os.path.exists(segment) else 0
+        try:
+            with open(self._index_path(day)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None, size, False
+        return index, size, index.get("size") == size
+
+    def read_index(self, day):
+        """Index of a segment, rebuilt by scanning it if missing or stale (e.g. after a crash)."""
+        index, _, fresh = self._load_index(day)
+        if fresh:
+            return index
+        # rebuilt under the lock, so an append between its segment and index writes
+        # is seen complete rather than indexed (and given a generation) half-way
+        with self._locked():
+            index, size, fresh = self._load_index(day)
+            return index if fresh else self._rebuild_index(day, size, index)
+
+    def _rebuild_index(self, day, size, stale=None):
+        # a new generation: after the previous one when the stale index is readable,
+        # else one derived from the segment file's mtime (nanoseconds, beyond any counter)
+        if isinstance(stale, dict) and "generation" in stale:
+            generation = stale["generation"] + 1
+        else:
+            generation = os.stat(self._segment(day)).st_mtime_ns if size else 0
+        members = []
+        if size:
+            with open(self._segment(day), "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset < len(data):
+                decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                body = decoder.decompress(data[offset:])
+                length = len(data) - offset - len(decoder.unused_data)
+                if not decoder.eof:
+                    size = offset  # torn final member: ignore it
+                    break
+                members.append(self._member_entry(offset, length, body))
+                offset += length
+        index = {"generation": generation, "size": size, "members": members}
+        self._write_index(day, index)
+        return index
+
+    @staticmethod
+    def _member_entry(offset, length, body):
+        stamps = [json.loads(line).get("publishedAt") or "" for line in body.splitlines() if line]
+        return [offset, length, min(stamps, default=""), max(stamps, default=""), len(stamps)]
+
+    def _write_index(self, day, index):
+        tmp = self._index_path(day) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self._index_path(day))
+
+    def append(self, articles):
+        """Append a fetched batch: one compressed member per publishedAt day touched."""
+        by_day = {}
+        for article in articles:
+            by_day.setdefault(_day_of(article), []).append(article)
+
+        with self._locked():
+            for day, batch in by_day.items():
+                body = "".join(json.dumps(a, separators=(",", ":")) + "\n" for a in batch).encode("utf-8")
+                blob = gzip.compress(body)
+                index = self.read_index(day)
+                with open(self._segment(day), "ab") as f:
+                    offset = f.tell()
+                    f.write(blob)
+                    f.flush()
+                    os.fsync(f.fileno())
+                index["members"].append(self._member_entry(offset, len(blob), body))
+                index["size"] = offset + len(blob)
+                self._write_index(day, index)
+        return sum(len(b) for b in by_day.values())
+
+    def _read_member(self, f, entry):
+        f.seek(entry[0])
+        body = gzip.decompress(f.read(entry[1]))
+        return [json.loads(line) for line in body.splitlines() if line]
+
+    def iter_members(self, day, start_member=0):
+        """(member number, articles) for one segment, starting at a member number."""
+        index = self.read_index(day)
+        if not index["members"][start_member:]:
+            return
+        with open(self._segment(day), "rb") as f:
+            for n, entry in enumerate(index["members"][start_member:], start=start_member):
+                yield n, self._read_member(f, entry)
+
+    def stream(self, start=None, end=None):
+        """
+        Yield articles with start <= publishedAt <= end (ISO strings or
+        datetimes), opening only the segments and members that overlap.
+        """
+        lo = start.strftime("%Y-%m-%dT%H:%M:%S") if isinstance(start, datetime) else start
+        hi = end.strftime("%Y-%m-%dT%H:%M:%S") if isinstance(end, datetime) else end
+        for day in self.days():
+            if (lo and day < lo[:10]) or (hi and day > hi[:10]):
+                continue
+            index = self.read_index(day)
+            with open(self._segment(day), "rb") as f:
+                for entry in index["members"]:
+                    if (lo and entry[3] < lo) or (hi and entry[2][:len(hi)] > hi):
+                        continue
+                    for article in self._read_member(f, entry):
+                        published = article.get("publishedAt") or ""
+                        if (lo and published < lo) or (hi and published[:len(hi)] > hi):
+                            continue
+                        yield article
+
+    def compact(self, day=None):
+        """
+        Rewrite segments appended to since their last compaction: drop
+        duplicate articles (by URL, else content hash), sort by publishedAt
+        and store one member per hour. Bumps the segment generation so
+        incremental readers restart it.
+        """
+        stats = {"segments": 0, "before": 0, "after": 0}
+        with self._locked():
+            for d in ([day] if day else self.days()):
+                index = self.read_index(d)
+                if index.get("compacted_size") == index["size"]:  # nothing appended since
+                    continue
+                seen, articles = set(), []
+                for _, batch in self.iter_members(d):
+                    for article in batch:
+                        stats["before"] += 1
+                        key = _dedup_key(article)
+                        if key not in seen:
+                            seen.add(key)
+                            articles.append(article)
+                articles.sort(key=lambda a: a.get("publishedAt") or "")
+
+                hours = {}
+                for article in articles:
+                    hour = (article.get("publishedAt") or "")[:13]
+                    hours.setdefault(hour, []).append(article)
+
+                tmp = self._segment(d) + ".tmp"
+                members, offset = [], 0
+                with open(tmp, "wb") as f:
+                    for hour in sorted(hours):
+                        body = "".join(json.dumps(a, separators=(",", ":")) + "\n" for a in hours[hour]).encode("utf-8")
+                        blob = gzip.compress(body)
+                        f.write(blob)
+                        members.append(self._member_entry(offset, len(blob), body))
+                        offset += len(blob)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self._segment(d))
+                self._write_index(d, {
+                    "generation": index.get("generation", 0) + 1,
+                    "size": offset, "members": members, "compacted_size": offset,
+                })
+                stats["segments"] += 1
+                stats["after"] += len(articles)
+        return stats
+
+    def import_snapshots(self, raw_dir=RAW_DATA_DIR, delete=False):
+        """Move legacy raw_fx_news_*.json snapshots into the archive."""
+        files = sorted(glob.glob(os.path.join(raw_dir, "raw_fx_news_*.json")))
+        total = 0
+        for path in files:
+            try:
+                with open(path) as f:
+                    total += self.append(json.load(f))
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping malformed JSON file: {path}")
+                continue
+            if delete:
+                os.remove(path)
+        return len(files), total
+
+
+def append_articles(articles, root=ARCHIVE_DIR):
+    return NewsArchive(root).append(articles)
+
+
+def stream_articles(start=None, end=None, root=ARCHIVE_DIR):
+    return NewsArchive(root).stream(start, end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FX news archive maintenance")
+    parser.add_argument("command", choices=["compact", "import"])
+    parser.add_argument("--delete-snapshots", action="store_true",
+                        help="remove raw_fx_news_*.json files once imported")
+    args = parser.parse_args()
+
+    archive = NewsArchive()
+    if args.command == "import":
+        files, articles = archive.import_snapshots(delete=args.delete_snapshots)
+        print(f"✅ Imported {articles} articles from {files} snapshot file(s) into {ARCHIVE_DIR}")
+    else:
+        stats = archive.compact()
+        print(f"✅ Compacted {stats['segments']} segment(s): {stats['before']} → {stats['after']} articles")
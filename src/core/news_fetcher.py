@@ -0,0 +1,256 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.news_archive import ARCHIVE_DIR, append_articles
+
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+WATERMARK_FILE = "data/ingest/news_fetcher.watermarks.json"
+
+PAGE_SIZE = 100
+MAX_PAGES = 3           # per shard and cycle
+MAX_CONCURRENCY = 6     # requests in flight
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0      # seconds, doubled per retry (plus jitter) unless Retry-After says otherwise
+BACKOFF_MAX = 60.0
+INITIAL_LOOKBACK_HOURS = 24
+
+# One query per shard, so each stays short and pages independently
+QUERY_SHARDS = {
+    "eur": '"EUR/USD" OR EUR OR euro',
+    "usd": "USD OR dollar",
+    "jpy": '"USD/JPY" OR JPY OR yen',
+    "gbp": '"GBP/USD" OR GBP OR sterling',
+    "fed": "FOMC OR \"Federal Reserve\"",
+    "ecb": 'ECB OR "European Central Bank"',
+    "boj": 'BoJ OR "Bank of Japan"',
+    "boe": 'BoE OR "Bank of England"',
+    "macro": 'forex OR "interest rate"',
+}
+
+
+class RequestsTransport:
+    """Pooled requests.Session driven from asyncio through worker threads."""
+
+    def __init__(self, pool_size=MAX_CONCURRENCY, timeout=20):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = timeout
+
+    def _get(self, url, params, headers):
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        try:
+            payload = response.json() if response.content else {}
+        except ValueError:
+            payload = {"message": response.text}
+        return response.status_code, dict(response.headers), payload
+
+    async def get(self, url, params, headers=None):
+        """(status, headers, json payload) for one GET."""
+        return await asyncio.to_thread(self._get, url, params, headers or {})
+
+    def close(self):
+        self.session.close()
+
+
+def _load_watermarks(path=WATERMARK_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_watermarks(marks, path=WATERMARK_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(marks, f, indent=2)
+    os.replace(tmp, path)
+
+
+class NewsFetcher:
+    """
+    Concurrent NewsAPI client. Every query shard asks only for articles newer
+    than its watermark (the newest publishedAt it has seen), pages run
+    concurrently under one semaphore, 429/5xx responses back off (honouring
+    Retry-After) and ETags are replayed as If-None-Match in the next cycles
+    (kept with the watermarks, keyed by shard and page: the moving `from`
+    is left out so an unchanged result is recognised).
+
+    Results come newest first, so when a shard has more than max_pages pages
+    the oldest articles are cut off: that window (watermark up to the oldest
+    article fetched) is kept as a gap in the watermark file and paged down
+    with from/to in the following cycles until it is drained.
+    """
+
+    def __init__(self, api_key, url=NEWSAPI_URL, shards=None, transport=None,
+                 watermark_file=WATERMARK_FILE, max_pages=MAX_PAGES, concurrency=MAX_CONCURRENCY):
+        self.api_key = api_key
+        self.url = url
+        self.shards = shards or QUERY_SHARDS
+        self.transport = transport or RequestsTransport(pool_size=concurrency)
+        self.watermark_file = watermark_file
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.stats = {"requests": 0, "retries": 0, "not_modified": 0, "errors": 0}
+        self._etags = {}   # ETags from the previous cycle
+        self._seen_etags = {}  # ETags this cycle answered with, saved for the next
+
+    async def _request(self, params):
+        key = json.dumps({k: v for k, v in params.items() if k != "from"}, sort_keys=True)
+        headers = {"X-Api-Key": self.api_key}
+        if key in self._etags:
+            headers["If-None-Match"] = self._etags[key]
+
+        for attempt in range(MAX_RETRIES + 1):
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                try:
+                    status, resp_headers, payload = await self.transport.get(self.url, params, headers)
+                except requests.RequestException as e:
+                    status, resp_headers, payload = None, {}, {"message": str(e)}
+
+            etag = resp_headers.get("ETag") or (self._etags.get(key) if status == 304 else None)
+            if status in (200, 304) and etag:
+                self._seen_etags[key] = etag
+            if status == 200:
+                return payload
+            if status == 304:
+                self.stats["not_modified"] += 1
+                return {"articles": [], "totalResults": 0}
+            if status is not None and status != 429 and status < 500:
+                break  # auth / bad request: retrying will not help
+
+            if attempt < MAX_RETRIES:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, resp_headers))
+
+        self.stats["errors"] += 1
+        print(f"❌ Error: {status} - {payload.get('message', '')} ({params.get('q')}, page {params.get('page')})")
+        return None
+
+    @staticmethod
+    def _backoff(attempt, headers):
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                pass
+        delay = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _fetch_shard(self, query, since, until=None):
+        """(articles, complete, truncated): complete = every page arrived, truncated = max_pages cut it short."""
+        params = {
+            "q": query,
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": PAGE_SIZE,
+            "from": since,
+            "page": 1,
+        }
+        if until:
+            params["to"] = until
+        first = await self._request(params)
+        if not first:
+            return [], False, False
+        articles = list(first.get("articles", []))
+
+        needed = -(-int(first.get("totalResults", 0)) // PAGE_SIZE)
+        pages = min(self.max_pages, needed)
+        rest = await asyncio.gather(*(self._request({**params, "page": p}) for p in range(2, pages + 1)))
+        for payload in rest:
+            if payload:
+                articles.extend(payload.get("articles", []))
+        return articles, all(rest), needed > pages
+
+    async def fetch(self):
+        """Run all shards concurrently; returns new articles, deduplicated by URL."""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        marks = _load_watermarks(self.watermark_file)
+        default_since = (datetime.utcnow() - timedelta(hours=INITIAL_LOOKBACK_HOURS)).strftime("%Y-%m-%dT%H:%M:%S")
+
+        gaps = marks.pop("_gaps", {})
+        self._etags, self._seen_etags = marks.pop("_etags", {}), {}
+        # one job per shard from its watermark, plus one per window a capped cycle left behind
+        jobs = [(name, query, marks.get(name, default_since), None) for name, query in self.shards.items()]
+        jobs += [(name, self.shards[name], lo, hi) for name, windows in gaps.items() if name in self.shards
+                 for lo, hi in windows]
+        results = await asyncio.gather(*(self._fetch_shard(query, lo, hi) for _, query, lo, hi in jobs))
+
+        seen, articles = set(), []
+        new_gaps = {}
+        for (name, _, lo, hi), (batch, complete, truncated) in zip(jobs, results):
+            for article in batch:
+                key = article.get("url") or (article.get("title"), article.get("publishedAt"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                articles.append(article)
+            stamps = [(a.get("publishedAt") or "").rstrip("Z")[:19] for a in batch]
+            stamps = [t for t in stamps if t]
+            if not complete:  # a failed page keeps the window as it was so it is retried
+                if hi is not None:
+                    new_gaps.setdefault(name, []).append([lo, hi])
+                continue
+            if truncated and stamps:
+                oldest = min(stamps)
+                if lo < oldest and (hi is None or oldest < hi):
+                    # NewsAPI's `from`/`to` are inclusive and second-granular;
+                    # downstream ingestion drops re-sent boundary articles
+                    new_gaps.setdefault(name, []).append([lo, oldest])
+                else:
+                    print(f"⚠️ {name}: more than {self.max_pages} pages within one second at {oldest}, skipped")
+            if hi is None and stamps:
+                marks[name] = max(marks.get(name, ""), max(stamps))
+
+        if new_gaps:
+            marks["_gaps"] = new_gaps
+        if self._seen_etags:
+            marks["_etags"] = self._seen_etags
+        _save_watermarks(marks, self.watermark_file)
+        return articles
+
+
+def fetch_news(api_key, url=NEWSAPI_URL, transport=None, archive=True, **kwargs):
+    """One fetch cycle: concurrent shard queries, appended to the news archive."""
+    start = time.perf_counter()
+    fetcher = NewsFetcher(api_key, url=url, transport=transport, **kwargs)
+    try:
+        articles = asyncio.run(fetcher.fetch())
+    finally:
+        if transport is None:
+            fetcher.transport.close()
+    if archive and articles:
+        append_articles(articles)
+    s = fetcher.stats
+    print(f"✅ Fetched {len(articles)} new articles from {len(fetcher.shards)} shards in "
+          f"{time.perf_counter() - start:.1f}s ({s['requests']} requests, {s['retries']} retries, "
+          f"{s['not_modified']} not modified, {s['errors']} failed)")
+    return articles
+
+
+if __name__ == "__main__":
+    from core.data_pipeline import API_KEY
+
+    parser = argparse.ArgumentParser(description="Concurrent NewsAPI fetch into the news archive")
+    parser.add_argument("--url", default=NEWSAPI_URL, help="NewsAPI endpoint (e.g. a local fake server)")
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    fetch_news(API_KEY, url=args.url, max_pages=args.max_pages, concurrency=args.concurrency)
+    print(f"📦 Archive: {ARCHIVE_DIR}")
@@ -0,0 +1,237 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import csv
+import itertools
+import json
+import time
+from datetime import timedelta
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_engine import INITIAL_CAPITAL, PriceHistory, run, summarize
+from core.signal_generator import (
+    BUCKET_FREQ, CURRENCIES, CURRENCY_PAIRS, SENTIMENT_SCORE, _timestamps, bucket_end, mention_matrix, signal_for,
+)
+
+LABELED_FILE = "data/labeled_fx_news.csv"
+RESULTS_FILE = "data/sweep_results.csv"
+
+# Default grid: FinBERT confidence cut (live_signal_generator / populate_returns
+# CONF_THRESH), net-sentiment cutoff (signal_generator SIGNAL_THRESHOLD), VADER
+# compound threshold (inference.classify_sentiment) and holding period.
+GRID = {
+    "conf_thresh": [0.5, 0.6, 0.7, 0.75, 0.8, 0.9],
+    "signal_threshold": [0.05, 0.1, 0.2, 0.3],
+    "vader_threshold": [0.02, 0.05, 0.1, 0.2],
+    "hold_days": [1, 2, 3, 5],
+}
+RESULT_FIELDS = ["config", "labeler", "conf_thresh", "vader_threshold", "signal_threshold", "hold_days",
+                 "trades", "win_rate", "avg_return", "total_return", "sharpe", "max_drawdown"]
+
+
+# ---------------------- SHARED INPUTS ----------------------
+#
+# Everything a configuration needs is precomputed once in the parent as flat
+# NumPy arrays and placed in shared memory; workers attach to the blocks by
+# name, so the process pool never pickles or re-reads articles and prices.
+
+class SharedArrays:
+    def __init__(self):
+        self.blocks = {}
+        self.meta = {}
+
+    def put(self, name, array):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        self.blocks[name] = block
+        self.meta[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+
+
+def attach(meta):
+    """Views on the parent's shared blocks (the handles are kept alive with them)."""
+    arrays, handles = {}, []
+    for name, (shm_name, shape, dtype) in meta.items():
+        block = shared_memory.SharedMemory(name=shm_name)
+        handles.append(block)
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+    return arrays, handles
+
+
+def prepare_inputs(df: pd.DataFrame, history: PriceHistory) -> SharedArrays:
+    text = (df["title"].fillna("") + " " + df["description"].fillna("")).str.lower()
+    buckets = bucket_end(_timestamps(df), BUCKET_FREQ)
+    keep = buckets.notna().to_numpy()
+    bucket_values, bucket_idx = np.unique(buckets[keep].values.astype("datetime64[ns]").astype(np.int64), return_inverse=True)
+
+    shared = SharedArrays()
+    shared.put("mentions", mention_matrix(text[keep]).to_numpy())
+    shared.put("bucket_idx", bucket_idx.astype(np.int64))
+    shared.put("bucket_values", bucket_values)
+    if "confidence" in df:
+        shared.put("finbert_score", df["label"].map(SENTIMENT_SCORE).fillna(0).to_numpy(dtype=float)[keep])
+        shared.put("finbert_conf", pd.to_numeric(df["confidence"], errors="coerce").fillna(0).to_numpy()[keep])
+    shared.put("compound", vader_compound(df).to_numpy()[keep])
+    for i, pair in enumerate(history.pairs):
+        shared.put(f"times_{i}", history.times[pair])
+        shared.put(f"closes_{i}", history.closes[pair])
+    shared.meta["_pairs"] = history.pairs
+    return shared
+
+
+def vader_compound(df: pd.DataFrame) -> pd.Series:
+    """VADER compound score per article: the stored column when the labels came from inference.py."""
+    if "compound" in df:
+        return pd.to_numeric(df["compound"], errors="coerce").fillna(0.0)
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    analyzer = SentimentIntensityAnalyzer()
+    text = (df["title"].fillna("").astype(str) + " " + df["description"].fillna("").astype(str)).str.strip()
+    return text.map(lambda t: analyzer.polarity_scores(t)["compound"])
+
+
+# ---------------------- WORKER ----------------------
+
+_inputs = {}
+
+
+def _init_worker(meta):
+    meta = dict(meta)
+    pairs = meta.pop("_pairs")
+    arrays, handles = attach(meta)
+    history = PriceHistory({})
+    for i, pair in enumerate(pairs):
+        history.times[pair] = arrays[f"times_{i}"]
+        history.closes[pair] = arrays[f"closes_{i}"]
+    _inputs.update(arrays=arrays, handles=handles, history=history)
+
+
+def bucketed_signals(arrays, scores, include, threshold):
+    """Hourly pair signals from per-article scores — the numeric core of signal_generator.currency_sentiment."""
+    idx = arrays["bucket_idx"][include]
+    mentions = arrays["mentions"][include]
+    n_buckets = len(arrays["bucket_values"])
+    sums = np.stack([np.bincount(idx, mentions[:, c] * scores[include], n_buckets) for c in range(len(CURRENCIES))], 1)
+    counts = np.stack([np.bincount(idx, mentions[:, c], n_buckets) for c in range(len(CURRENCIES))], 1)
+    means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    col = {cur: i for i, cur in enumerate(CURRENCIES)}
+    frames = []
+    for pair, (base, quote) in CURRENCY_PAIRS.items():
+        b, q = col[base], col[quote]
+        live = (counts[:, b] + counts[:, q]) > 0
+        net = means[live, b] - means[live, q]
+        frames.append(pd.DataFrame({
+            "timestamp": arrays["bucket_values"][live].view("datetime64[ns]"),
+            "pair": pair,
+            "signal": signal_for(net, threshold),
+        }))
+    signals = pd.concat(frames, ignore_index=True)
+    return signals[signals["signal"] != "NEUTRAL"]
+
+
+def evaluate(config):
+    arrays, history = _inputs["arrays"], _inputs["history"]
+    if config["labeler"] == "finbert":
+        scores = arrays["finbert_score"]
+        include = arrays["finbert_conf"] >= config["conf_thresh"]
+    else:
+        compound = arrays["compound"]
+        thr = config["vader_threshold"]
+        scores = np.select([compound >= thr, compound <= -thr], [1.0, -1.0], 0.0)
+        include = np.ones(len(compound), dtype=bool)
+
+    signals = bucketed_signals(arrays, scores, include, config["signal_threshold"])
+    trades, equity = run(signals, history, hold_bars=config["hold_days"], capital=INITIAL_CAPITAL)
+    stats = summarize(trades, equity, INITIAL_CAPITAL)
+    return {**config, **{k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()}}
+
+
+# ---------------------- DRIVER ----------------------
+
+def build_grid(grid=GRID, labelers=("finbert", "vader")):
+    configs = []
+    for labeler in labelers:
+        swept = "conf_thresh" if labeler == "finbert" else "vader_threshold"
+        for value, sig, hold in itertools.product(grid[swept], grid["signal_threshold"], grid["hold_days"]):
+            config = {"labeler": labeler, "conf_thresh": None, "vader_threshold": None,
+                      "signal_threshold": sig, "hold_days": hold, swept: value}
+            config["config"] = json.dumps({k: config[k] for k in sorted(config)}, sort_keys=True)
+            configs.append(config)
+    return configs
+
+
+def _done_configs(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as f:
+        return {row["config"] for row in csv.DictReader(f)}
+
+
+def run_sweep(grid=GRID, labeled_file=LABELED_FILE, results_file=RESULTS_FILE, processes=None, loader=None):
+    """
+    Backtest every configuration of the grid over a process pool. Each result
+    is appended to results_file as soon as it finishes, and configurations
+    already there are skipped, so an interrupted sweep resumes where it stopped.
+    """
+    from core.storage import read_table
+
+    df = read_table("labeled_news", labeled_file)
+    if "publishedAt" not in df and "timestamp" not in df:
+        print("❌ Labeled file needs a publishedAt or timestamp column.")
+        return None
+    labelers = ("finbert", "vader") if "confidence" in df else ("vader",)
+
+    configs = build_grid(grid, labelers)
+    done = _done_configs(results_file)
+    todo = [c for c in configs if c["config"] not in done]
+    print(f"🧮 {len(configs)} configuration(s), {len(done)} already in {results_file}, {len(todo)} to run")
+
+    if todo:
+        when = _timestamps(df).dropna()
+        start = (when.min() - timedelta(days=10)).strftime("%Y-%m-%d")
+        end = (when.max() + timedelta(days=2 * max(grid["hold_days"]) + 10)).strftime("%Y-%m-%d")
+        history = PriceHistory.load(list(CURRENCY_PAIRS), start, end, loader=loader)
+
+        shared = prepare_inputs(df, history)
+        t0 = time.perf_counter()
+        try:
+            new_file = not os.path.exists(results_file)
+            with open(results_file, "a", newline="") as f, \
+                    Pool(processes, initializer=_init_worker, initargs=(shared.meta,)) as pool:
+                writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                for i, result in enumerate(pool.imap_unordered(evaluate, todo), 1):
+                    writer.writerow({k: result.get(k) for k in RESULT_FIELDS})
+                    f.flush()  # checkpoint: each finished configuration survives an interruption
+                    if i % 10 == 0 or i == len(todo):
+                        print(f"   {i}/{len(todo)} done ({i / (time.perf_counter() - t0):.1f} configs/s)")
+        finally:
+            shared.close()
+
+    results = pd.read_csv(results_file).sort_values("sharpe", ascending=False)
+    print("\n🏆 Top configurations by Sharpe")
+    print(results.drop(columns=["config"]).head(10).to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grid backtest of signal parameters")
+    parser.add_argument("--processes", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--results", default=RESULTS_FILE, help="results / checkpoint CSV")
+    parser.add_argument("--fresh", action="store_true", help="discard previous results instead of resuming")
+    args = parser.parse_args()
+
+    if args.fresh and os.path.exists(args.results):
+        os.remove(args.results)
+    run_sweep(results_file=args.results, processes=args.processes)
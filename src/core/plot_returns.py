@@ -2,10 +2,20 @@ import pandas as pd
 import yfinance as yf
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+import io
 import os
+from collections import OrderedDict
 from pandas.tseries.offsets import BDay
 
-CACHE_FILE = "data/price_cache.csv"
+from core.price_cache import PriceCache
+from core.price_service import PriceService
+from core.storage import read_table
+from utils.downsample import downsample
+
+CACHE_FILE = "data/price_cache.sqlite"
+PLOT_WIDTH_PX = 1000      # points are reduced to what this many pixels can show
+PLOT_DPI = 100
+FIGURE_CACHE_SIZE = 16
 
 FX_TICKER_MAP = {
     "EUR/USD": "EURUSD=X",
@@ -38,18 +48,39 @@ def fetch_price_from_yahoo(ticker: str, timestamp: str) -> float:
         print(f"❌ Error fetching {ticker} @ {timestamp}: {e}")
         return None
 
-def calculate_returns(file_path):
-    df = pd.read_csv(file_path)
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+# ---------------------- PRICE CACHE ----------------------
+
+_price_cache = PriceCache(CACHE_FILE)
+price_service = PriceService(FX_TICKER_MAP, cache=_price_cache)
+
+def get_cached_price(pair: str, timestamp) -> float:
+    return _price_cache.get(pair, timestamp)
+
+def cache_price(pair: str, timestamp, price: float):
+    _price_cache.put(pair, timestamp, price)
+
+def price_cache_stats() -> dict:
+    return price_service.stats()
+
+def get_price(pair: str, timestamp) -> float:
+    """Close for the pair on the timestamp's trading day; Yahoo is only hit on a cache miss."""
+    price = price_service.lookup([pair], [timestamp])[0]
+    return None if pd.isna(price) else float(price)
+
+def get_prices(pairs, timestamps):
+    """Vectorized get_price: one download per pair for the whole batch."""
+    return price_service.lookup(pairs, timestamps)
 
-    prices = []
-    returns = []
-    for _, row in df.iterrows():
-        ticker = fx_pair_to_yf(row["pair"])
-        price = fetch_price_from_yahoo(ticker, row["timestamp"])
-        prices.append(price)
+def load_price_range(pair: str, start, end) -> pd.Series:
+    """Daily closes for the pair between start and end, downloading only the days not cached yet."""
+    return price_service.load_range(pair, start, end)
 
-    df["entry_price"] = prices
+def calculate_returns(file_path, columns=None, start=None, end=None):
+    # Parquet copy of the log when it is current, else the CSV; only the requested columns/dates
+    df = read_table("live_signals", file_path, columns=columns, start=start, end=end)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+
+    df["entry_price"] = get_prices(df["pair"], df["timestamp"])
     df["exit_price"] = df["entry_price"].shift(-1)  # assume next signal is exit
     df["return_pct"] = (df["exit_price"] - df["entry_price"]) / df["entry_price"] * 100
     df["cumulative_return"] = df["return_pct"].cumsum()
@@ -78,9 +109,49 @@ def summarize_returns(returns):
         "Win Rate": win_rate
     }
 
-def plot_cumulative_returns(cumulative_returns):
-    fig, ax = plt.subplots(figsize=(10, 4))
-    cumulative_returns.plot(ax=ax, title="Cumulative Return (%)")
+def downsample_curve(cumulative_returns, width_px=PLOT_WIDTH_PX, method="minmax"):
+    """The equity curve reduced to about width_px buckets, keeping each bucket's extremes."""
+    curve = cumulative_returns.dropna()
+    x = curve.index.asi8 if isinstance(curve.index, pd.DatetimeIndex) else curve.index.to_numpy(dtype=float)
+    return curve.iloc[downsample(x, curve.to_numpy(), width_px, method)]
+
+def plot_cumulative_returns(cumulative_returns, width_px=PLOT_WIDTH_PX, method="minmax"):
+    fig, ax = plt.subplots(figsize=(width_px / PLOT_DPI, 4), dpi=PLOT_DPI)
+    downsample_curve(cumulative_returns, width_px, method).plot(ax=ax, title="Cumulative Return (%)")
     ax.set_ylabel("Return %")
     ax.grid(True)
     return fig
+
+_figure_cache = OrderedDict()
+
+def render_cumulative_returns(cumulative_returns, version, width_px=PLOT_WIDTH_PX, method="minmax") -> bytes:
+    """PNG of the equity curve, rendered once per (data version, width, method)."""
+    key = (version, width_px, method)
+    if key in _figure_cache:
+        _figure_cache.move_to_end(key)
+        return _figure_cache[key]
+    fig = plot_cumulative_returns(cumulative_returns, width_px, method)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    _figure_cache[key] = buf.getvalue()
+    while len(_figure_cache) > FIGURE_CACHE_SIZE:
+        _figure_cache.popitem(last=False)
+    return _figure_cache[key]
+
+def altair_cumulative_returns(cumulative_returns, width_px=PLOT_WIDTH_PX, method="minmax"):
+    """Interactive Vega-Lite chart that ships only the downsampled points to the browser."""
+    import altair as alt
+
+    curve = downsample_curve(cumulative_returns, width_px, method)
+    x_name = curve.index.name or "signal"
+    data = pd.DataFrame({x_name: curve.index, "cumulative_return": curve.to_numpy()})
+    x_type = "T" if isinstance(curve.index, pd.DatetimeIndex) else "Q"
+    return (
+        alt.Chart(data, title="Cumulative Return (%)")
+        .mark_line()
+        .encode(x=f"{x_name}:{x_type}", y=alt.Y("cumulative_return:Q", title="Return %"),
+                tooltip=[x_name, alt.Tooltip("cumulative_return:Q", format=".2f")])
+        .properties(width=width_px, height=300)
+        .interactive()
+    )
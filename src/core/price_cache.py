@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+from pandas.tseries.offsets import BDay
+
+CACHE_FILE = "data/price_cache.sqlite"
+MEMORY_CAPACITY = 4096
+PROVISIONAL_TTL = 900  # seconds today's still-moving close is reused before it is fetched again
+
+
+def trading_day(timestamp) -> pd.Timestamp:
+    """Normalize a timestamp to the (naive UTC) trading day whose close prices it."""
+    ts = pd.Timestamp(timestamp)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    ts = ts.normalize()
+    if ts.weekday() >= 5:
+        ts -= BDay(1)  # weekends price off the previous business day
+    return ts
+
+
+def _day_key(timestamp) -> str:
+    return trading_day(timestamp).strftime("%Y-%m-%d")
+
+
+def _is_final(day) -> bool:
+    """Whether a trading day's close is settled: today's bar keeps moving until it closes."""
+    return trading_day(day) < trading_day(datetime.utcnow())
+
+
+class PriceCache:
+    """
+    Daily close cache keyed by (pair, trading day).
+
+    Closes live in a SQLite table on disk (primary key on pair + day), with a
+    small LRU dict in front of it for the hot lookups made by the live logger
+    and the dashboard. Days that were downloaded but had no bar (holidays) are
+    stored as NULL so they are not requested again. Today's close is not
+    final yet: it is only kept in memory for PROVISIONAL_TTL seconds.
+    """
+
+    def __init__(self, path=CACHE_FILE, capacity=MEMORY_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._provisional = {}  # (pair, day) → (close, monotonic time fetched)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "pair TEXT NOT NULL, day TEXT NOT NULL, close REAL, "
+                "PRIMARY KEY (pair, day)) WITHOUT ROWID"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def _fresh_provisional(self, pair, first, last):
+        """{day: close} of today's closes fetched less than PROVISIONAL_TTL ago, between two day keys."""
+        now = time.monotonic()
+        return {day: close for (p, day), (close, fetched) in self._provisional.items()
+                if p == pair and first <= day <= last and now - fetched < PROVISIONAL_TTL}
+
+    def _keep_provisional(self, pair, day, value):
+        if value is not None:
+            self._provisional[(pair, day)] = (value, time.monotonic())
+
+    def lookup(self, pair, timestamp):
+        """Return (found, close) for a single key, counting hits and misses."""
+        key = (pair, _day_key(timestamp))
+        with self._lock:
+            provisional = self._fresh_provisional(pair, key[1], key[1])
+            if provisional:
+                self.hits += 1
+                return True, provisional[key[1]]
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return True, self._memory[key]
+
+            row = self._connect().execute(
+                "SELECT close FROM prices WHERE pair = ? AND day = ?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            self.hits += 1
+            self._remember(key, row[0])
+            return True, row[0]
+
+    def has(self, pair, timestamp) -> bool:
+        return self.lookup(pair, timestamp)[0]
+
+    def get(self, pair, timestamp):
+        """Cached close for the pair on the timestamp's trading day, or None."""
+        return self.lookup(pair, timestamp)[1]
+
+    def put(self, pair, timestamp, price):
+        key = (pair, _day_key(timestamp))
+        value = None if price is None or pd.isna(price) else float(price)
+        with self._lock:
+            if not _is_final(timestamp):  # not stored, so it is fetched again once final
+                self._keep_provisional(*key, value)
+                return
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO prices VALUES (?, ?, ?)", (*key, value))
+            conn.commit()
+            self._remember(key, value)
+
+    def put_many(self, pair, closes: pd.Series, start=None, end=None):
+        """
+        Store a series of daily closes in one transaction. When start/end are
+        given, business days in that span without a close are recorded as
+        known gaps. Only days already in the past are stored: today's partial
+        close is left out for both.
+        """
+        rows, provisional = {}, {}
+        last_final = trading_day(datetime.utcnow()) - BDay(1)
+        if start is not None and end is not None:
+            for day in pd.bdate_range(trading_day(start), min(trading_day(end), last_final)):
+                rows[day.strftime("%Y-%m-%d")] = None
+        for ts, price in closes.dropna().items():
+            (rows if _is_final(ts) else provisional)[_day_key(ts)] = float(price)
+
+        with self._lock:
+            for day, price in provisional.items():
+                self._keep_provisional(pair, day, price)
+            if not rows:
+                return
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices VALUES (?, ?, ?)",
+                [(pair, day, price) for day, price in rows.items()],
+            )
+            conn.commit()
+            for day, price in rows.items():
+                self._remember((pair, day), price)
+
+    def get_range(self, pair, start, end) -> pd.Series:
+        """All cached closes for the pair between two dates (inclusive), known gaps dropped."""
+        first, last = _day_key(start), _day_key(end)
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT day, close FROM prices WHERE pair = ? AND day BETWEEN ? AND ? "
+                "AND close IS NOT NULL ORDER BY day",
+                (pair, first, last),
+            ).fetchall()
+            rows += sorted(self._fresh_provisional(pair, first, last).items())
+        if not rows:
+            return pd.Series(dtype=float, name=pair)
+        days, prices = zip(*rows)
+        return pd.Series(prices, index=pd.to_datetime(days), name=pair, dtype=float)
+
+    def missing_days(self, pair, start, end) -> list:
+        """Business days in [start, end] (capped at today) with nothing cached yet."""
+        first = trading_day(start)
+        last = min(trading_day(end), trading_day(datetime.utcnow()))
+        if last < first:
+            return []
+        with self._lock:
+            known = {
+                day for (day,) in self._connect().execute(
+                    "SELECT day FROM prices WHERE pair = ? AND day BETWEEN ? AND ?",
+                    (pair, first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")),
+                )
+            }
+            known |= set(self._fresh_provisional(pair, first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")))
+        return [day for day in pd.bdate_range(first, last) if day.strftime("%Y-%m-%d") not in known]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
@@ -0,0 +1,170 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.price_cache import PriceCache, trading_day
+
+MAX_GAP_DAYS = 365       # daily bars are cheap: missing days within a year share one request
+MAX_STALENESS_DAYS = 4   # as-of matches older than this (long holidays) count as missing
+
+
+def close_series(df: pd.DataFrame) -> pd.Series:
+    """Daily Close column from a yfinance-style frame, tolerating (field, ticker) columns."""
+    if df is None or df.empty or "Close" not in df:
+        return pd.Series(dtype=float)
+    closes = df["Close"]
+    if isinstance(closes, pd.DataFrame):
+        closes = closes.iloc[:, 0]
+    closes = closes.dropna()
+    closes.index = pd.to_datetime(closes.index)
+    return closes.sort_index()
+
+
+def merge_ranges(days, max_gap_days=MAX_GAP_DAYS):
+    """Collapse sorted days into the fewest (start, end) ranges with gaps <= max_gap_days."""
+    ranges = []
+    for day in sorted(days):
+        if ranges and (day - ranges[-1][1]).days <= max_gap_days:
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(r) for r in ranges]
+
+
+# ---------------------- BACKENDS ----------------------
+
+class YahooBackend:
+    """Daily closes from Yahoo Finance, one yf.download per requested range."""
+
+    def fetch(self, ticker, start, end) -> pd.Series:
+        import yfinance as yf
+
+        raw = yf.download(ticker,
+                          start=start.strftime("%Y-%m-%d"),
+                          end=(end + timedelta(days=1)).strftime("%Y-%m-%d"),
+                          progress=False, auto_adjust=False)
+        return close_series(raw)
+
+
+class LocalFileBackend:
+    """
+    Daily closes from local files, one per ticker: <root>/<ticker>.parquet or
+    <root>/<ticker>.csv with a date column and a close column. Used as a
+    stand-in for Yahoo in tests and offline runs.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._frames = {}
+
+    def _load(self, ticker):
+        if ticker not in self._frames:
+            base = os.path.join(self.root, ticker)
+            if os.path.exists(base + ".parquet"):
+                df = pd.read_parquet(base + ".parquet")
+            elif os.path.exists(base + ".csv"):
+                df = pd.read_csv(base + ".csv")
+            else:
+                df = pd.DataFrame(columns=["date", "close"])
+            df.columns = [c.lower() for c in df.columns]
+            series = pd.Series(df["close"].astype(float).values,
+                               index=pd.to_datetime(df["date"]), dtype=float)
+            self._frames[ticker] = series.dropna().sort_index()
+        return self._frames[ticker]
+
+    def fetch(self, ticker, start, end) -> pd.Series:
+        series = self._load(ticker)
+        return series.loc[(series.index >= start) & (series.index < end + timedelta(days=1))]
+
+
+# ---------------------- SERVICE ----------------------
+
+class PriceService:
+    """
+    Batched daily price lookups for (pair, timestamp) requests.
+
+    Requests are grouped by pair, the days the cache does not hold yet are
+    merged into contiguous ranges and fetched once per range from the backend,
+    and every lookup is then answered with a backward as-of join against the
+    cached closes.
+    """
+
+    def __init__(self, ticker_map, backend=None, cache=None, max_gap_days=MAX_GAP_DAYS):
+        self.ticker_map = ticker_map
+        self.backend = backend or YahooBackend()
+        self.cache = cache or PriceCache(":memory:")
+        self.max_gap_days = max_gap_days
+        self.downloads = 0
+
+    def _fetch_missing(self, pair, days):
+        ticker = self.ticker_map.get(pair)
+        if not ticker or not days:
+            return
+        for start, end in merge_ranges(days, self.max_gap_days):
+            missing = self.cache.missing_days(pair, start, end)
+            if not missing:
+                continue
+            try:
+                closes = self.backend.fetch(ticker, missing[0], missing[-1])
+                self.downloads += 1
+            except Exception as e:
+                print(f"❌ Error fetching {ticker} from {missing[0]:%Y-%m-%d} to {missing[-1]:%Y-%m-%d}: {e}")
+                continue
+            if closes.empty:  # yfinance reports failures as an empty frame: retry next time
+                print(f"⚠️ No closes for {ticker} from {missing[0]:%Y-%m-%d} to {missing[-1]:%Y-%m-%d}")
+                continue
+            # days without a bar count as known gaps only within the span the bars cover
+            self.cache.put_many(pair, closes, closes.index.min(), closes.index.max())
+
+    def load_range(self, pair, start, end) -> pd.Series:
+        """Daily closes for one pair between start and end (inclusive)."""
+        self._fetch_missing(pair, self.cache.missing_days(pair, start, end))
+        return self.cache.get_range(pair, start, end)
+
+    def lookup(self, pairs, timestamps) -> np.ndarray:
+        """
+        Close for every (pair, timestamp) request, aligned with the inputs.
+        Timestamps on a trading day still in the future resolve to NaN.
+        """
+        req = pd.DataFrame({
+            "pair": pd.Series(pairs).reset_index(drop=True),
+            "ts": pd.to_datetime(pd.Series(timestamps).reset_index(drop=True), errors="coerce", utc=True, format="mixed"),
+        })
+        req["ts"] = req["ts"].dt.tz_localize(None)
+        req["pos"] = np.arange(len(req))
+        out = np.full(len(req), np.nan)
+
+        # trading day per request: weekends price off the preceding Friday
+        day = req["ts"].dt.normalize()
+        req["day"] = day - pd.to_timedelta((day.dt.weekday - 4).clip(lower=0), unit="D")
+
+        today = trading_day(datetime.utcnow())
+        valid = req.dropna(subset=["pair", "ts"])
+        valid = valid[valid["pair"].isin(list(self.ticker_map)) & (valid["day"] <= today)]
+
+        for pair, group in valid.groupby("pair"):
+            days = group["day"].drop_duplicates().sort_values()
+            first = days.iloc[0] - timedelta(days=MAX_STALENESS_DAYS)
+            last = days.iloc[-1]
+
+            # only fetch the requested days plus the short look-back an as-of match may need
+            needed = {d + timedelta(days=k) for d in days for k in range(-MAX_STALENESS_DAYS, 1)}
+            self._fetch_missing(pair, [d for d in self.cache.missing_days(pair, first, last) if d in needed])
+
+            closes = self.cache.get_range(pair, first, last)
+            if closes.empty:
+                continue
+
+            left = group.sort_values("ts")
+            right = pd.DataFrame({"bar": closes.index.astype(left["ts"].dtype), "close": closes.values})
+            joined = pd.merge_asof(left, right, left_on="ts", right_on="bar",
+                                   direction="backward",
+                                   tolerance=pd.Timedelta(days=MAX_STALENESS_DAYS))
+            out[joined["pos"].to_numpy()] = joined["close"].to_numpy()
+
+        return out
+
+    def stats(self) -> dict:
+        return {"downloads": self.downloads, **self.cache.stats()}
@@ -1,8 +1,13 @@
+import re
+
+import numpy as np
 import pandas as pd
-from collections import defaultdict
 
 INPUT_FILE = "data/labeled_fx_news.csv"
 OUTPUT_FILE = "data/fx_sentiment_signals.csv"
+BUCKETED_OUTPUT_FILE = "data/fx_sentiment_signals_hourly.csv"
+BUCKET_FREQ = "1h"
+SIGNAL_THRESHOLD = 0.1
 
 # Currency keywords to monitor
 CURRENCY_PAIRS = {
@@ -14,59 +19,117 @@ CURRENCY_PAIRS = {
     "USD/CAD": ("usd", "cad"),
     "NZD/USD": ("nzd", "usd")
 }
+CURRENCIES = sorted({cur for pair in CURRENCY_PAIRS.values() for cur in pair})
+
+# One compiled alternation with word boundaries: "eur" matches "eur" and
+# "eur/usd" but not "europe"
+MENTION_RE = re.compile(r"\b(" + "|".join(CURRENCIES) + r")\b")
 
-# Define sentiment scores
+# Define sentiment scores (FinBERT labels map onto the same scale)
 SENTIMENT_SCORE = {
     "bullish": 1,
     "bearish": -1,
-    "neutral": 0
+    "neutral": 0,
+    "positive": 1,
+    "negative": -1
 }
 
-def generate_signals():
-    df = pd.read_csv(INPUT_FILE)
-    
-    if not {"title", "description", "label"}.issubset(df.columns):
-        print("❌ Input file must contain 'title', 'description', and 'label' columns.")
-        return
 
-    df["text"] = df["title"].fillna("") + " " + df["description"].fillna("")
-    df["text"] = df["text"].str.lower()
+def mention_matrix(texts: pd.Series) -> pd.DataFrame:
+    """Boolean article × currency matrix of word-boundary mentions, from a single regex scan."""
+    found = texts.str.findall(MENTION_RE)
+    per_article = found.str.len().to_numpy()
+    matrix = np.zeros((len(texts), len(CURRENCIES)), dtype=bool)
+    if per_article.sum():
+        rows = np.repeat(np.arange(len(texts)), per_article)
+        cols = pd.Categorical(np.concatenate(found.to_numpy()), categories=CURRENCIES).codes
+        matrix[rows, cols] = True
+    return pd.DataFrame(matrix, index=texts.index, columns=CURRENCIES)
+
+
+def signal_for(net_sentiment, threshold=SIGNAL_THRESHOLD):
+    return np.select(
+        [net_sentiment > threshold, net_sentiment < -threshold],
+        ["LONG", "SHORT"],
+        default="NEUTRAL",
+    )
+
+
+def currency_sentiment(df: pd.DataFrame, freq=None):
+    """
+    Mean sentiment score and mention count per currency, overall or per time
+    bucket of `freq` (e.g. "1h"). Returns (means, counts) frames indexed by
+    bucket end (or a single "all" row) with one column per currency.
+    """
+    text = (df["title"].fillna("") + " " + df["description"].fillna("")).str.lower()
+    mentions = mention_matrix(text).to_numpy()
+    scores = df["label"].map(SENTIMENT_SCORE).fillna(0).to_numpy(dtype=float)
+
+    weighted = pd.DataFrame(mentions * scores[:, None], index=df.index, columns=CURRENCIES)
+    counts = pd.DataFrame(mentions.astype(int), index=df.index, columns=CURRENCIES)
+
+    if freq:
+        keys = bucket_end(_timestamps(df), freq)
+    else:
+        keys = pd.Series("all", index=df.index)
+    score_sum = weighted.groupby(keys).sum()
+    count_sum = counts.groupby(keys).sum()
+    means = (score_sum / count_sum.replace(0, np.nan)).fillna(0.0)
+    return means, count_sum
 
-    currency_sentiment = defaultdict(list)
 
-    for _, row in df.iterrows():
-        sentiment_score = SENTIMENT_SCORE.get(row["label"], 0)
-        for label_currency in set([cur for pair in CURRENCY_PAIRS.values() for cur in pair]):
-            if label_currency in row["text"]:
-                currency_sentiment[label_currency].append(sentiment_score)
+def bucket_end(timestamps: pd.Series, freq) -> pd.Series:
+    """
+    End of each timestamp's `freq` bucket: a bucket's signal is only known
+    once its last headline is in, so it is stamped (and traded) from then on.
+    """
+    return timestamps.dt.floor(freq) + pd.tseries.frequencies.to_offset(freq)
 
-    results = []
+
+def _timestamps(df: pd.DataFrame) -> pd.Series:
+    col = "publishedAt" if "publishedAt" in df else "timestamp"
+    return pd.to_datetime(df[col], errors="coerce", utc=True, format="mixed").dt.tz_localize(None)
+
+
+def pair_signals(means: pd.DataFrame, counts: pd.DataFrame, threshold=SIGNAL_THRESHOLD) -> pd.DataFrame:
+    """Net base-minus-quote sentiment and signal for every pair and bucket."""
+    frames = []
     for pair, (base, quote) in CURRENCY_PAIRS.items():
-        base_scores = currency_sentiment[base]
-        quote_scores = currency_sentiment[quote]
-        
-        base_sentiment = sum(base_scores) / len(base_scores) if base_scores else 0
-        quote_sentiment = sum(quote_scores) / len(quote_scores) if quote_scores else 0
-        net_sentiment = base_sentiment - quote_sentiment
-
-        if net_sentiment > 0.1:
-            signal = "LONG"
-        elif net_sentiment < -0.1:
-            signal = "SHORT"
-        else:
-            signal = "NEUTRAL"
-
-        results.append({
+        net = means[base] - means[quote]
+        frames.append(pd.DataFrame({
+            "bucket": means.index,
             "pair": pair,
-            "base_sentiment": round(base_sentiment, 4),
-            "quote_sentiment": round(quote_sentiment, 4),
-            "net_sentiment": round(net_sentiment, 4),
-            "signal": signal
-        })
+            "base_sentiment": means[base].round(4).values,
+            "quote_sentiment": means[quote].round(4).values,
+            "net_sentiment": net.round(4).values,
+            "base_mentions": counts[base].values,
+            "quote_mentions": counts[quote].values,
+            "signal": signal_for(net.values, threshold),
+        }))
+    out = pd.concat(frames, ignore_index=True)
+    return out.sort_values("bucket", kind="stable").reset_index(drop=True)
+
+
+def generate_signals(freq=BUCKET_FREQ):
+    df = pd.read_csv(INPUT_FILE)
 
-    signals_df = pd.DataFrame(results)
+    if not {"title", "description", "label"}.issubset(df.columns):
+        print("❌ Input file must contain 'title', 'description', and 'label' columns.")
+        return
+
+    # global snapshot (one row per pair) — what backtest_signals consumes
+    means, counts = currency_sentiment(df)
+    signals_df = pair_signals(means, counts).drop(columns=["bucket", "base_mentions", "quote_mentions"])
     signals_df.to_csv(OUTPUT_FILE, index=False)
     print(f"✅ FX Sentiment Signals saved to {OUTPUT_FILE}")
 
+    # time-bucketed net sentiment per pair, only for buckets where either leg was mentioned
+    if freq and ("publishedAt" in df or "timestamp" in df):
+        means, counts = currency_sentiment(df, freq)
+        bucketed = pair_signals(means, counts)
+        bucketed = bucketed[(bucketed["base_mentions"] + bucketed["quote_mentions"]) > 0]
+        bucketed.to_csv(BUCKETED_OUTPUT_FILE, index=False)
+        print(f"✅ {freq} bucketed signals saved to {BUCKETED_OUTPUT_FILE} — {len(bucketed)} rows")
+
 if __name__ == "__main__":
     generate_signals()
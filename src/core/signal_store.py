@@ -0,0 +1,238 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.backfill_engine import (
+    CONF_THRESH, DIRECTION, EXIT_DELAY, asof_closes, load_closes, parse_timestamps,
+)
+
+LOG_BACKEND = "csv"   # "sqlite": log_signals, the dashboard and the backfills use SIGNAL_DB instead of the CSV
+SIGNAL_DB = "data/live_signals.sqlite"
+CSV_LOG = "data/live_signals_log.csv"
+COLUMNS = ["timestamp", "pair", "title", "description", "label", "confidence", "signal",
+           "entry_price", "exit_price", "return_pct", "cumulative_return"]
+CHUNK_ROWS = 100_000
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS signals (id INTEGER PRIMARY KEY, timestamp TEXT, pair TEXT, title TEXT, "
+    "description TEXT, label TEXT, confidence REAL, signal TEXT, entry_price REAL, exit_price REAL, "
+    "return_pct REAL, cumulative_return REAL)",
+    "CREATE INDEX IF NOT EXISTS signals_pair_ts ON signals (pair, timestamp)",
+    "CREATE INDEX IF NOT EXISTS signals_label_conf ON signals (label, confidence)",
+]
+
+
+class SignalStore:
+    """
+    The live signal log as a SQLite table in WAL mode: one writer (the live
+    logger or a backfill) never blocks the dashboard's readers, inserts are
+    batched into one transaction per log_signals call, and backfills UPDATE
+    the affected rows in place instead of rewriting a file. Row ids keep
+    the append order, which the running cumulative return follows.
+    """
+
+    def __init__(self, path=SIGNAL_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)  # explicit transactions
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # WAL: durable at checkpoints, never corrupt
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    def max_id(self):
+        return self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM signals").fetchone()[0]
+
+    # ---------------------- WRITES ----------------------
+
+    def append(self, records):
+        """
+        Insert (timestamp, pair, title, description, label, confidence, signal,
+        entry_price, exit_price, return_pct) records in one transaction, with
+        the cumulative return continued from the last stored row.
+        """
+        if not records:
+            return 0.0
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # the carry and the insert see the same last row
+        try:
+            last = conn.execute("SELECT cumulative_return FROM signals ORDER BY id DESC LIMIT 1").fetchone()
+            cumulative = (last[0] or 0.0) if last else 0.0
+            rows = []
+            for record in records:
+                cumulative += record[9] or 0.0
+                rows.append((*record, round(cumulative, 4)))
+            conn.executemany(f"INSERT INTO signals ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cumulative
+
+    def import_csv(self, csv_path=CSV_LOG, replace=False, chunk_rows=CHUNK_ROWS):
+        """Copy the CSV log into the store in file order (ids follow the rows), chunk by chunk."""
+        conn = self._connect()
+        if self.max_id() and not replace:
+            print(f"❌ {self.path} already holds signals; pass replace=True to import again.")
+            return 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM signals")
+            total = 0
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, dtype={"title": str, "description": str}):
+                chunk = chunk.reindex(columns=COLUMNS)
+                for column in ("confidence", "entry_price", "exit_price", "return_pct", "cumulative_return"):
+                    chunk[column] = pd.to_numeric(chunk[column], errors="coerce")
+                records = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+                conn.executemany(f"INSERT INTO signals ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                                 records)
+                total += len(chunk)
+            conn.execute("COMMIT")
+        except pd.errors.ParserError as e:
+            conn.execute("ROLLBACK")
+            print(f"❌ {csv_path} has malformed rows ({e}); run clean_live_signals_log.py first.")
+            return 0
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return total
+
+    # ---------------------- READS ----------------------
+
+    def read(self, columns=None, pairs=None, labels=None, start=None, end=None, after_id=None, upto_id=None):
+        """Rows in log order, filtered on the indexed columns; after_id/upto_id bound the id range."""
+        clauses, params = [], []
+        for column, values in (("pair", pairs), ("label", labels)):
+            if values is not None:
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})" if len(values) else "0")
+                params.extend(values)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(str(pd.Timestamp(start)))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(str(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)))
+        for op, value in ((">", after_id), ("<=", upto_id)):
+            if value is not None:
+                clauses.append(f"id {op} ?")
+                params.append(value)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        cols = ", ".join(columns or COLUMNS)
+        return pd.read_sql_query(f"SELECT {cols} FROM signals{where} ORDER BY id", self._connect(), params=params)
+
+    # ---------------------- BACKFILL ----------------------
+
+    def backfill(self, recompute=False, conf_thresh=CONF_THRESH, loader=None, ticker_map=None,
+                 chunk_rows=CHUNK_ROWS) -> dict:
+        """
+        backfill_engine.backfill for the store: the traded rows still missing
+        a price are selected through the (label, confidence) index, each
+        pair's closes are loaded once, and prices / returns are UPDATEd in
+        place. The cumulative return is then recomputed with one windowed
+        UPDATE from the first changed row on.
+        """
+        if loader is None:
+            from core.plot_returns import load_price_range as loader
+        if ticker_map is None:
+            from core.plot_returns import FX_TICKER_MAP as ticker_map
+
+        t0 = time.perf_counter()
+        conn = self._connect()
+        labels, pairs = list(DIRECTION), list(ticker_map)
+        where = (f"label IN ({','.join('?' * len(labels))}) AND confidence >= ? "
+                 f"AND pair IN ({','.join('?' * len(pairs))})")
+        params = [*labels, conf_thresh, *pairs]
+        if not recompute:
+            where += " AND (entry_price IS NULL OR exit_price IS NULL OR return_pct IS NULL)"
+
+        spans = conn.execute(f"SELECT pair, MIN(timestamp), MAX(timestamp), COUNT(*) FROM signals "
+                             f"WHERE {where} GROUP BY pair", params).fetchall()
+        stats = {"rows": self.max_id(), "candidates": sum(n for *_, n in spans), "updated": 0}
+        if not spans:
+            return stats
+        ranges = {pair: (parse_timestamps(pd.Series([lo]))[0], parse_timestamps(pd.Series([hi]))[0])
+                  for pair, lo, hi, _ in spans}
+        prices = load_closes(ranges, loader)
+
+        if recompute:
+            conn.execute("UPDATE signals SET return_pct = 0.0")
+        first_changed, last_id = None, 0
+        while True:
+            chunk = pd.read_sql_query(
+                f"SELECT id, timestamp, pair, label, entry_price, exit_price FROM signals "
+                f"WHERE {where} AND id > ? ORDER BY id LIMIT ?", conn, params=[*params, last_id, chunk_rows])
+            if chunk.empty:
+                break
+            last_id = int(chunk["id"].iloc[-1])
+            ts = parse_timestamps(chunk["timestamp"])
+            entry = chunk["entry_price"].to_numpy(dtype=float, copy=True)
+            exit_ = chunk["exit_price"].to_numpy(dtype=float, copy=True)
+            for pair, rows in chunk.groupby("pair").indices.items():
+                found_entry = asof_closes(prices.get(pair), ts.iloc[rows])
+                found_exit = asof_closes(prices.get(pair), ts.iloc[rows] + EXIT_DELAY)
+                take = np.isfinite(found_entry) & (recompute | np.isnan(entry[rows]))
+                entry[rows[take]] = found_entry[take]
+                take = np.isfinite(found_exit) & (recompute | np.isnan(exit_[rows]))
+                exit_[rows[take]] = found_exit[take]
+
+            direction = chunk["label"].str.lower().map(DIRECTION).to_numpy(dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ret = np.where(np.isfinite(entry) & np.isfinite(exit_) & (entry != 0),
+                               (exit_ - entry) / entry * direction * 100, 0.0)
+            updates = [(None if np.isnan(e) else round(float(e), 6), None if np.isnan(x) else round(float(x), 6),
+                        round(float(r), 4), int(i))
+                       for e, x, r, i in zip(entry, exit_, ret, chunk["id"])]
+            with conn:
+                conn.executemany("UPDATE signals SET entry_price = ?, exit_price = ?, return_pct = ? WHERE id = ?",
+                                 updates)
+            first_changed = int(chunk["id"].iloc[0]) if first_changed is None else first_changed
+            stats["updated"] += len(updates)
+
+        if first_changed is not None:
+            self._recompute_cumulative(1 if recompute else first_changed)
+        stats["seconds"] = round(time.perf_counter() - t0, 3)
+        return stats
+
+    def _recompute_cumulative(self, first_id):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            base = conn.execute("SELECT cumulative_return FROM signals WHERE id < ? ORDER BY id DESC LIMIT 1",
+                                (first_id,)).fetchone()
+            conn.execute(
+                "UPDATE signals SET cumulative_return = ROUND(c.cum, 4) FROM ("
+                "  SELECT id, ? + SUM(COALESCE(return_pct, 0)) OVER (ORDER BY id) AS cum FROM signals WHERE id >= ?"
+                ") AS c WHERE signals.id = c.id",
+                ((base[0] or 0.0) if base else 0.0, first_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import the CSV signal log into the SQLite signal store")
+    parser.add_argument("--csv", default=CSV_LOG)
+    parser.add_argument("--db", default=SIGNAL_DB)
+    parser.add_argument("--replace", action="store_true", help="drop the rows already in the store first")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    rows = SignalStore(args.db).import_csv(args.csv, replace=args.replace)
+    if rows:
+        print(f"✅ Imported {rows} signals from {args.csv} into {args.db} ({time.perf_counter() - t0:.1f}s)")
+        print(f"   Set LOG_BACKEND = \"sqlite\" in src/core/signal_store.py to log and read there.")
@@ -0,0 +1,336 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fcntl
+import glob
+import hashlib
+import io
+import json
+import shutil
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from core.backfill_engine import iter_blocks, read_header
+from core.news_archive import stream_articles
+
+DATA_ROOT = "data"
+PARQUET_ROOT = "data/parquet"
+MARKER_FILE = "_written_at"
+SYNC_FILE = "_synced_from.json"  # the CSV a dataset mirrors and how far it has been converted
+FINGERPRINT_BYTES = 4096
+
+_TS = pa.timestamp("us", tz="UTC")
+
+# dataset name → (schema, date column used for partitioning or None, legacy CSV)
+DATASETS = {
+    "raw_news": (pa.schema([
+        ("publishedAt", _TS), ("source", pa.string()), ("author", pa.string()),
+        ("title", pa.string()), ("description", pa.string()), ("url", pa.string()),
+        ("content", pa.string()),
+    ]), "publishedAt", None),
+    "cleaned_news": (pa.schema([
+        ("title", pa.string()), ("description", pa.string()), ("source", pa.string()),
+        ("publishedAt", _TS),
+    ]), "publishedAt", "data/cleaned_fx_news.csv"),
+    "labeled_news": (pa.schema([
+        ("title", pa.string()), ("description", pa.string()), ("source", pa.string()),
+        ("publishedAt", _TS), ("content_hash", pa.string()), ("label", pa.string()),
+        ("confidence", pa.float64()),
+    ]), "publishedAt", "data/labeled_fx_news.csv"),
+    "live_signals": (pa.schema([
+        ("timestamp", _TS), ("pair", pa.string()), ("title", pa.string()),
+        ("description", pa.string()), ("label", pa.string()), ("confidence", pa.float64()),
+        ("signal", pa.string()), ("entry_price", pa.float64()), ("exit_price", pa.float64()),
+        ("return_pct", pa.float64()), ("cumulative_return", pa.float64()),
+    ]), "timestamp", "data/live_signals_log.csv"),
+    "signals": (pa.schema([
+        ("pair", pa.string()), ("base_sentiment", pa.float64()), ("quote_sentiment", pa.float64()),
+        ("net_sentiment", pa.float64()), ("signal", pa.string()),
+    ]), None, "data/fx_sentiment_signals.csv"),
+    "signals_hourly": (pa.schema([
+        ("bucket", _TS), ("pair", pa.string()), ("base_sentiment", pa.float64()),
+        ("quote_sentiment", pa.float64()), ("net_sentiment", pa.float64()),
+        ("base_mentions", pa.int64()), ("quote_mentions", pa.int64()), ("signal", pa.string()),
+    ]), "bucket", "data/fx_sentiment_signals_hourly.csv"),
+    "backtest_results": (pa.schema([
+        ("timestamp", _TS), ("pair", pa.string()), ("signal", pa.string()),
+        ("entry_time", _TS), ("exit_time", _TS), ("entry_price", pa.float64()),
+        ("exit_price", pa.float64()), ("return_pct", pa.float64()), ("pnl", pa.float64()),
+    ]), None, "data/backtest_results.csv"),
+}
+
+
+def dataset_path(name, root=PARQUET_ROOT):
+    return os.path.join(root, name)
+
+
+def _spec(name):
+    if name not in DATASETS:
+        raise KeyError(f"Unknown dataset '{name}' — expected one of {sorted(DATASETS)}")
+    return DATASETS[name]
+
+
+def to_table(name, df: pd.DataFrame) -> pa.Table:
+    """Conform a frame to the dataset schema: reject unknown columns, add missing ones as nulls, cast types."""
+    schema, date_col, _ = _spec(name)
+    unknown = set(df.columns) - set(schema.names)
+    if unknown:
+        raise ValueError(f"Columns {sorted(unknown)} are not in the '{name}' schema")
+
+    df = df.copy()
+    for field in schema:
+        if field.name not in df:
+            df[field.name] = None
+        if pa.types.is_timestamp(field.type):
+            df[field.name] = pd.to_datetime(df[field.name], errors="coerce", utc=True, format="mixed")
+        elif pa.types.is_floating(field.type):
+            df[field.name] = pd.to_numeric(df[field.name], errors="coerce")
+        elif pa.types.is_integer(field.type):
+            df[field.name] = pd.to_numeric(df[field.name], errors="coerce").astype("Int64")
+        else:
+            df[field.name] = df[field.name].astype(object).where(df[field.name].notna(), None)
+            df[field.name] = df[field.name].map(lambda v: v if v is None else str(v))
+
+    table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+    if date_col:
+        dates = df[date_col].dt.strftime("%Y-%m-%d").fillna("unknown")
+        table = table.append_column("date", pa.array(dates.tolist(), pa.string()))
+    return table
+
+
+def write_dataset(name, df: pd.DataFrame, root=PARQUET_ROOT, mode="append"):
+    """
+    Write rows to a dataset. mode="append" adds new files to the touched
+    date partitions, "overwrite_partitions" replaces the touched partitions
+    and "overwrite" replaces the whole dataset.
+    """
+    _, date_col, _ = _spec(name)
+    path = dataset_path(name, root)
+    table = to_table(name, df)
+
+    if mode == "overwrite" and os.path.exists(path):
+        shutil.rmtree(path)
+
+    ds.write_dataset(
+        table, path, format="parquet",
+        partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive") if date_col else None,
+        basename_template=f"part-{int(time.time())}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+        existing_data_behavior="delete_matching" if mode == "overwrite_partitions" else "overwrite_or_ignore",
+    )
+    with open(os.path.join(path, MARKER_FILE), "w") as f:
+        f.write(str(time.time()))
+    return len(table)
+
+
+def read_dataset(name, columns=None, start=None, end=None, root=PARQUET_ROOT) -> pd.DataFrame:
+    """
+    Read a dataset, pushing the column selection and an optional [start, end]
+    date window down to Parquet so only matching partitions are opened.
+    """
+    schema, date_col, _ = _spec(name)
+    dataset = ds.dataset(
+        dataset_path(name, root), format="parquet",
+        partitioning="hive" if date_col else None,
+    )
+    expr = None
+    if date_col and start is not None:
+        expr = ds.field("date") >= pd.Timestamp(start).strftime("%Y-%m-%d")
+    if date_col and end is not None:
+        upper = ds.field("date") <= pd.Timestamp(end).strftime("%Y-%m-%d")
+        expr = upper if expr is None else expr & upper
+
+    cols = [c for c in (columns or schema.names) if c in schema.names]
+    df = dataset.to_table(columns=cols, filter=expr).to_pandas()
+    for field in schema:
+        if field.name in df and pa.types.is_timestamp(field.type):
+            df[field.name] = df[field.name].dt.tz_localize(None)  # naive UTC like the CSVs
+    return df
+
+
+def has_dataset(name, root=PARQUET_ROOT) -> bool:
+    return os.path.exists(os.path.join(dataset_path(name, root), MARKER_FILE))
+
+
+def _fingerprint(path, end):
+    """Hashes of the first and of the last FINGERPRINT_BYTES before byte offset end."""
+    with open(path, "rb") as f:
+        head = f.read(min(end, FINGERPRINT_BYTES))
+        f.seek(max(end - FINGERPRINT_BYTES, 0))
+        tail = f.read(end - max(end - FINGERPRINT_BYTES, 0))
+    return [hashlib.sha1(head).hexdigest(), hashlib.sha1(tail).hexdigest()]
+
+
+def _read_sync(name, root):
+    try:
+        with open(os.path.join(dataset_path(name, root), SYNC_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_sync(name, root, state):
+    path = os.path.join(dataset_path(name, root), SYNC_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _clear(name, root):
+    for entry in os.listdir(dataset_path(name, root)):
+        if entry.startswith("_sync"):
+            continue
+        full = os.path.join(dataset_path(name, root), entry)
+        if os.path.isdir(full):
+            shutil.rmtree(full)
+        else:
+            os.remove(full)
+
+
+def sync_dataset(name, csv_path=None, root=PARQUET_ROOT) -> int:
+    """
+    Bring a dataset up to date with the CSV its pipeline stage writes and
+    return the number of rows converted. Rows appended to the CSV since the
+    last sync are converted on their own and only the date partitions they
+    touch are rewritten (one file each, not one per append); a CSV that was
+    rewritten rather than appended to (new inode, shrunk, or changed
+    before the synced offset) is converted again in full.
+    """
+    csv_path = csv_path or _spec(name)[2]
+    if not csv_path or not os.path.exists(csv_path):
+        return 0
+    os.makedirs(dataset_path(name, root), exist_ok=True)
+    with open(os.path.join(dataset_path(name, root), "_sync.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # concurrent readers: one sync at a time
+        return _sync(name, csv_path, root)
+
+
+def _sync(name, csv_path, root):
+    schema, date_col, _ = _spec(name)
+    stat = os.stat(csv_path)
+    state = _read_sync(name, root) if has_dataset(name, root) else None
+    if state and [state["size"], state["mtime"], state["inode"]] == [stat.st_size, stat.st_mtime, stat.st_ino]:
+        return 0
+
+    columns, header_len = read_header(csv_path)
+    appended = (
+        state is not None and date_col is not None and state["inode"] == stat.st_ino
+        and state["columns"] == columns and header_len <= state["offset"] <= stat.st_size
+        and state["fingerprint"] == _fingerprint(csv_path, state["offset"])
+    )
+    start = state["offset"] if appended else header_len
+    data = b"".join(block for _, block in iter_blocks(csv_path, start, stop=stat.st_size))
+    end = start + len(data)  # a torn last row (a write in progress) waits for the next sync
+
+    rows = 0
+    if not appended:
+        _clear(name, root)  # converted again in full (the sync lock and state stay)
+        if not data:
+            return 0  # no rows: nothing to read from Parquet, read_table uses the CSV
+    if data:
+        df = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+        df = df[[c for c in df.columns if c in schema.names]]
+        if appended:
+            when = pd.to_datetime(df[date_col], errors="coerce", utc=True, format="mixed")
+            dates = sorted(set(when.dt.strftime("%Y-%m-%d").fillna("unknown")))
+            existing = ds.dataset(dataset_path(name, root), format="parquet", partitioning="hive").to_table(
+                columns=schema.names, filter=ds.field("date").isin(dates)).to_pandas()
+            df = pd.concat([existing, df], ignore_index=True) if len(existing) else df
+            rows = write_dataset(name, df, root, mode="overwrite_partitions") - len(existing)
+        else:
+            rows = write_dataset(name, df, root)
+
+    _write_sync(name, root, {
+        "csv": os.path.abspath(csv_path), "columns": columns, "offset": end,
+        "fingerprint": _fingerprint(csv_path, end),
+        "size": stat.st_size, "mtime": stat.st_mtime, "inode": stat.st_ino,
+    })
+    return rows
+
+
+def read_table(name, csv_path=None, columns=None, start=None, end=None, root=PARQUET_ROOT) -> pd.DataFrame:
+    """
+    Load a pipeline dataset from Parquet, first converting whatever its CSV
+    gained since the last read (sync_dataset). A CSV other than the one the
+    dataset mirrors is read directly, reading only the requested columns.
+    """
+    schema, date_col, legacy_csv = _spec(name)
+    csv_path = csv_path or legacy_csv
+    own_csv = bool(csv_path and legacy_csv) and os.path.abspath(csv_path) == os.path.abspath(legacy_csv)
+    if own_csv or not (csv_path and os.path.exists(csv_path)):
+        if own_csv:
+            sync_dataset(name, csv_path, root)
+        if has_dataset(name, root):
+            return read_dataset(name, columns, start, end, root)
+
+    usecols = (lambda c: c in columns) if columns else None
+    df = pd.read_csv(csv_path, usecols=usecols)
+    if date_col and date_col in df and (start is not None or end is not None):
+        when = pd.to_datetime(df[date_col], errors="coerce", utc=True, format="mixed").dt.tz_localize(None)
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= when >= pd.Timestamp(start).normalize()
+        if end is not None:
+            keep &= when < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+        df = df[keep]
+    return df
+
+
+def _raw_articles(data_root=DATA_ROOT):
+    for file in sorted(glob.glob(os.path.join(data_root, "raw_fx_news_*.json"))):
+        try:
+            with open(file) as f:
+                articles = json.load(f)
+        except json.JSONDecodeError:
+            print(f"⚠️ Skipping malformed JSON file: {file}")
+            continue
+        yield from articles
+    yield from stream_articles(root=os.path.join(data_root, "news_archive"))
+
+
+def _raw_news_frame(data_root=DATA_ROOT) -> pd.DataFrame:
+    rows = []
+    for article in _raw_articles(data_root):
+        rows.append({
+            "publishedAt": article.get("publishedAt"),
+            "source": (article.get("source") or {}).get("name"),
+            "author": article.get("author"),
+            "title": article.get("title"),
+            "description": article.get("description"),
+            "url": article.get("url"),
+            "content": article.get("content"),
+        })
+    return pd.DataFrame(rows)
+
+
+def migrate_csvs(data_root=DATA_ROOT, root=PARQUET_ROOT):
+    """
+    Convert the existing CSV/JSON files under data_root to Parquet datasets.
+    The CSV-backed ones are then kept in sync incrementally by read_table.
+    """
+    for name, (_, _, csv_path) in DATASETS.items():
+        if name == "raw_news":
+            df = _raw_news_frame(data_root)
+            if df.empty:
+                print(f"⚠️ {name}: nothing to migrate")
+                continue
+            rows = write_dataset(name, df, root, mode="overwrite")
+        else:
+            csv_path = os.path.join(data_root, os.path.relpath(csv_path, DATA_ROOT))
+            if not os.path.exists(csv_path):
+                continue
+            if os.path.exists(os.path.join(dataset_path(name, root), SYNC_FILE)):
+                os.remove(os.path.join(dataset_path(name, root), SYNC_FILE))  # convert in full
+            rows = sync_dataset(name, csv_path, root)
+            if not rows:
+                print(f"⚠️ {name}: nothing to migrate")
+                continue
+        print(f"✅ {name}: {rows} rows → {dataset_path(name, root)}")
+
+
+if __name__ == "__main__":
+    migrate_csvs()
@@ -1,16 +1,25 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import argparse
 import time
-import pandas as pd
+from collections import deque
 
 from core.data_pipeline import fetch_fx_news
-from nlp.clean_news import process_news_files
-from nlp.sentiment_labeler import label_sentiment
+from nlp.clean_news import clean_text, is_fx_related, process_news_files
+from nlp.label_store import LabelStore
+from nlp.news_ingest import NewsIngestor, append_rows
+from nlp.sentiment_labeler import MODEL_NAME, OUTPUT_FILE as LABELED_FILE, label_sentiment
+from nlp.inference_server import get_predictor
 from live.live_signal_generator import generate_trade_signal, log_signals
+from live.pipeline_runner import FixedRateScheduler, Pipeline, Stage
+from utils.text_hash import article_hash
 
 NEWS_LIMIT = 100
-LOOP_DELAY = 600  # 10 minutes
+LOOP_DELAY = 600  # 10 minutes between fetches
+LABEL_BATCH = 32
+LOG_BATCH = 64
+LABELED_COLUMNS = ["title", "description", "source", "publishedAt", "content_hash", "label", "confidence"]
 
 
 def run_pipeline_once():
@@ -21,10 +30,10 @@ def run_pipeline_once():
     process_news_files()
 
     print("🧠 Labeling sentiment with FinBERT...")
-    label_sentiment()
+    df = label_sentiment(predictor=get_predictor())  # only articles not labeled in a previous cycle
 
     print("📈 Generating trade signals...")
-    df = pd.read_csv("data/labeled_fx_news.csv").tail(NEWS_LIMIT)
+    df = df.tail(NEWS_LIMIT)
     all_signals = []
 
     for _, row in df.iterrows():
@@ -40,12 +49,116 @@ def run_pipeline_once():
         print("⚠️ No signals generated.\n")
 
 
+# ---------------------- STREAMING PIPELINE ----------------------
+#
+# fetch → clean → label → signal → log run as concurrent stages joined by
+# bounded queues, so a headline is cleaned, labeled and logged as soon as its
+# fetch returns instead of after a CSV round trip per step. Items carry the
+# perf_counter time they were fetched to measure headline-to-signal latency.
+
+class LivePipeline:
+    def __init__(self, predictor=None):
+        self.predictor = predictor or get_predictor()
+        self.ingestor = NewsIngestor("live_pipeline")  # only ever sees articles pushed in memory
+        self.store = LabelStore(model=MODEL_NAME)
+        self.latencies = deque(maxlen=1000)
+        self.pipeline = Pipeline([
+            Stage("fetch", self.fetch, queue_size=1),
+            Stage("clean", self.clean, batch_size=256, max_wait=0.05),
+            Stage("label", self.label, batch_size=LABEL_BATCH, max_wait=0.25),
+            Stage("signal", self.signal),
+            Stage("log", self.log, batch_size=LOG_BATCH, max_wait=0.25),
+        ])
+
+    def fetch(self, _tick):
+        fetched_at = time.perf_counter()
+        return [(article, fetched_at) for article in fetch_fx_news() or []]
+
+    def clean(self, batch):
+        fetched_at = {id(a): t for a, t in batch}
+        rows = []
+        for article in self.ingestor.unseen([a for a, _ in batch]):
+            title = clean_text(article.get("title", ""))
+            description = clean_text(article.get("description", ""))
+            if is_fx_related(f"{title} {description}"):
+                rows.append({
+                    "title": title,
+                    "description": description,
+                    "source": (article.get("source") or {}).get("name", ""),
+                    "publishedAt": article.get("publishedAt", ""),
+                    "content_hash": article_hash(title, description),
+                    "_fetched_at": fetched_at[id(article)],
+                })
+        self.ingestor.commit()
+        return rows
+
+    def label(self, rows):
+        todo = [r for r in rows if self.store.get(r["content_hash"]) is None]
+        if todo:
+            labels, confidences = self.predictor([r["title"] + " " + r["description"] for r in todo])
+            # failed batches come back as neutral/0.0 and must not be reused later
+            ok = [i for i, c in enumerate(confidences) if c > 0]
+            self.store.add_many([todo[i]["content_hash"] for i in ok], [labels[i] for i in ok],
+                                [confidences[i] for i in ok])
+            fresh = {r["content_hash"]: (l, c) for r, l, c in zip(todo, labels, confidences)}
+        else:
+            fresh = {}
+        for r in rows:
+            r["label"], r["confidence"] = self.store.get(r["content_hash"]) or fresh[r["content_hash"]]
+        failed = sum(r["confidence"] <= 0 for r in rows)
+        if failed:  # not written, so label_sentiment finds them missing and retries them
+            print(f"⚠️ {failed} article(s) from failed batches left unlabeled")
+            rows = [r for r in rows if r["confidence"] > 0]
+        append_rows([{c: r[c] for c in LABELED_COLUMNS} for r in rows], LABELED_FILE, LABELED_COLUMNS)
+        return rows
+
+    def signal(self, row):
+        signals = generate_trade_signal(row["title"], row["description"])
+        for sig in signals:
+            sig["_fetched_at"] = row["_fetched_at"]
+        return signals
+
+    def log(self, signals):
+        log_signals(signals)
+        now = time.perf_counter()
+        self.latencies.extend(now - sig["_fetched_at"] for sig in signals)
+        return ()
+
+    def tick(self):
+        if not self.pipeline.submit("tick", block=False):
+            print("⚠️ Previous fetch still queued — skipping this tick")
+            return
+        lat = sorted(self.latencies)
+        if lat:
+            print(f"⏱️ Headline-to-log latency p50={lat[len(lat) // 2]:.2f}s "
+                  f"p95={lat[int(len(lat) * 0.95)]:.2f}s over {len(lat)} signal(s)")
+        self.pipeline.report()
+
+    def run(self, interval=LOOP_DELAY):
+        self.pipeline.start()
+        scheduler = FixedRateScheduler(interval, self.tick)
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            scheduler.stop()
+        finally:
+            self.pipeline.stop()
+            self.pipeline.report()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live FX sentiment signal loop")
+    parser.add_argument("--interval", type=int, default=LOOP_DELAY, help="seconds between news fetches")
+    parser.add_argument("--batch", action="store_true", help="run the serial CSV-based pipeline once per interval")
+    args = parser.parse_args()
+
     print("🚀 Auto loop started (CTRL+C to stop)")
-    try:
-        while True:
-            run_pipeline_once()
-            print(f"⏳ Sleeping for {LOOP_DELAY // 60} minutes...\n")
-            time.sleep(LOOP_DELAY)
-    except KeyboardInterrupt:
-        print("🛑 Auto loop manually stopped.")
+    if args.batch:
+        scheduler = FixedRateScheduler(args.interval, run_pipeline_once)
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            scheduler.stop()
+    else:
+        LivePipeline().run(args.interval)
+    print("🛑 Auto loop manually stopped.")
@@ -1,11 +1,30 @@
 import csv
+import io
+import json
 import os
 from datetime import datetime, timedelta
+from functools import lru_cache
 
-from core.plot_returns import fx_pair_to_yf, fetch_price_from_yahoo, get_cached_price, cache_price
+import numpy as np
+
+from core.backfill_engine import log_lock
+from core.bar_store import EXIT_HORIZON, BarStore
+from core.plot_returns import fx_pair_to_yf, get_prices
+from core.signal_store import LOG_BACKEND, SignalStore
+from nlp.keyword_matcher import scan
 
 LOG_FILE = "data/live_signals_log.csv"
+STATE_FILE = "data/live_signals_log.state.json"
 CONF_THRESH = 0.75
+BARS = BarStore()  # intraday bars, when data/bars has a file for the pair
+STORE = SignalStore()  # used instead of LOG_FILE when LOG_BACKEND == "sqlite"
+
+LOG_COLUMNS = [
+    "timestamp", "pair", "title", "description",
+    "label", "confidence", "signal",
+    "entry_price", "exit_price",
+    "return_pct", "cumulative_return"
+]
 
 # Ensure data folder exists
 os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
@@ -15,80 +34,158 @@ def initialize_log():
     if not os.path.isfile(LOG_FILE):
         with open(LOG_FILE, "w", newline="") as f:
             writer = csv.writer(f)
-            writer.writerow([
-                "timestamp", "pair", "title", "description",
-                "label", "confidence", "signal",
-                "entry_price", "exit_price",
-                "return_pct", "cumulative_return"
-            ])
+            writer.writerow(LOG_COLUMNS)
+
+# ---------------------- LOG CHECKPOINT ----------------------
+#
+# The sidecar STATE_FILE records the log's byte size after the last fully
+# written batch together with the running totals at that point. Appending a
+# batch therefore never reads the log: state is trusted when the sizes match,
+# and after a crash or an external rewrite only the bytes past the
+# checkpoint (or, if the file shrank, the whole file) are re-scanned.
+
+def _empty_state():
+    return {"size": 0, "row_count": 0, "cumulative_return": 0.0, "last_timestamp": None}
+
+def _read_state():
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_state(state):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, STATE_FILE)  # atomic: readers see the old or the new checkpoint
+
+def _scan_rows(state, start):
+    """Advance state over the complete rows stored after byte offset start; drop a torn last line."""
+    with open(LOG_FILE, "rb+") as f:
+        f.seek(start)
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            data = data[:data.rfind(b"\n") + 1]  # partial row from an interrupted write
+            f.truncate(start + len(data))
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+    if start == 0 and rows:
+        rows = rows[1:]  # header
+
+    cum_idx = LOG_COLUMNS.index("cumulative_return")
+    for row in rows:
+        if len(row) != len(LOG_COLUMNS):
+            continue
+        state["row_count"] += 1
+        state["last_timestamp"] = row[0]
+        try:
+            state["cumulative_return"] = float(row[cum_idx])
+        except ValueError:
+            pass
+    state["size"] = start + len(data)
+    state["inode"] = os.stat(LOG_FILE).st_ino
+    return state
+
+def load_log_state():
+    """Running totals of the live log (cumulative return, row count, last timestamp)."""
+    initialize_log()
+    stat = os.stat(LOG_FILE)
+    size = stat.st_size
+    state = _read_state()
+    if state and state.get("inode", stat.st_ino) != stat.st_ino:
+        state = None  # replaced by an atomic rewrite (backfill, cleaning): offsets no longer apply
+    if state and state.get("size") == size:
+        return state
+    if state and state.get("size", 0) < size:
+        return _scan_rows(state, state["size"])  # rows appended after the last checkpoint
+    return _scan_rows(_empty_state(), 0)  # log rewritten or no checkpoint yet
 
 def log_signals(signals):
     """
     signals: iterable of dicts with keys
     ['timestamp','pair','title','description','label','confidence','signal']
     """
-    initialize_log()
-    cumulative = 0.0
+    # 1) Quality filter
+    kept = [
+        sig for sig in signals
+        if float(sig["confidence"]) >= CONF_THRESH
+        and sig["label"].lower() != "neutral"
+        and fx_pair_to_yf(sig["pair"])
+    ]
+    if not kept:
+        if LOG_BACKEND == "csv":
+            with log_lock(LOG_FILE):
+                state = load_log_state()
+                if state.get("size") != (_read_state() or {}).get("size"):
+                    _write_state(state)
+        return
+
+    # 2) + 3) Entry at the first intraday bar after the headline and exit
+    # EXIT_HORIZON later; pairs without bars fall back to daily closes
+    # (signal day and 1 day later). One batched lookup each.
+    pairs = [sig["pair"] for sig in kept]
+    stamps = [sig["timestamp"] for sig in kept]
+    entries, exits = BARS.entry_exit(pairs, stamps, EXIT_HORIZON)
+    daily = np.flatnonzero(np.isnan(entries))
+    if len(daily):
+        entries[daily] = get_prices([pairs[i] for i in daily], [stamps[i] for i in daily])
+        exits[daily] = get_prices([pairs[i] for i in daily], [stamps[i] + timedelta(days=1) for i in daily])
+
+    records = []
+    for sig, entry, exit_p in zip(kept, entries, exits):
+        lbl = sig["label"].lower()
+        entry = None if entry != entry else float(entry)  # NaN → None
+        exit_p = None if exit_p != exit_p else float(exit_p)
+
+        # 4) Compute return_pct
+        if entry and exit_p and entry != 0:
+            raw_ret = (exit_p - entry) / entry
+            ret_pct = raw_ret * 100 if lbl == "positive" else -raw_ret * 100
+        else:
+            ret_pct = 0.0
+        records.append((sig["timestamp"], sig["pair"], sig["title"], sig["description"],
+                        sig["label"], sig["confidence"], sig["signal"], entry, exit_p, ret_pct))
+
+    if LOG_BACKEND == "sqlite":
+        # 5) + 6) one transaction per batch; the store continues the cumulative return
+        STORE.append([(str(r[0]), *r[1:5], float(r[5]), r[6],
+                       None if r[7] is None else round(r[7], 6),
+                       None if r[8] is None else round(r[8], 6), round(r[9], 4)) for r in records])
+        return
+
+    # a backfill or in-place clean swaps the log only while holding the same lock
+    with log_lock(LOG_FILE):
+        state = load_log_state()
+        cumulative = state["cumulative_return"]
+        with open(LOG_FILE, "a", newline="") as f:
+            writer = csv.writer(f)
 
-    try:
-        with open(LOG_FILE, newline="") as f:
-            reader = list(csv.DictReader(f))
-            if reader:
-                cumulative = float(reader[-1]["cumulative_return"])
-    except Exception:
-        pass
-
-    with open(LOG_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-
-        for sig in signals:
-            ts = sig["timestamp"]
-            pair = sig["pair"]
-            lbl = sig["label"].lower()
-            conf = float(sig["confidence"])
-
-            # 1) Quality filter
-            if conf < CONF_THRESH or lbl == "neutral":
-                continue
-
-            ticker = fx_pair_to_yf(pair)
-            if not ticker:
-                continue
-
-            # 2) Fetch entry price
-            entry = get_cached_price(pair, ts)
-            if entry is None:
-                entry = fetch_price_from_yahoo(ticker, ts)
-                if entry is not None:
-                    cache_price(pair, ts, entry)
-
-            # 3) Fetch exit price (1 day later)
-            exit_ts = ts + timedelta(days=1)
-            exit_p = get_cached_price(pair, exit_ts)
-            if exit_p is None:
-                exit_p = fetch_price_from_yahoo(ticker, exit_ts)
-                if exit_p is not None:
-                    cache_price(pair, exit_ts, exit_p)
-
-            # 4) Compute return_pct
-            if entry and exit_p and entry != 0:
-                raw_ret = (exit_p - entry) / entry
-                ret_pct = raw_ret * 100 if lbl == "positive" else -raw_ret * 100
-            else:
-                ret_pct = 0.0
-
-            # 5) Update cumulative
-            cumulative += ret_pct
-
-            # 6) Write row
-            writer.writerow([
-                ts, pair, sig["title"], sig["description"],
-                sig["label"], sig["confidence"], sig["signal"],
-                f"{entry:.6f}" if entry else "",
-                f"{exit_p:.6f}" if exit_p else "",
-                f"{ret_pct:.4f}",
-                f"{cumulative:.4f}",
-            ])
+            for ts, pair, title, description, label, confidence, signal, entry, exit_p, ret_pct in records:
+                # 5) Update cumulative
+                cumulative += ret_pct
+
+                # 6) Write row
+                writer.writerow([
+                    ts, pair, title, description,
+                    label, confidence, signal,
+                    f"{entry:.6f}" if entry else "",
+                    f"{exit_p:.6f}" if exit_p else "",
+                    f"{ret_pct:.4f}",
+                    f"{cumulative:.4f}",
+                ])
+                state["row_count"] += 1
+                state["last_timestamp"] = str(ts)
+
+            # one fsync per batch, then checkpoint: a crash in between is repaired by load_log_state
+            f.flush()
+            os.fsync(f.fileno())
+            stat = os.fstat(f.fileno())
+            state["size"], state["inode"] = stat.st_size, stat.st_ino
+
+        state["cumulative_return"] = round(cumulative, 4)
+        _write_state(state)
 
 # ---------------------- SIGNAL GENERATION ----------------------
 
@@ -102,37 +199,35 @@ CURRENCY_PAIRS = {
     "NZD/USD": ("nzd", "usd")
 }
 
+@lru_cache(maxsize=None)
+def pairs_for(codes):
+    """Traded pairs with either currency among the matched codes (a frozenset from scan)."""
+    return tuple(pair for pair, (base, quote) in CURRENCY_PAIRS.items() if base in codes or quote in codes)
+
 def generate_trade_signal(title, description):
     """
     Generate trade signal(s) from article text.
     Returns a list of signal dicts for each pair mentioned.
     """
-    text = (str(title or "") + " " + str(description or "")).lower()
+    hits = scan(str(title or "") + " " + str(description or ""))  # one pass over the text
     signals = []
 
-    for pair, (base, quote) in CURRENCY_PAIRS.items():
-        if base in text or quote in text:
-            label = "neutral"
-            confidence = 0.0
-            signal = "NEUTRAL"
-
-            if any(word in text for word in ["rally", "bullish", "optimism", "gain", "surge", "strong", "hawkish"]):
-                label = "positive"
-                confidence = 0.85
-                signal = "LONG"
-            elif any(word in text for word in ["fall", "bearish", "drop", "decline", "recession", "weak", "dovish"]):
-                label = "negative"
-                confidence = 0.85
-                signal = "SHORT"
-
-            signals.append({
-                "timestamp": datetime.utcnow(),
-                "pair": pair,
-                "title": title,
-                "description": description,
-                "label": label,
-                "confidence": confidence,
-                "signal": signal
-            })
+    if hits["bullish"]:
+        label, confidence, signal = "positive", 0.85, "LONG"
+    elif hits["bearish"]:
+        label, confidence, signal = "negative", 0.85, "SHORT"
+    else:
+        label, confidence, signal = "neutral", 0.0, "NEUTRAL"
+
+    for pair in pairs_for(hits["currency"]):
+        signals.append({
+            "timestamp": datetime.utcnow(),
+            "pair": pair,
+            "title": title,
+            "description": description,
+            "label": label,
+            "confidence": confidence,
+            "signal": signal
+        })
 
     return signals
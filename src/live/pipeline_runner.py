@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import deque
+from queue import Empty, Full, Queue
+
+QUEUE_SIZE = 256     # items buffered between two stages before the producer blocks
+LATENCY_WINDOW = 1000
+
+_STOP = object()
+
+
+class StageMetrics:
+    """Counters and a rolling latency window for one stage (thread-safe)."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self.items_in = 0
+        self.items_out = 0
+        self.calls = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0  # time spent waiting on a full downstream queue
+        self._latencies = deque(maxlen=window)
+        self._started = time.perf_counter()
+
+    def record(self, n_in, n_out, seconds, blocked):
+        with self._lock:
+            self.calls += 1
+            self.items_in += n_in
+            self.items_out += n_out
+            self.busy += seconds
+            self.blocked += blocked
+            self._latencies.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            lat = sorted(self._latencies)
+            elapsed = time.perf_counter() - self._started
+            return {
+                "in": self.items_in,
+                "out": self.items_out,
+                "errors": self.errors,
+                "per_sec": round(self.items_in / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(lat[len(lat) // 2] * 1000, 1) if lat else None,
+                "p95_ms": round(lat[int(len(lat) * 0.95)] * 1000, 1) if lat else None,
+                "busy_s": round(self.busy, 2),
+                "blocked_s": round(self.blocked, 2),
+            }
+
+
+class Stage:
+    """
+    One pipeline step run by `workers` threads. fn takes an item (or a list of
+    up to batch_size items gathered within max_wait seconds when batch_size > 1)
+    and returns an iterable of outputs for the next stage, or None.
+    """
+
+    def __init__(self, name, fn, workers=1, batch_size=1, max_wait=0.05, queue_size=QUEUE_SIZE):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.inbox = Queue(maxsize=queue_size)
+        self.outbox = None
+        self.metrics = StageMetrics()
+        self._threads = []
+
+    def _take(self):
+        """Next item, or a batch of items; _STOP when the stage is shut down."""
+        item = self.inbox.get()
+        if item is _STOP or self.batch_size <= 1:
+            return item
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.inbox.get(timeout=remaining)
+            except Empty:
+                break
+            if item is _STOP:
+                self.inbox.put(_STOP)  # let this worker finish the batch, then stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            item = self._take()
+            if item is _STOP:
+                self.inbox.put(_STOP)  # wake the next worker of this stage
+                return
+            n_in = len(item) if self.batch_size > 1 else 1
+            start = time.perf_counter()
+            try:
+                outputs = list(self.fn(item) or ())
+            except Exception as e:
+                with self.metrics._lock:
+                    self.metrics.errors += 1
+                print(f"❌ Stage '{self.name}' failed on {n_in} item(s): {e}")
+                outputs = []
+            took = time.perf_counter() - start
+
+            blocked = 0.0
+            if self.outbox is not None:
+                for out in outputs:
+                    try:
+                        self.outbox.put_nowait(out)
+                    except Full:  # backpressure: wait for the downstream stage
+                        t = time.perf_counter()
+                        self.outbox.put(out)
+                        blocked += time.perf_counter() - t
+            self.metrics.record(n_in, len(outputs), took, blocked)
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def join(self, timeout=None):
+        for t in self._threads:
+            t.join(timeout)
+
+
+class Pipeline:
+    """Stages connected by bounded queues; submit() feeds the first stage and blocks when it is full."""
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        for upstream, downstream in zip(self.stages, self.stages[1:]):
+            upstream.outbox = downstream.inbox
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def submit(self, item, block=True):
+        """Feed the first stage; with block=False returns False instead of waiting when it is full."""
+        try:
+            self.stages[0].inbox.put(item, block=block)
+        except Full:
+            return False
+        return True
+
+    def stop(self, timeout=30):
+        """Drain: stop each stage only after everything upstream of it has finished."""
+        for stage in self.stages:
+            stage.inbox.put(_STOP)
+            stage.join(timeout)
+
+    def metrics(self):
+        return {
+            stage.name: {**stage.metrics.snapshot(), "queued": stage.inbox.qsize()}
+            for stage in self.stages
+        }
+
+    def report(self):
+        for name, m in self.metrics().items():
+            print(f"   {name:<8} in={m['in']:<6} out={m['out']:<6} queued={m['queued']:<4} "
+                  f"{m['per_sec']}/s p50={m['p50_ms']}ms p95={m['p95_ms']}ms "
+                  f"blocked={m['blocked_s']}s errors={m['errors']}")
+
+
+class FixedRateScheduler:
+    """
+    Runs fn every `interval` seconds on a fixed grid (start + k * interval)
+    so run time does not accumulate as drift; ticks missed while fn overran
+    are skipped rather than run back to back.
+    """
+
+    def __init__(self, interval, fn):
+        self.interval = interval
+        self.fn = fn
+        self.ticks = 0
+        self.skipped = 0
+        self._stop = threading.Event()
+
+    def run(self):
+        start = time.monotonic()
+        k = 0
+        while not self._stop.is_set():
+            self.fn()
+            self.ticks += 1
+            now = time.monotonic()
+            next_k = max(k + 1, int((now - start) // self.interval) + 1)
+            self.skipped += next_k - k - 1
+            k = next_k
+            self._stop.wait(max(0.0, start + k * self.interval - time.monotonic()))
+
+    def stop(self):
+        self._stop.set()
@@ -1,49 +1,53 @@
-import os
-import json
-import pandas as pd
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import re
 
+from nlp.keyword_matcher import scan
+from nlp.news_ingest import NewsIngestor, append_rows
+
 RAW_DATA_DIR = "data/"
 CLEANED_FILE = "data/cleaned_fx_news.csv"
 
-FX_KEYWORDS = [
-    "forex", "currency", "central bank", "rate hike", "rate cut", "inflation", "interest rate",
-    "dollar", "euro", "yen", "pound", "usd", "eur", "jpy", "gbp", "market", "bond", "fed", "ecb", "boj", "boe"
-]
-
 def clean_text(text):
     if not text:
         return ""
-    text = re.sub(r"http\\S+", "", text)
-    text = re.sub(r"[^a-zA-Z\\s]", "", text)
+    text = re.sub(r"http\S+", "", text)
+    text = re.sub(r"[^a-zA-Z\s]", " ", text)  # "EUR/USD" → "eur usd", keeping word boundaries
+    text = re.sub(r"\s+", " ", text)
     text = text.lower().strip()
     return text
 
 def is_fx_related(text):
-    text = text.lower()
-    return any(keyword in text for keyword in FX_KEYWORDS)
+    return bool(scan(text)["fx"])
+
+CLEANED_COLUMNS = ["title", "description", "source", "publishedAt"]
 
 def process_news_files():
+    """Clean and append only articles from raw files not processed before, each article once."""
+    ingestor = NewsIngestor("cleaned_news", raw_dir=RAW_DATA_DIR)
+    if not os.path.exists(CLEANED_FILE) and not ingestor.is_first_run:
+        ingestor.reset()  # output was removed: rebuild it from every raw file
+    rebuild = ingestor.is_first_run
+
     cleaned_rows = []
-    for filename in os.listdir(RAW_DATA_DIR):
-        if filename.startswith("raw_fx_news") and filename.endswith(".json"):
-            with open(os.path.join(RAW_DATA_DIR, filename), "r") as f:
-                articles = json.load(f)
-                for article in articles:
-                    title = clean_text(article.get("title", ""))
-                    description = clean_text(article.get("description", ""))
-                    combined = f"{title} {description}"
-                    if is_fx_related(combined):
-                        cleaned_rows.append({
-                            "title": title,
-                            "description": description,
-                            "source": article.get("source", {}).get("name", ""),
-                            "publishedAt": article.get("publishedAt", "")
-                        })
-
-    df = pd.DataFrame(cleaned_rows)
-    df.to_csv(CLEANED_FILE, index=False)
-    print(f"✅ Saved filtered FX data to {CLEANED_FILE} — {len(df)} entries")
+    for article in ingestor.new_articles():
+        title = clean_text(article.get("title", ""))
+        description = clean_text(article.get("description", ""))
+        combined = f"{title} {description}"
+        if is_fx_related(combined):
+            cleaned_rows.append({
+                "title": title,
+                "description": description,
+                "source": (article.get("source") or {}).get("name", ""),
+                "publishedAt": article.get("publishedAt", "")
+            })
+
+    added = append_rows(cleaned_rows, CLEANED_FILE, CLEANED_COLUMNS, overwrite=rebuild)
+    ingestor.commit()
+    stats = ingestor.stats
+    print(f"✅ Appended {added} new FX entries to {CLEANED_FILE} "
+          f"({stats['files']} new file(s), {stats['duplicates']} duplicate article(s) skipped)")
 
 if __name__ == "__main__":
     process_news_files()
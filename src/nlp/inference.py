@@ -1,9 +1,14 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import pandas as pd
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import os
+
+from nlp.near_dedup import predict_collapsed
 
 INPUT_FILE = "data/raw_news.csv"
 OUTPUT_FILE = "data/labeled_fx_news.csv"
+NEAR_DEDUP = True  # score one canonical per group of near-duplicate headlines
 
 def classify_sentiment(score, threshold=0.05):
     if score >= threshold:
@@ -13,7 +18,13 @@ def classify_sentiment(score, threshold=0.05):
     else:
         return "neutral"
 
-def run_sentiment_analysis():
+def vader_predict(texts, analyzer=None):
+    """(labels, compound scores) for a list of texts."""
+    analyzer = analyzer or SentimentIntensityAnalyzer()
+    scores = [analyzer.polarity_scores(text)["compound"] for text in texts]
+    return [classify_sentiment(score) for score in scores], scores
+
+def run_sentiment_analysis(near_dedup=NEAR_DEDUP):
     if not os.path.exists(INPUT_FILE):
         print(f"❌ Input file not found: {INPUT_FILE}")
         return
@@ -25,23 +36,19 @@ def run_sentiment_analysis():
         print(f"❌ Input file must contain {required_cols}")
         return
 
-    analyzer = SentimentIntensityAnalyzer()
-
-    results = []
-    for _, row in df.iterrows():
-        text = (str(row["title"]) + " " + str(row["description"])).strip()
-        score = analyzer.polarity_scores(text)["compound"]
-        label = classify_sentiment(score)
-
-        results.append({
-            "timestamp": row["timestamp"],
-            "title": row["title"],
-            "description": row["description"],
-            "compound": score,
-            "label": label
-        })
-
-    output_df = pd.DataFrame(results)
+    texts = (df["title"].astype(str) + " " + df["description"].astype(str)).str.strip().tolist()
+    if near_dedup:
+        labels, scores, _ = predict_collapsed(texts, vader_predict, df["timestamp"])
+    else:
+        labels, scores = vader_predict(texts)
+
+    output_df = pd.DataFrame({
+        "timestamp": df["timestamp"],
+        "title": df["title"],
+        "description": df["description"],
+        "compound": scores,
+        "label": labels
+    })
     output_df.to_csv(OUTPUT_FILE, index=False)
     print(f"✅ Labeled FX news saved to {OUTPUT_FILE}")
     print(output_df.head())
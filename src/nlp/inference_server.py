@@ -0,0 +1,251 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+SOCKET_PATH = "data/finbert.sock"
+TOKEN_BUDGET = 8192   # padded tokens per batch (batch size × longest item)
+MAX_WAIT = 0.02       # seconds to keep collecting after the first request arrives
+MAX_BATCH = 64
+
+
+class _Request:
+    __slots__ = ("item", "tokens", "future")
+
+    def __init__(self, item, tokens):
+        self.item = item
+        self.tokens = tokens
+        self.future = Future()
+
+
+class InferenceServer:
+    """
+    Long-lived FinBERT worker shared by every caller in the process.
+
+    Texts submitted from any thread are queued and a single worker thread
+    groups them into dynamic batches: a batch closes when its padded size
+    (items × longest item, in tokens) would exceed token_budget, when it
+    holds max_batch items, or max_wait seconds after its first item.
+
+    With encode(text) -> token ids, texts are tokenized once on the caller's
+    thread and predict_fn receives the ids; without it predict_fn receives
+    the texts and their length is estimated from whitespace.
+    """
+
+    def __init__(self, predict_fn=None, encode=None,
+                 token_budget=TOKEN_BUDGET, max_wait=MAX_WAIT, max_batch=MAX_BATCH):
+        self._predict_fn = predict_fn
+        self._encode = encode
+        self.token_budget = token_budget
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._pending = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                if self._predict_fn is None:
+                    # FinBERT is loaded lazily by sentiment_labeler and stays resident
+                    from nlp import sentiment_labeler
+                    self._predict_fn = sentiment_labeler.predict_encoded
+                    self._encode = sentiment_labeler.encode
+                self._thread = threading.Thread(target=self._run, name="finbert-server", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, text) -> Future:
+        self.start()
+        if self._encode is not None:
+            ids = self._encode(text)
+            request = _Request(ids, len(ids))
+        else:
+            request = _Request(text, len(text.split()))
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, texts):
+        """(labels, confidences) for texts; items whose batch failed come back neutral/0.0."""
+        futures = [self.submit(text) for text in texts]
+        labels, confidences = [], []
+        for future in futures:
+            try:
+                label, confidence = future.result()
+            except Exception:
+                label, confidence = "neutral", 0.0
+            labels.append(label)
+            confidences.append(confidence)
+        return labels, confidences
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": self.items / self.batches if self.batches else 0.0,
+        }
+
+    def _next(self, timeout=None):
+        if self._pending is not None:
+            item, self._pending = self._pending, None
+            return item
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self):
+        first = self._next()
+        if first is None:
+            return None
+        batch, longest = [first], first.tokens
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._next(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # finish this batch, then shut down
+                break
+            if (len(batch) + 1) * max(longest, item.tokens) > self.token_budget:
+                self._pending = item
+                break
+            batch.append(item)
+            longest = max(longest, item.tokens)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                labels, confidences = self._predict_fn([r.item for r in batch])
+            except Exception as e:
+                print(f"⚠️ Inference batch of {len(batch)} failed: {e}")
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for r, label, confidence in zip(batch, labels, confidences):
+                r.future.set_result((label, round(float(confidence), 4)))
+
+
+# ---------------------- UNIX SOCKET ----------------------
+
+class _Handler(socketserver.StreamRequestHandler):
+    # one JSON object per line: {"texts": [...]} → {"labels": [...], "confidences": [...]}
+    def handle(self):
+        for line in self.rfile:
+            try:
+                texts = json.loads(line)["texts"]
+                labels, confidences = self.server.inference.predict(texts)
+                reply = {"labels": labels, "confidences": confidences}
+            except Exception as e:
+                reply = {"error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+
+class _SocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_unix(path=SOCKET_PATH, server=None):
+    """Expose an InferenceServer on a Unix socket until interrupted."""
+    inference = (server or get_server()).start()
+    if inference._predict_fn.__module__ == "nlp.sentiment_labeler":
+        from nlp.sentiment_labeler import warmup
+        warmup()  # pay model load before accepting clients
+    if os.path.exists(path):
+        os.remove(path)
+    with _SocketServer(path, _Handler) as srv:
+        srv.inference = inference
+        print(f"🧠 FinBERT server listening on {path}")
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            print("🛑 FinBERT server stopped.")
+        finally:
+            os.remove(path)
+
+
+class UnixSocketClient:
+    """Client for serve_unix; same predict(texts) interface as InferenceServer."""
+
+    def __init__(self, path=SOCKET_PATH):
+        self.path = path
+        self._sock = None
+        self._file = None
+
+    def predict(self, texts):
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(self.path)
+            self._file = self._sock.makefile("rwb")
+        self._file.write((json.dumps({"texts": list(texts)}) + "\n").encode("utf-8"))
+        self._file.flush()
+        reply = json.loads(self._file.readline())
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply["labels"], reply["confidences"]
+
+
+# ---------------------- SHARED ACCESS ----------------------
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_server() -> InferenceServer:
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = InferenceServer()
+        return _server
+
+
+def get_predictor(socket_path=SOCKET_PATH):
+    """predict(texts) from a running socket server if there is one, else the in-process server."""
+    if os.path.exists(socket_path):
+        try:
+            client = UnixSocketClient(socket_path)
+            client.predict([])
+            return client.predict
+        except (OSError, ValueError, KeyError, RuntimeError):  # refused, garbled or an error reply
+            print(f"⚠️ FinBERT socket {socket_path} not responding — using in-process model")
+    return get_server().predict
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident FinBERT inference server")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET)
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT)
+    parser.add_argument("--threads", type=int, help="torch intra-op threads")
+    parser.add_argument("--max-length", type=int, help="token cap per text")
+    parser.add_argument("--quantize", action="store_true", help="dynamic int8 quantization of Linear layers")
+    args = parser.parse_args()
+
+    if args.threads or args.max_length or args.quantize:
+        from nlp.sentiment_labeler import configure_cpu
+        configure_cpu(num_threads=args.threads, max_length=args.max_length, quantize=args.quantize)
+    serve_unix(args.socket, InferenceServer(token_budget=args.token_budget, max_wait=args.max_wait))
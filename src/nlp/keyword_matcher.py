@@ -0,0 +1,146 @@
+import re
+from functools import reduce
+from itertools import repeat
+from operator import or_
+
+# FX relevance keywords used by clean_news.is_fx_related
+FX_KEYWORDS = [
+    "forex", "currency", "central bank", "rate hike", "rate cut", "inflation", "interest rate",
+    "dollar", "euro", "yen", "pound", "usd", "eur", "jpy", "gbp", "market", "bond", "fed", "ecb", "boj", "boe"
+]
+
+# Currency codes traded by the live signal generator
+CURRENCY_CODES = ["eur", "usd", "jpy", "gbp", "chf", "aud", "cad", "nzd"]
+
+# Polarity words used by live_signal_generator.generate_trade_signal
+BULLISH_WORDS = ["rally", "rallies", "rallied", "bullish", "optimism", "gain", "surge", "strong", "hawkish"]
+BEARISH_WORDS = ["fall", "bearish", "drop", "decline", "recession", "weak", "dovish"]
+
+# Groups whose terms must match a whole word (a plural "s"/"es" is allowed:
+# "market" → "markets" but not "marketing"); the others match any word that
+# starts with the term ("gain" → "gains", "rally" → "rallying")
+WORD_GROUPS = {"fx", "currency"}
+
+# Whole words that also count as another term of the whole-word groups
+# ("euro" names the EUR code, so euro headlines still map to EUR pairs)
+ALIASES = {"euro": "eur"}
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+_PLURALS = ("", "s", "es")
+_UNSEEN = repeat(-1)  # mask of a token not classified yet: OR-ing it in leaves -1
+TOKEN_CACHE_SIZE = 200_000
+
+
+class _TermSets(dict):
+    """Group mask → frozenset of the group's terms it holds, decoded on first use."""
+
+    def __init__(self, bits):
+        super().__init__()
+        self.bits = bits  # [(bit, term), ...]
+
+    def __missing__(self, mask):
+        terms = self[mask] = frozenset(term for bit, term in self.bits if mask & bit)
+        return terms
+
+
+class KeywordMatcher:
+    """
+    Single-pass multi-pattern matcher.
+
+    Every (group, term) pair owns one bit. Each text is lower-cased and
+    split on whitespace once (str.split, no regex), the memoized bit masks
+    of its tokens are OR-ed together in C (map + reduce) and the result is
+    decoded per group through a memo of group mask → frozenset of terms.
+    Only tokens never seen before are classified in Python. Multi-word
+    terms are matched with their own regex, and only in texts containing
+    their first word (flagged by one more bit). One scan therefore returns
+    every keyword, currency and polarity-word hit at once.
+    """
+
+    def __init__(self, groups, word_groups=WORD_GROUPS, aliases=ALIASES):
+        self.groups = {name: list(terms) for name, terms in groups.items()}
+        self.word_groups = set(word_groups)
+        self._bits = {}       # (group, term) → bit
+        self._words = {}      # single-word surface form → mask, for whole-word groups
+        self._prefixes = {}   # single-word term → mask, for prefix groups
+        self._phrases = {}    # first word → [(compiled phrase, bit), ...]
+        for name, terms in self.groups.items():
+            whole = name in self.word_groups
+            for term in terms:
+                bit = self._bits.setdefault((name, term), 1 << len(self._bits))
+                parts = term.split()
+                if len(parts) > 1:
+                    pattern = r"\b" + r"[^a-z0-9]+".join(map(re.escape, parts))
+                    pattern += r"(?:s|es)?\b" if whole else ""
+                    self._phrases.setdefault(parts[0], []).append((re.compile(pattern), bit))
+                elif whole:
+                    for suffix in _PLURALS:
+                        self._words[term + suffix] = self._words.get(term + suffix, 0) | bit
+                else:
+                    self._prefixes[term] = self._prefixes.get(term, 0) | bit
+        for alias, term in aliases.items():
+            bits = sum(bit for (name, t), bit in self._bits.items() if t == term and name in self.word_groups)
+            for suffix in _PLURALS:
+                self._words[alias + suffix] = self._words.get(alias + suffix, 0) | bits
+        self._prefix_lengths = sorted({len(t) for t in self._prefixes}, reverse=True)
+        self._decoders = [  # (group, group mask, its decoded term sets)
+            (name, sum(bit for (group, _), bit in self._bits.items() if group == name),
+             _TermSets([(bit, term) for (group, term), bit in self._bits.items() if group == name]))
+            for name in self.groups
+        ]
+        self._head_bit = 1 << len(self._bits)  # the token holds the first word of a multi-word term
+        self._masks = {}          # token → mask, for every token classified so far
+        self._heads = {}          # tokens with the head bit → those first words
+
+    def _classify(self, token):
+        """Memoize the hits of one whitespace-separated token and the phrase heads it holds."""
+        mask, heads = 0, []
+        for word in _WORD.findall(token):
+            mask |= self._words.get(word, 0)
+            for length in self._prefix_lengths:
+                if length <= len(word):
+                    mask |= self._prefixes.get(word[:length], 0)
+            if word in self._phrases:
+                heads.append(word)
+        if heads:
+            self._heads[token] = heads
+            mask |= self._head_bit
+        self._masks[token] = mask
+
+    def _phrase_mask(self, text, tokens, mask):
+        for token in set(tokens):
+            for head in self._heads.get(token, ()):
+                for pattern, bit in self._phrases[head]:
+                    if not mask & bit and pattern.search(text):
+                        mask |= bit
+        return mask
+
+    def scan(self, text):
+        """{group: frozenset of matched terms} for one text (lower-cased before matching)."""
+        text = str(text or "").lower()
+        tokens = text.split()
+        mask = reduce(or_, map(self._masks.get, tokens, _UNSEEN), 0)
+        if mask < 0:
+            if len(self._masks) + len(tokens) > TOKEN_CACHE_SIZE:
+                self._masks.clear()
+                self._heads.clear()
+            for token in set(tokens):
+                if token not in self._masks:
+                    self._classify(token)
+            mask = reduce(or_, map(self._masks.__getitem__, tokens), 0)
+        if mask & self._head_bit:
+            mask = self._phrase_mask(text, tokens, mask)
+        return {name: terms[mask & group_mask] for name, group_mask, terms in self._decoders}
+
+
+MATCHER = KeywordMatcher({
+    "fx": FX_KEYWORDS,
+    "currency": CURRENCY_CODES,
+    "bullish": BULLISH_WORDS,
+    "bearish": BEARISH_WORDS,
+})
+
+
+def scan(text):
+    return MATCHER.scan(text)
@@ -0,0 +1,64 @@
+import csv
+import os
+
+STORE_FILE = "data/sentiment_label_store.csv"
+FIELDS = ["content_hash", "model", "label", "confidence"]
+
+
+class LabelStore:
+    """
+    Append-only record of sentiment labels keyed by article content hash.
+
+    Every label ever produced is appended once to a CSV; on load the whole
+    file is read into a dict so lookups for a cycle's articles are O(1).
+    Labels are only reused for the model that produced them.
+    """
+
+    def __init__(self, path=STORE_FILE, model=""):
+        self.path = path
+        self.model = model
+        self._labels = None
+
+    def _load(self):
+        if self._labels is None:
+            self._labels = {}
+            if os.path.exists(self.path):
+                with open(self.path, newline="", encoding="utf-8") as f:
+                    for row in csv.DictReader(f):
+                        if row.get("model", "") == self.model:
+                            self._labels[row["content_hash"]] = (row["label"], float(row["confidence"]))
+        return self._labels
+
+    def __contains__(self, content_hash):
+        return content_hash in self._load()
+
+    def __len__(self):
+        return len(self._load())
+
+    def get(self, content_hash):
+        """(label, confidence) for a hash, or None if it was never labeled."""
+        return self._load().get(content_hash)
+
+    def missing(self, hashes):
+        labels = self._load()
+        return [h for h in hashes if h not in labels]
+
+    def add_many(self, hashes, labels, confidences):
+        """Append new labels to the store file and the in-memory index."""
+        rows = [
+            (h, lbl, round(float(conf), 4))
+            for h, lbl, conf in zip(hashes, labels, confidences)
+            if h not in self._load()
+        ]
+        if not rows:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        new_file = not os.path.exists(self.path)
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(FIELDS)
+            for h, lbl, conf in rows:
+                writer.writerow([h, self.model, lbl, conf])
+                self._labels[h] = (lbl, conf)
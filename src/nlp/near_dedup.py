@@ -0,0 +1,181 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from nlp.clean_news import clean_text
+from nlp.keyword_matcher import BEARISH_WORDS, BULLISH_WORDS
+
+SHINGLE = 5           # character k-grams of the cleaned text (a-z and spaces only)
+NUM_PERM = 64         # MinHash bins (one-permutation hashing: one hash per shingle, split into bins)
+BANDS = 16            # LSH bands of NUM_PERM // BANDS rows: candidates from ~0.5 Jaccard up
+THRESHOLD = 0.8       # estimated Jaccard at which an article reuses its canonical's label
+WINDOW = pd.Timedelta(days=2)  # syndicated copies of one story land within this window
+CHUNK = 1000          # texts hashed per vectorized step
+MAX_NEIGHBOURS = 16   # LSH candidates per row and band (nearest in time), bounds huge buckets
+
+# polarity words as word prefixes, like keyword_matcher ("gain" → "gains")
+_POLARITY = re.compile(r"\b(?:%s)" % "|".join(sorted(BULLISH_WORDS + BEARISH_WORDS, key=len, reverse=True)))
+_BIN_BITS = 6         # log2(NUM_PERM): the top bits of a shingle hash pick its bin
+_VALUE_BITS = 32 - _BIN_BITS
+_EMPTY = np.uint32(0xFFFFFFFF)
+_BAND_MIX = np.random.default_rng(1).integers(1, 1 << 63, NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+
+
+def normalize(text):
+    return clean_text(str(text)) if text == text and text is not None else ""
+
+
+def _shingle_ids(chunk):
+    """(doc index, 32-bit shingle id) for every k-gram of the normalized texts in chunk."""
+    padded = [text.ljust(SHINGLE) for text in chunk]
+    ends = np.cumsum([len(text) for text in padded])
+    data = np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8).astype(np.uint64)
+    n = len(data) - SHINGLE + 1
+    grams = np.zeros(n, dtype=np.uint64)
+    for j in range(SHINGLE):  # 5 ascii bytes pack losslessly into one integer
+        grams = (grams << np.uint64(8)) | data[j:n + j]
+    docs = np.searchsorted(ends, np.arange(n), side="right")
+    keep = np.arange(n) + SHINGLE <= ends[docs]  # drop k-grams spanning two texts
+    ids = grams[keep] * np.uint64(0x9E3779B97F4A7C15)  # multiplicative mix, wraps mod 2^64
+    return docs[keep], (ids >> np.uint64(32)).astype(np.uint32)
+
+
+def minhash(texts):
+    """
+    MinHash signatures (len(texts) × NUM_PERM) of already normalized,
+    non-empty texts by one-permutation hashing: each shingle is hashed once
+    and lands in one bin, a bin keeps its smallest value, and bins no
+    shingle reached borrow the next filled bin's value (rotation
+    densification). As accurate as NUM_PERM separate hashes near the
+    threshold, at a fraction of the cost.
+    """
+    signatures = np.full((len(texts), NUM_PERM), _EMPTY, dtype=np.uint32)
+    for start in range(0, len(texts), CHUNK):
+        docs, ids = _shingle_ids(texts[start:start + CHUNK])
+        bins = (ids >> np.uint32(_VALUE_BITS)).astype(np.int64)
+        values = ids & np.uint32((1 << _VALUE_BITS) - 1)
+        block = signatures[start:start + CHUNK].reshape(-1)
+        np.minimum.at(block, docs * NUM_PERM + bins, values)
+        signatures[start:start + CHUNK] = block.reshape(-1, NUM_PERM)
+
+    empty = signatures == _EMPTY
+    dense = signatures.copy()
+    for shift in range(1, NUM_PERM):
+        if not empty.any():
+            break
+        borrowed = np.roll(signatures, -shift, axis=1)
+        take = empty & (borrowed != _EMPTY)
+        dense[take] = borrowed[take] + np.uint32(shift << _VALUE_BITS)  # per-shift offset keeps bins distinct
+        empty &= ~take
+    return dense
+
+
+def _band_keys(signatures):
+    rows = NUM_PERM // BANDS
+    bands = signatures.reshape(len(signatures), BANDS, rows)
+    return (bands.astype(np.uint64) * _BAND_MIX).sum(axis=2)  # one 64-bit key per band, wrapping
+
+
+def _candidate_pairs(keys):
+    """
+    (earlier, later) row pairs sharing at least one LSH band key; within a
+    bucket each row is paired with its MAX_NEIGHBOURS predecessors only.
+    """
+    pairs = []
+    rank = np.arange(len(keys))
+    for band in range(BANDS):
+        by_key = np.lexsort((rank, keys[:, band]))
+        sorted_keys = keys[by_key, band]
+        for lag in range(1, MAX_NEIGHBOURS + 1):
+            same = np.flatnonzero(sorted_keys[lag:] == sorted_keys[:-lag])
+            if not len(same):
+                break
+            pairs.append(by_key[same] * len(keys) + by_key[same + lag])
+    pairs = np.sort(np.concatenate(pairs)) if pairs else np.empty(0, dtype=np.int64)
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+    return pairs // len(keys), pairs % len(keys)
+
+
+def near_duplicates(texts, timestamps=None, threshold=THRESHOLD, window=WINDOW):
+    """
+    Canonical index per text: texts[i] is a near-duplicate of texts[canonical[i]]
+    (canonical[i] == i for the texts that must be labeled). Texts are
+    normalized with clean_text and identical copies are folded first; the
+    rest are MinHashed and paired through LSH buckets, and in publication
+    order a text joins the most similar earlier canonical whose estimated
+    Jaccard is at least threshold, published within window and with the
+    same polarity words, so "rallies" vs "falls" copies of one headline
+    are still labeled separately.
+    """
+    cleaned = {text: normalize(text) for text in set(texts)}  # syndicated copies are often byte-identical
+    normalized = [cleaned[text] for text in texts]
+    canonical = np.arange(len(normalized))
+    if timestamps is not None:
+        parsed = pd.to_datetime(pd.Series(timestamps), errors="coerce", utc=True)
+        when = ((parsed - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)).to_numpy(dtype=float, na_value=np.nan)
+    else:
+        when = np.zeros(len(normalized))
+    span = window.total_seconds() if timestamps is not None else np.inf
+
+    # identical copies: the first one within the window stands in for the others
+    first = {}
+    rows = []  # time-ordered representatives
+    for i in np.argsort(when, kind="stable"):
+        text = normalized[i]
+        if not text:
+            continue
+        rep = first.get(text)
+        if rep is not None and abs(when[i] - when[rep]) <= span:  # NaN never matches
+            canonical[i] = rep
+            continue
+        first[text] = i
+        rows.append(i)
+    if not rows:
+        return canonical
+
+    rows = np.array(rows)
+    signatures = minhash([normalized[i] for i in rows])
+    earlier, later = _candidate_pairs(_band_keys(signatures))
+    sims = (signatures[earlier] == signatures[later]).sum(axis=1) / NUM_PERM
+    ok = (sims >= threshold) & (np.abs(when[rows[later]] - when[rows[earlier]]) <= span)
+    earlier, later, sims = earlier[ok], later[ok], sims[ok]
+
+    polarities = {}
+
+    def polarity(pos):
+        if pos not in polarities:
+            polarities[pos] = frozenset(_POLARITY.findall(normalized[rows[pos]]))
+        return polarities[pos]
+
+    is_canonical = np.ones(len(rows), dtype=bool)
+    best_first = np.lexsort((-sims, later))
+    for c, pos in zip(earlier[best_first].tolist(), later[best_first].tolist()):
+        if is_canonical[pos] and is_canonical[c] and polarity(c) == polarity(pos):
+            is_canonical[pos] = False  # later rows are visited in order, so c is settled already
+            canonical[rows[pos]] = rows[c]
+
+    for i in range(len(canonical)):  # fold identical copies into their representative's canonical
+        canonical[i] = canonical[canonical[i]]
+    return canonical
+
+
+def predict_collapsed(texts, predict, timestamps=None, threshold=THRESHOLD, window=WINDOW):
+    """
+    predict(texts) -> (labels, scores) run on the canonical texts only, with
+    each near-duplicate reusing its canonical's label and score.
+    Returns (labels, scores, canonical).
+    """
+    canonical = near_duplicates(texts, timestamps, threshold, window)
+    unique = np.flatnonzero(canonical == np.arange(len(texts)))
+    print(f"🧬 Near-duplicates: {len(texts)} texts → {len(unique)} to label "
+          f"({len(texts) / max(len(unique), 1):.2f}x compression)")
+    labels, scores = predict([texts[i] for i in unique]) if len(unique) else ([], [])
+    at = np.empty(len(texts), dtype=np.int64)
+    at[unique] = np.arange(len(unique))
+    at = at[canonical]
+    return [labels[j] for j in at], [scores[j] for j in at], canonical
+
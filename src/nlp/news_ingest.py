@@ -0,0 +1,158 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import glob
+import json
+
+import pandas as pd
+
+from core.news_archive import ARCHIVE_DIR, NewsArchive
+from utils.text_hash import article_hash
+
+RAW_DATA_DIR = "data"
+RAW_PATTERN = "raw_fx_news_*.json"
+STATE_DIR = "data/ingest"
+ARCHIVE_KEY = "__archive__"  # manifest entry: segment day → [generation, members consumed]
+
+
+def article_keys(article):
+    """Dedup keys for a raw NewsAPI article: its URL (when present) and its content hash."""
+    keys = ["h:" + article_hash(article.get("title"), article.get("description"))]
+    if article.get("url"):
+        keys.append("u:" + article["url"])
+    return keys
+
+
+class NewsIngestor:
+    """
+    Incremental reader of raw news for one consumer: legacy raw_fx_news_*.json
+    snapshots and the compressed news archive.
+
+    A manifest records every raw file already processed (with its size, so a
+    rewritten file is picked up again) and, per archive segment, how many
+    members were consumed in its current generation (compaction bumps the
+    generation, so a compacted segment is re-read once). A persistent seen-set
+    records the URL and content hash of every article already emitted.
+    new_articles() therefore parses only new data and yields each article once;
+    commit() persists both after the consumer has written its output.
+    """
+
+    def __init__(self, name, raw_dir=RAW_DATA_DIR, state_dir=STATE_DIR, archive_dir=ARCHIVE_DIR):
+        self.name = name
+        self.raw_dir = raw_dir
+        self.archive = NewsArchive(archive_dir)
+        self.manifest_path = os.path.join(state_dir, f"{name}.manifest.json")
+        self.seen_path = os.path.join(state_dir, f"{name}.seen.txt")
+        self._manifest = None
+        self._seen = None
+        self._new_files = {}
+        self._new_segments = {}
+        self._new_keys = []
+        self.stats = {"files": 0, "members": 0, "articles": 0, "duplicates": 0}
+
+    def _load(self):
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path) as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+            self._seen = set()
+            if os.path.exists(self.seen_path):
+                with open(self.seen_path, encoding="utf-8") as f:
+                    self._seen.update(line.rstrip("\n") for line in f)
+
+    @property
+    def is_first_run(self):
+        self._load()
+        return not self._manifest
+
+    def reset(self):
+        """Forget all progress, e.g. because the consumer's output file was deleted."""
+        for path in (self.manifest_path, self.seen_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._manifest = None
+        self._load()
+
+    def pending_files(self):
+        self._load()
+        files = []
+        for path in sorted(glob.glob(os.path.join(self.raw_dir, RAW_PATTERN))):
+            name = os.path.basename(path)
+            if self._manifest.get(name) != os.path.getsize(path):
+                files.append(path)
+        return files
+
+    def pending_segments(self):
+        """(day, generation, first unread member) for archive segments with unread members."""
+        self._load()
+        progress = self._manifest.get(ARCHIVE_KEY, {})
+        pending = []
+        for day in self.archive.days():
+            index = self.archive.read_index(day)
+            generation, done = progress.get(day, (None, 0))
+            if generation != index["generation"]:
+                done = 0
+            if done < len(index["members"]):
+                pending.append((day, index["generation"], done))
+        return pending
+
+    def unseen(self, articles):
+        """Yield only articles not emitted before (e.g. pushed in memory); commit() persists their keys."""
+        self._load()
+        for article in articles:
+            keys = article_keys(article)
+            if any(k in self._seen for k in keys):
+                self.stats["duplicates"] += 1
+                continue
+            self._seen.update(keys)
+            self._new_keys.extend(keys)
+            self.stats["articles"] += 1
+            yield article
+
+    def new_articles(self):
+        """Yield raw article dicts not emitted before, reading only unprocessed files and archive members."""
+        for path in self.pending_files():
+            try:
+                with open(path) as f:
+                    articles = json.load(f)
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping malformed JSON file: {path}")
+                continue
+            self._new_files[os.path.basename(path)] = os.path.getsize(path)
+            self.stats["files"] += 1
+            yield from self.unseen(articles)
+
+        for day, generation, start in self.pending_segments():
+            for n, articles in self.archive.iter_members(day, start):
+                self._new_segments[day] = [generation, n + 1]
+                self.stats["members"] += 1
+                yield from self.unseen(articles)
+
+    def commit(self):
+        """Persist the manifest and the newly seen keys."""
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        if self._new_keys:
+            with open(self.seen_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(self._new_keys) + "\n")
+        self._manifest.update(self._new_files)
+        if self._new_segments:
+            self._manifest.setdefault(ARCHIVE_KEY, {}).update(self._new_segments)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, self.manifest_path)
+        self._new_files = {}
+        self._new_segments = {}
+        self._new_keys = []
+
+
+def append_rows(rows, output_file, columns, overwrite=False):
+    """Append rows to a CSV (writing the header when the file is new, or replacing it when overwrite=True)."""
+    df = pd.DataFrame(rows, columns=columns)
+    if overwrite or not os.path.exists(output_file):
+        df.to_csv(output_file, index=False)
+    else:
+        df.to_csv(output_file, mode="a", header=False, index=False)
+    return len(df)
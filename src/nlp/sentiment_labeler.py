@@ -1,29 +1,119 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+import time
 import pandas as pd
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from scipy.special import softmax
+
+from nlp.label_store import LabelStore
+from utils.text_hash import article_hash
+
+# torch / transformers are imported inside the loaders below, so importing
+# this module stays cheap for callers that never run inference
 
 INPUT_FILE = "data/cleaned_fx_news.csv"
 OUTPUT_FILE = "data/labeled_fx_news.csv"
 BATCH_SIZE = 16
+MAX_LENGTH = 512
+HEADLINE_MAX_LENGTH = 128  # title + description rarely exceeds this; caps CPU cost per batch
+BUCKET_BY_LENGTH = True
+NEAR_DEDUP = True  # label one canonical per group of near-duplicate syndicated articles (nlp/near_dedup.py)
 
 MODEL_NAME = "ProsusAI/finbert"
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME).to(device)
 label_map = {0: "negative", 1: "neutral", 2: "positive"}
 
+_tokenizer = None
+_model = None
+_device = None
+_quantize = False
+_load_lock = threading.RLock()
+
+
+def get_tokenizer():
+    global _tokenizer
+    if _tokenizer is None:
+        with _load_lock:
+            if _tokenizer is None:
+                from transformers import AutoTokenizer
+                _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    return _tokenizer
+
+
+def get_model():
+    """(model, device), loading FinBERT on first use; safe to call from any thread."""
+    global _model, _device
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                import torch
+                from transformers import AutoModelForSequenceClassification
+
+                device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+                model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME).to(device)
+                model.eval()
+                if _quantize:
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                _device = device
+                _model = model
+    return _model, _device
+
+
+def warmup():
+    """Load tokenizer and model and run one tiny batch so the first real call is not cold."""
+    get_tokenizer()
+    get_model()
+    batched_predict(["dollar steadies ahead of fed decision"])
+
+
+def configure_cpu(num_threads=None, interop_threads=None, max_length=None, quantize=False):
+    """
+    CPU execution settings: intra-/inter-op thread counts, the truncation
+    length used by batched_predict, and optional dynamic int8 quantization
+    of the model's Linear layers (applied at load time if not loaded yet).
+    """
+    global _model, _quantize, MAX_LENGTH
+    import torch
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:  # only allowed before the first parallel op
+            print(f"⚠️ Could not set inter-op threads: {e}")
+    if max_length:
+        MAX_LENGTH = max_length
+    if quantize:
+        with _load_lock:
+            if _model is not None and not _quantize:
+                _model = torch.quantization.quantize_dynamic(_model, {torch.nn.Linear}, dtype=torch.qint8)
+            _quantize = True
+    print(f"⚙️ FinBERT: {torch.get_num_threads()} threads, "
+          f"max_length={MAX_LENGTH}, int8={'yes' if _quantize else 'no'}")
+
 
 def batched_predict(texts):
-    inputs = tokenizer(
+    inputs = get_tokenizer()(
         texts,
         return_tensors="pt",
         padding=True,
         truncation=True,
-        max_length=512
-    ).to(device)
+        max_length=MAX_LENGTH
+    )
+    return _predict_inputs(inputs)
 
+
+def predict_encoded(token_ids):
+    """batched_predict for texts already tokenized by encode()."""
+    return _predict_inputs(get_tokenizer().pad({"input_ids": token_ids}, return_tensors="pt"))
+
+
+def _predict_inputs(inputs):
+    import torch
+    from scipy.special import softmax
+
+    model, device = get_model()
+    inputs = inputs.to(device)
     with torch.no_grad():
         outputs = model(**inputs)
     logits = outputs.logits.cpu().numpy()
@@ -34,15 +124,58 @@ def batched_predict(texts):
     return [label_map[i] for i in labels], confidences.tolist()
 
 
-def label_sentiment():
-    df = pd.read_csv(INPUT_FILE)
-    texts = (df["title"].fillna("") + " " + df["description"].fillna("")).tolist()
+def profile_startup():
+    """Print how long importing torch/transformers, loading FinBERT and the first inference take."""
+    timings = {}
+
+    start = time.perf_counter()
+    import torch  # noqa: F401
+    import transformers  # noqa: F401
+    timings["import torch + transformers"] = time.perf_counter() - start
 
+    start = time.perf_counter()
+    get_tokenizer()
+    get_model()
+    timings["load tokenizer + model"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched_predict(["dollar steadies ahead of fed decision"])
+    timings["first inference"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched_predict(["euro slips as ecb signals rate cut"])
+    timings["second inference"] = time.perf_counter() - start
+
+    print("\n⏱️ FinBERT startup profile")
+    for step, seconds in timings.items():
+        print(f"{step:<28}: {seconds:.3f}s")
+    return timings
+
+
+def encode(text):
+    """Token ids of one text, truncated like batched_predict truncates it."""
+    return get_tokenizer()(text, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+
+
+def length_order(texts):
+    """Indices of texts sorted by token length, so each batch pads to similar lengths."""
+    lengths = [len(ids) for ids in get_tokenizer()(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]]
+    return sorted(range(len(texts)), key=lengths.__getitem__)
+
+
+def predict_texts(texts, bucketed=BUCKET_BY_LENGTH, progress=True):
+    """
+    Label a list of texts in BATCH_SIZE batches; failed batches fall back to
+    neutral/0.0. With bucketed=True batches are formed from length-sorted
+    texts and results are returned in the original order.
+    """
+    order = length_order(texts) if bucketed and texts else list(range(len(texts)))
+    ordered = [texts[j] for j in order]
     all_labels = []
     all_confidences = []
 
-    for i in range(0, len(texts), BATCH_SIZE):
-        batch_texts = texts[i:i + BATCH_SIZE]
+    for i in range(0, len(ordered), BATCH_SIZE):
+        batch_texts = ordered[i:i + BATCH_SIZE]
         try:
             labels, confidences = batched_predict(batch_texts)
         except Exception as e:
@@ -52,14 +185,111 @@ def label_sentiment():
 
         all_labels.extend(labels)
         all_confidences.extend([round(c, 4) for c in confidences])
-        print(f"✅ Processed {min(i + BATCH_SIZE, len(texts))} / {len(texts)}")
+        if progress:
+            print(f"✅ Processed {min(i + BATCH_SIZE, len(texts))} / {len(texts)}")
+
+    labels = [None] * len(texts)
+    confidences = [None] * len(texts)
+    for pos, j in enumerate(order):
+        labels[j] = all_labels[pos]
+        confidences[j] = all_confidences[pos]
+    return labels, confidences
 
-    df["label"] = all_labels
-    df["confidence"] = all_confidences
 
-    df.to_csv(OUTPUT_FILE, index=False)
-    print(f"\n✅ FinBERT-labeled data saved to {OUTPUT_FILE} — {len(df)} entries")
+def _labeled_hashes(output_file):
+    """Content hashes already written to the labeled output, or None if it must be rebuilt."""
+    if not os.path.exists(output_file):
+        return set()
+    try:
+        done = pd.read_csv(output_file, usecols=["content_hash"])
+    except ValueError:  # written before content hashes existed
+        return None
+    return set(done["content_hash"])
+
+
+def label_sentiment(input_file=INPUT_FILE, output_file=OUTPUT_FILE, store=None, predictor=None,
+                    near_dedup=NEAR_DEDUP):
+    """
+    Label articles in input_file that are not in output_file yet and append
+    them. Labels come from the content-hash LabelStore when an identical
+    article was seen before, so FinBERT only runs on genuinely new text;
+    with near_dedup, near-duplicates published close together reuse the
+    label of one canonical copy (only canonical labels enter the store).
+    predictor(texts) -> (labels, confidences) defaults to predict_texts;
+    pass an inference server's predict to share a resident model.
+    """
+    store = store if store is not None else LabelStore(model=MODEL_NAME)
+    predict = predictor or predict_texts
+    df = pd.read_csv(input_file)
+    df["content_hash"] = [article_hash(t, d) for t, d in zip(df["title"], df["description"])]
+
+    done = _labeled_hashes(output_file)
+    rebuild = done is None
+    new = df[~df["content_hash"].isin(done or set())].drop_duplicates("content_hash").copy()
+    if new.empty:
+        print(f"✅ No new articles to label — {output_file} is up to date")
+        return new
+
+    todo = new[new["content_hash"].isin(store.missing(new["content_hash"]))]
+    print(f"🧠 {len(new)} new article(s): {len(new) - len(todo)} reused from label store, {len(todo)} to label")
+    if not todo.empty:
+        texts = (todo["title"].fillna("") + " " + todo["description"].fillna("")).tolist()
+        if near_dedup:
+            from nlp.near_dedup import predict_collapsed
+
+            published = todo["publishedAt"] if "publishedAt" in todo.columns else None
+            labels, confidences, canonical = predict_collapsed(texts, predict, published)
+            canonical_hashes = set(todo["content_hash"].to_numpy()[canonical])
+        else:
+            labels, confidences = predict(texts)
+            canonical_hashes = set(todo["content_hash"])
+        fresh = dict(zip(todo["content_hash"], zip(labels, confidences)))
+        # failed batches come back as neutral/0.0 and must not be reused later
+        ok = [h for h, (_, conf) in fresh.items() if conf > 0 and h in canonical_hashes]
+        store.add_many(ok, [fresh[h][0] for h in ok], [fresh[h][1] for h in ok])
+    else:
+        fresh = {}
+
+    cached = [store.get(h) or fresh[h] for h in new["content_hash"]]
+    new["label"] = [c[0] for c in cached]
+    new["confidence"] = [c[1] for c in cached]
+    failed = new["confidence"] <= 0
+    if failed.any():  # not written, so the next run finds them missing and retries them
+        print(f"⚠️ {failed.sum()} article(s) from failed batches left for the next run")
+        new = new[~failed]
+
+    if rebuild:
+        new.to_csv(output_file, index=False)
+    else:
+        new.to_csv(output_file, mode="a", header=not os.path.exists(output_file), index=False)
+    print(f"\n✅ FinBERT-labeled data saved to {output_file} — {len(new)} new entries")
+    return new
 
 
 if __name__ == "__main__":
-    label_sentiment()
+    import argparse
+    from nlp.inference_server import get_predictor
+
+    parser = argparse.ArgumentParser(description="Label cleaned FX news with FinBERT")
+    parser.add_argument("--threads", type=int, help="torch intra-op threads")
+    parser.add_argument("--interop-threads", type=int, help="torch inter-op threads")
+    parser.add_argument("--max-length", type=int, help=f"token cap (e.g. {HEADLINE_MAX_LENGTH} for headlines)")
+    parser.add_argument("--quantize", action="store_true", help="dynamic int8 quantization of Linear layers")
+    parser.add_argument("--profile-startup", action="store_true", help="report import, load and first-inference times")
+    parser.add_argument("--workers", type=int, help="label in this many processes (resumable, for large backfills)")
+    parser.add_argument("--shard-size", type=int, help="articles per worker task / checkpoint")
+    parser.add_argument("--no-near-dedup", action="store_true", help="run the model on every near-duplicate too")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        profile_startup()
+    elif args.workers:
+        from nlp.sharded_labeler import SHARD_SIZE, label_sharded
+
+        label_sharded(workers=args.workers, threads=args.threads, shard_size=args.shard_size or SHARD_SIZE,
+                      max_length=args.max_length, quantize=args.quantize)
+    elif args.threads or args.interop_threads or args.max_length or args.quantize:
+        configure_cpu(args.threads, args.interop_threads, args.max_length, args.quantize)
+        label_sentiment(near_dedup=not args.no_near_dedup)  # run locally so the settings above apply
+    else:
+        label_sentiment(predictor=get_predictor(), near_dedup=not args.no_near_dedup)
@@ -0,0 +1,211 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import csv
+import json
+import shutil
+import time
+from collections import defaultdict
+from multiprocessing import Pool
+
+import pandas as pd
+
+from nlp.label_store import LabelStore
+from nlp.sentiment_labeler import (
+    INPUT_FILE, MODEL_NAME, OUTPUT_FILE, _labeled_hashes, configure_cpu, predict_texts, warmup,
+)
+from utils.text_hash import article_hash
+
+SHARD_SIZE = 2000  # articles per work unit: the checkpoint granularity
+
+# Checkpoint: <output>.shards/ holds the shard plan (content hash → shard),
+# one part file per finished shard and state.json with the next shard to
+# append and the output's size after it. Shards finish out of order; parts
+# are appended in plan order, so the output keeps the input order, and a
+# rerun truncates the output back to the recorded size, skips appended or
+# finished shards and only labels the rest.
+
+
+def checkpoint_dir(output_file):
+    return output_file + ".shards"
+
+
+def _part_path(ckpt, shard):
+    return os.path.join(ckpt, f"shard-{shard:06d}.csv")
+
+
+def _write_atomic(path, write):
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_state(ckpt):
+    try:
+        with open(os.path.join(ckpt, "state.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(ckpt, state):
+    _write_atomic(os.path.join(ckpt, "state.json"), lambda f: json.dump(state, f))
+
+
+# ---------------------- WORKER ----------------------
+
+def _init_worker(threads, max_length, quantize):
+    configure_cpu(num_threads=threads, interop_threads=1, max_length=max_length, quantize=quantize)
+    warmup()  # one model per process, loaded before the first shard
+
+
+def _label_shard(task):
+    shard, hashes, texts = task
+    start = time.perf_counter()
+    labels, confidences = predict_texts(texts, progress=False)
+    return shard, hashes, labels, confidences, time.perf_counter() - start, os.getpid()
+
+
+# ---------------------- DRIVER ----------------------
+
+def _start(df, output_file, ckpt, shard_size):
+    """New plan over the articles not in the output yet; None when there is nothing to label."""
+    done = _labeled_hashes(output_file)
+    new = df[~df["content_hash"].isin(done or set())].drop_duplicates("content_hash")
+    if new.empty:
+        return None
+
+    if done is None or not os.path.exists(output_file):  # no output, or one written before content hashes
+        columns = list(df.columns) + ["label", "confidence"]
+        with open(output_file, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(columns)
+
+    os.makedirs(ckpt, exist_ok=True)
+    plan = pd.DataFrame({"content_hash": new["content_hash"].to_numpy(),
+                         "shard": [i // shard_size for i in range(len(new))]})
+    plan.to_csv(os.path.join(ckpt, "plan.csv"), index=False)
+    state = {"shards": int(plan["shard"].max()) + 1, "next_shard": 0, "output_size": os.path.getsize(output_file)}
+    _write_state(ckpt, state)
+    return state
+
+
+def _append_ready(state, ckpt, plan, rows, output_file, columns):
+    """Append every finished shard that is next in plan order to the output."""
+    while state["next_shard"] < state["shards"] and os.path.exists(_part_path(ckpt, state["next_shard"])):
+        shard = state["next_shard"]
+        part = pd.read_csv(_part_path(ckpt, shard)).set_index("content_hash")
+        hashes = [h for h in plan[shard] if h in part.index]  # failed articles are left out of parts
+        out = rows.loc[hashes].reset_index()
+        out["label"] = part.loc[hashes, "label"].to_numpy()
+        out["confidence"] = part.loc[hashes, "confidence"].to_numpy()
+
+        with open(output_file, "r+", newline="", encoding="utf-8") as f:
+            f.truncate(state["output_size"])  # drop a half-appended shard from an interrupted run
+            f.seek(state["output_size"])
+            out.reindex(columns=columns).to_csv(f, header=False, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+            state["output_size"] = f.tell()
+        state["next_shard"] += 1
+        _write_state(ckpt, state)
+        os.remove(_part_path(ckpt, shard))
+
+
+def label_sharded(input_file=INPUT_FILE, output_file=OUTPUT_FILE, workers=None, threads=None,
+                  shard_size=SHARD_SIZE, store=None, max_length=None, quantize=False):
+    """
+    label_sentiment over a process pool: the articles not in output_file yet
+    are split into shards, each of `workers` processes loads FinBERT once
+    with `threads` torch threads (default: the cores divided among the
+    workers) and labels whole shards, and results are appended to the
+    output in input order with a checkpoint after every shard.
+    """
+    store = store if store is not None else LabelStore(model=MODEL_NAME)
+    workers = workers or os.cpu_count()
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+
+    df = pd.read_csv(input_file)
+    df["content_hash"] = [article_hash(t, d) for t, d in zip(df["title"], df["description"])]
+    ckpt = checkpoint_dir(output_file)
+    state = _read_state(ckpt)
+    if state is None:
+        state = _start(df, output_file, ckpt, shard_size)
+        if state is None:
+            print(f"✅ No new articles to label — {output_file} is up to date")
+            return 0
+    else:
+        print(f"↩️ Resuming from shard {state['next_shard']} of {state['shards']} ({ckpt})")
+
+    plan = pd.read_csv(os.path.join(ckpt, "plan.csv"))
+    plan = {shard: group.tolist() for shard, group in plan.groupby("shard")["content_hash"]}
+    rows = df.drop_duplicates("content_hash").set_index("content_hash")
+    lost = sum(h not in rows.index for hashes in plan.values() for h in hashes)
+    if lost:
+        print(f"❌ {lost} planned article(s) are no longer in {input_file}; remove {ckpt} to start over.")
+        return 0
+    with open(output_file, newline="", encoding="utf-8") as f:
+        columns = next(csv.reader(f))
+
+    _append_ready(state, ckpt, plan, rows, output_file, columns)  # parts finished before a crash
+    pending = [s for s in range(state["next_shard"], state["shards"]) if not os.path.exists(_part_path(ckpt, s))]
+
+    failed = 0
+
+    def write_part(shard, labels):
+        # failed batches come back as neutral/0.0: such articles stay out of the
+        # output, so the next run plans them again
+        labeled = [(h, *labels[h]) for h in plan[shard] if labels[h][1] > 0]
+        _write_atomic(_part_path(ckpt, shard), lambda f: pd.DataFrame(
+            labeled, columns=["content_hash", "label", "confidence"]
+        ).to_csv(f, index=False))
+        return len(plan[shard]) - len(labeled)
+
+    tasks = []
+    for shard in pending:
+        missing = store.missing(plan[shard])
+        if not missing:  # every label reused from the store: nothing for a worker to do
+            write_part(shard, {h: store.get(h) for h in plan[shard]})
+            continue
+        texts = (rows.loc[missing, "title"].fillna("") + " " + rows.loc[missing, "description"].fillna("")).tolist()
+        tasks.append((shard, missing, texts))
+    _append_ready(state, ckpt, plan, rows, output_file, columns)
+
+    total = sum(len(hashes) for _, hashes, _ in tasks)
+    print(f"🧠 {len(pending)} shard(s) of up to {shard_size} to finish, {total} article(s) for FinBERT "
+          f"on {workers} worker(s) × {threads} thread(s)")
+
+    per_worker = defaultdict(lambda: [0, 0, 0.0])  # pid → [shards, articles, busy seconds]
+    t0 = time.perf_counter()
+    if tasks:
+        with Pool(workers, initializer=_init_worker, initargs=(threads, max_length, quantize)) as pool:
+            for i, (shard, hashes, labels, confidences, seconds, pid) in \
+                    enumerate(pool.imap_unordered(_label_shard, tasks), 1):
+                # failed batches are not stored for reuse either
+                ok = [j for j, conf in enumerate(confidences) if conf > 0]
+                store.add_many([hashes[j] for j in ok], [labels[j] for j in ok], [confidences[j] for j in ok])
+                fresh = dict(zip(hashes, zip(labels, confidences)))
+                failed += write_part(shard, {h: fresh.get(h) or store.get(h) for h in plan[shard]})
+                _append_ready(state, ckpt, plan, rows, output_file, columns)
+
+                stats = per_worker[pid]
+                stats[0], stats[1], stats[2] = stats[0] + 1, stats[1] + len(hashes), stats[2] + seconds
+                if i % 10 == 0 or i == len(tasks):
+                    done = sum(s[1] for s in per_worker.values())
+                    print(f"   {i}/{len(tasks)} shards, {done} articles ({done / (time.perf_counter() - t0):.1f}/s)")
+
+    wall = time.perf_counter() - t0
+    if per_worker:
+        print("\n⏱️ Throughput per worker")
+        for pid, (shards, articles, busy) in sorted(per_worker.items()):
+            print(f"   pid {pid}: {shards} shards, {articles} articles, {articles / max(busy, 1e-9):.1f} articles/s")
+        print(f"   overall: {total} articles in {wall:.1f}s ({total / max(wall, 1e-9):.1f} articles/s)")
+
+    if failed:
+        print(f"⚠️ {failed} article(s) from failed batches left for the next run")
+    if state["next_shard"] == state["shards"]:
+        shutil.rmtree(ckpt)
+        print(f"\n✅ FinBERT-labeled data saved to {output_file} — {total - failed} articles labeled this run")
+    return total
@@ -0,0 +1,58 @@
+import numpy as np
+
+
+def minmax_downsample(x, y, n_buckets):
+    """
+    Split the series into n_buckets equal runs and keep each run's first,
+    lowest, highest and last point (in x order), so every peak and trough
+    survives. At most 4 * n_buckets points; returns indices into x / y.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    blocks = blocks[~np.all(np.isnan(blocks), axis=1)]
+    starts = np.arange(len(blocks)) * size
+    keep = np.concatenate([
+        starts,
+        starts + np.nanargmin(blocks, axis=1),
+        starts + np.nanargmax(blocks, axis=1),
+        np.minimum(starts + size - 1, n - 1),
+    ])
+    return np.unique(keep)
+
+
+def lttb_downsample(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: n_out points that keep the visual shape
+    of the line (first and last point always kept). Returns indices.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)  # n_out - 2 buckets between the end points
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()  # average of the next bucket
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(x, y, width_px, method="minmax"):
+    """Indices of the points worth drawing at width_px pixels."""
+    if method == "lttb":
+        return lttb_downsample(x, y, 2 * width_px)
+    return minmax_downsample(x, y, width_px)
@@ -0,0 +1,17 @@
+import hashlib
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text) -> str:
+    """Lower-case and collapse whitespace so trivially different copies hash the same."""
+    if text is None or text != text:  # None or NaN
+        return ""
+    return _WHITESPACE.sub(" ", str(text)).strip().lower()
+
+
+def article_hash(title, description="") -> str:
+    """Stable content key for an article: sha1 of its normalized title and description."""
+    key = normalize_text(title) + "\x1f" + normalize_text(description)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()